@@ -0,0 +1,444 @@
+import os
+import time
+import heapq
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from redis_client import hold_lease
+
+# Ticks run on a bounded pool; a tick is only handed over when a worker is free
+AGENT_WORKERS = int(os.environ.get('AGENT_WORKERS', 4))
+# Default seconds between ticks (agents can override with a tick_interval field)
+AGENT_TICK_INTERVAL = float(os.environ.get('AGENT_TICK_INTERVAL', 5))
+# How often the scheduler re-reads agent status from the state store
+AGENT_RECONCILE_INTERVAL = float(os.environ.get('AGENT_RECONCILE_INTERVAL', 2))
+# Only one process runs the agents; the others serve their metrics from the store
+AGENT_LEASE_KEY = 'lootos:agents:leader'
+AGENT_LEASE_TTL = 15
+# Paper-trading parameters
+AGENT_MIN_PROFIT_USD = float(os.environ.get('AGENT_MIN_PROFIT_USD', 5))
+AGENT_CAPITAL_USD = float(os.environ.get('AGENT_CAPITAL_USD', 1000))
+FLASH_LOAN_FEE = float(os.environ.get('FLASH_LOAN_FEE', 0.0005))
+
+METRICS_WINDOW = 60.0
+DAY = 86400.0
+
+STRATEGIES = {}
+
+
+def strategy(agent_type):
+    """Register a strategy class for an agent type"""
+    def register(cls):
+        STRATEGIES[agent_type] = cls
+        return cls
+    return register
+
+
+class AgentStrategy:
+    """What an agent does on each tick.
+
+    tick() returns a dict with 'evaluated' (items looked at), 'opportunities'
+    (items acted on or flagged), 'pnl' (USD) and 'trades' (ledger entries).
+    services holds the data sources the app provides (opportunities, gas,
+    and optionally an event bus subscribe()).
+    """
+
+    interval = AGENT_TICK_INTERVAL
+
+    def __init__(self, agent, services):
+        self.agent = agent
+        self.services = services
+        self._subscription = None
+
+    def tick(self):
+        raise NotImplementedError
+
+    def _opportunities(self):
+        """Opportunities published since the last tick, or a direct read without a bus.
+
+        The subscription coalesces, so an agent that ticks slower than the
+        feed publishes only ever sees the newest scan, never a backlog.
+        """
+        subscribe = self.services.get('subscribe')
+        if subscribe is None:
+            return self.services['opportunities']()
+        if self._subscription is None:
+            self._subscription = subscribe(['arbitrage'], maxsize=1, coalesce=True)
+            return self.services['opportunities']()
+        event = self._subscription.get(timeout=0)
+        return event['data'] if event else []
+
+    def _paper_trade(self, trade_type, opportunity, amount, profit):
+        return {
+            'id': f'trade_{uuid.uuid4().hex[:12]}',
+            'type': trade_type,
+            'token_pair': opportunity['token_pair'],
+            'route': opportunity.get('route'),
+            'amount': round(amount, 2),
+            'profit': round(profit, 2),
+            'status': 'completed',
+            'agent_id': self.agent['id'],
+            'mode': 'paper',
+            'timestamp': datetime.now().isoformat()
+        }
+
+
+class _OpportunityTaker(AgentStrategy):
+    """Takes the best opportunity it has not taken while it is still live"""
+
+    def __init__(self, agent, services):
+        super().__init__(agent, services)
+        self._taken = {}  # route key -> monotonic expiry
+
+    def _untaken(self, opportunities):
+        now = time.monotonic()
+        self._taken = {key: expiry for key, expiry in self._taken.items() if expiry > now}
+        return [opp for opp in opportunities if '|'.join(opp['pools']) not in self._taken]
+
+    def _take(self, opportunity):
+        self._taken['|'.join(opportunity['pools'])] = time.monotonic() + opportunity['expires_in']
+
+
+@strategy('arbitrage_detector')
+class ArbitrageDetector(_OpportunityTaker):
+    """Paper-trades the best net-positive arbitrage cycle at its optimal size, within capital"""
+
+    interval = 5.0
+
+    def tick(self):
+        opportunities = self._opportunities()
+        capital = float(self.agent.get('capital_usd', AGENT_CAPITAL_USD))
+        min_profit = float(self.agent.get('min_profit_usd', AGENT_MIN_PROFIT_USD))
+
+        trades = []
+        for opp in self._untaken(opportunities):
+            # Scale down to the capital on hand; profit shrinks roughly in proportion
+            size = min(opp['optimal_trade_size_usd'], capital)
+            gross = opp['estimated_profit'] * size / opp['optimal_trade_size_usd'] if opp['optimal_trade_size_usd'] else 0
+            profit = gross - opp['gas_cost_usd']
+            if profit >= min_profit:
+                self._take(opp)
+                trades.append(self._paper_trade('arbitrage', opp, size, profit))
+                break
+        return {
+            'evaluated': len(opportunities),
+            'opportunities': len(trades),
+            'pnl': sum(trade['profit'] for trade in trades),
+            'trades': trades
+        }
+
+
+@strategy('flash_loan_exploiter')
+class FlashLoanExploiter(_OpportunityTaker):
+    """Paper-trades cycles larger than the agent's capital, funded by a flash loan"""
+
+    interval = 10.0
+
+    def tick(self):
+        opportunities = self._opportunities()
+        capital = float(self.agent.get('capital_usd', AGENT_CAPITAL_USD))
+        min_profit = float(self.agent.get('min_profit_usd', AGENT_MIN_PROFIT_USD))
+
+        trades = []
+        for opp in self._untaken(opportunities):
+            size = opp['optimal_trade_size_usd']
+            if size <= capital:
+                continue
+            profit = opp['net_profit'] - size * FLASH_LOAN_FEE
+            if profit >= min_profit:
+                self._take(opp)
+                trades.append(self._paper_trade('flash_loan', opp, size, profit))
+                break
+        return {
+            'evaluated': len(opportunities),
+            'opportunities': len(trades),
+            'pnl': sum(trade['profit'] for trade in trades),
+            'trades': trades
+        }
+
+
+@strategy('mev_protection')
+class MevProtection(AgentStrategy):
+    """Flags opportunities worth front-running in the public mempool.
+
+    An opportunity whose gross profit covers several times its gas cost pays
+    a competing searcher to outbid it, so it should go through a private relay.
+    """
+
+    interval = 3.0
+
+    def tick(self):
+        opportunities = self._opportunities()
+        multiple = float(self.agent.get('exposure_multiple', 2))
+        flagged = [opp for opp in opportunities if opp['estimated_profit'] > opp['gas_cost_usd'] * multiple]
+        return {'evaluated': len(opportunities), 'opportunities': len(flagged), 'pnl': 0.0, 'trades': []}
+
+
+class AgentMetrics:
+    """Rolling per-agent counters: tick rate and latency over the last minute, PnL over a day"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.errors = 0
+        self.skipped = 0
+        self.evaluated = 0
+        self.opportunities = 0
+        self.pnl_total = 0.0
+        self.last_error = None
+        self.last_tick_at = None
+        self.last_lag = 0.0
+        self._ticks = deque()
+        self._latencies = deque(maxlen=200)
+        self._fills = deque()  # (time, pnl)
+
+    def record(self, now, latency, lag, result, error):
+        self.ticks += 1
+        self.last_tick_at = datetime.now().isoformat()
+        self.last_lag = lag
+        self._ticks.append(now)
+        self._latencies.append(latency)
+        if error is not None:
+            self.errors += 1
+            self.last_error = error
+            return
+        self.evaluated += result.get('evaluated', 0)
+        self.opportunities += result.get('opportunities', 0)
+        for trade in result.get('trades', ()):
+            self.pnl_total += trade['profit']
+            self._fills.append((now, trade['profit']))
+
+    def snapshot(self, now):
+        while self._ticks and self._ticks[0] < now - METRICS_WINDOW:
+            self._ticks.popleft()
+        while self._fills and self._fills[0][0] < now - DAY:
+            self._fills.popleft()
+        latencies = sorted(self._latencies)
+        fills = [pnl for _, pnl in self._fills]
+        wins = len([pnl for pnl in fills if pnl > 0])
+        return {
+            'ticks': self.ticks,
+            'ticks_per_s': round(len(self._ticks) / METRICS_WINDOW, 3),
+            'tick_latency_ms': {
+                'avg': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                'p95': round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+                'max': round(latencies[-1] * 1000, 2) if latencies else None
+            },
+            'schedule_lag_ms': round(self.last_lag * 1000, 2),
+            'skipped_ticks': self.skipped,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_tick_at': self.last_tick_at,
+            'opportunities_evaluated': self.evaluated,
+            'opportunities_taken': self.opportunities,
+            'pnl_total': round(self.pnl_total, 2),
+            'profit_24h': round(sum(fills), 2),
+            'trades_24h': len(fills),
+            'success_rate': round(wins / len(fills) * 100, 1) if fills else None
+        }
+
+
+class _AgentHandle:
+    def __init__(self, agent, strategy_instance, interval):
+        self.id = agent['id']
+        self.strategy = strategy_instance
+        self.interval = interval
+        self.status = None
+        self.generation = 0
+        self.in_flight = False
+        self.metrics = AgentMetrics()
+
+
+def performance_label(success_rate):
+    if success_rate is None:
+        return 'idle'
+    if success_rate >= 80:
+        return 'excellent'
+    if success_rate >= 60:
+        return 'good'
+    return 'poor'
+
+
+class AgentRuntime:
+    """Runs every active agent's strategy on its own tick interval.
+
+    One scheduler thread keeps a heap of due times and hands ticks to a
+    bounded pool, only when a worker is free, longest-overdue first. An agent
+    never has more than one tick in flight: if it is still busy when its next
+    tick comes due, that tick is skipped (back-pressure) instead of queued, so
+    a slow agent holds at most one worker and cannot starve the others.
+
+    Agent status lives in the state store, so start/stop/pause from any
+    process take effect here within AGENT_RECONCILE_INTERVAL.
+    """
+
+    def __init__(self, store, services, workers=AGENT_WORKERS):
+        self.store = store
+        self.services = services
+        self.workers = workers
+        self._executor = None
+        self._handles = {}
+        self._heap = []
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._leader = False
+        self._lease_token = uuid.uuid4().hex
+        self._next_reconcile = 0.0
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='agent')
+            self._thread = threading.Thread(target=self._run, daemon=True, name='agent-scheduler')
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+
+    def set_status(self, agent_id, status):
+        """Persist the desired status and apply it locally right away"""
+        if not self.store.update_agent(agent_id, {'status': status}):
+            return False
+        with self._cond:
+            handle = self._handles.get(agent_id)
+            if handle is not None:
+                self._apply_status(handle, status)
+            self._cond.notify()
+        return True
+
+    def metrics(self, agent_id):
+        with self._cond:
+            handle = self._handles.get(agent_id)
+            return handle.metrics.snapshot(time.monotonic()) if handle else None
+
+    def stats(self):
+        with self._cond:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'leader': self._leader,
+                'workers': self.workers,
+                'busy_workers': self._in_flight,
+                'scheduled_agents': len([h for h in self._handles.values() if h.status == 'active'])
+            }
+
+    # ------------------------------------------------------------------
+    # Scheduler
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            if now >= self._next_reconcile:
+                self._next_reconcile = now + AGENT_RECONCILE_INTERVAL
+                try:
+                    self._reconcile()
+                except Exception as e:
+                    print(f"⚠️  Agent reconcile error: {str(e)}")
+
+            with self._cond:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now and self._in_flight < self.workers:
+                    due, _, agent_id, generation = heapq.heappop(self._heap)
+                    handle = self._handles.get(agent_id)
+                    if handle is None or generation != handle.generation or handle.status != 'active':
+                        continue
+                    if handle.in_flight:
+                        handle.metrics.skipped += 1
+                    else:
+                        try:
+                            self._executor.submit(self._tick, handle, now - due)
+                        except RuntimeError:
+                            return  # interpreter shutting down
+                        handle.in_flight = True
+                        self._in_flight += 1
+                    # Fixed rate from the due time, but never a burst of catch-up ticks
+                    self._schedule(handle, max(due + handle.interval, now))
+
+                wait = self._next_reconcile - now
+                if self._heap and self._in_flight < self.workers:
+                    wait = min(wait, self._heap[0][0] - now)
+                self._cond.wait(max(wait, 0.001))
+
+    def _schedule(self, handle, due):
+        heapq.heappush(self._heap, (due, id(handle), handle.id, handle.generation))
+
+    def _apply_status(self, handle, status):
+        if status == handle.status:
+            return
+        if status == 'stopped':
+            handle.metrics = AgentMetrics()
+        handle.status = status
+        handle.generation += 1
+        if status == 'active' and self._leader:
+            self._schedule(handle, time.monotonic())
+
+    def _reconcile(self):
+        leader = hold_lease(AGENT_LEASE_KEY, self._lease_token, AGENT_LEASE_TTL)
+        agents = self.store.list_agents()
+        with self._cond:
+            if leader != self._leader:
+                self._leader = leader
+                for handle in self._handles.values():
+                    handle.generation += 1
+                    if leader and handle.status == 'active':
+                        self._schedule(handle, time.monotonic())
+
+            seen = set()
+            for agent in agents:
+                seen.add(agent['id'])
+                handle = self._handles.get(agent['id'])
+                if handle is None:
+                    strategy_cls = STRATEGIES.get(agent.get('type'))
+                    if strategy_cls is None:
+                        continue
+                    interval = float(agent.get('tick_interval') or strategy_cls.interval)
+                    handle = _AgentHandle(agent, strategy_cls(agent, self.services), interval)
+                    self._handles[agent['id']] = handle
+                else:
+                    handle.strategy.agent = agent
+                self._apply_status(handle, agent.get('status'))
+            for agent_id in set(self._handles) - seen:
+                self._handles.pop(agent_id).generation += 1
+
+    # ------------------------------------------------------------------
+    # Tick execution (pool threads)
+    # ------------------------------------------------------------------
+
+    def _tick(self, handle, lag):
+        started = time.monotonic()
+        result = None
+        error = None
+        try:
+            result = handle.strategy.tick()
+        except Exception as e:
+            error = str(e)
+        latency = time.monotonic() - started
+
+        with self._cond:
+            handle.metrics.record(started, latency, lag, result, error)
+            snapshot = handle.metrics.snapshot(time.monotonic())
+            handle.in_flight = False
+            self._in_flight -= 1
+            self._cond.notify()
+
+        try:
+            for trade in (result or {}).get('trades', ()):
+                self.store.add_trade(trade)
+                if 'on_trade' in self.services:
+                    self.services['on_trade'](trade)
+            self.store.update_agent(handle.id, {
+                'profit_24h': snapshot['profit_24h'],
+                'trades_24h': snapshot['trades_24h'],
+                'success_rate': snapshot['success_rate'],
+                'performance': performance_label(snapshot['success_rate']),
+                'metrics': snapshot
+            })
+        except Exception as e:
+            print(f"⚠️  Agent state update error: {str(e)}")
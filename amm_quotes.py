@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+
+# Gas units charged per transaction and per swap leg when netting profit
+ARB_GAS_BASE = int(os.environ.get('ARB_GAS_BASE', 21000))
+ARB_GAS_PER_SWAP = int(os.environ.get('ARB_GAS_PER_SWAP', 120000))
+
+
+def swap_out(amount_in, reserve_in, reserve_out, fee, max_in=np.inf):
+    """Output of selling amount_in into x*y=k reserves; broadcasts over any array shapes.
+
+    Net input beyond max_in earns nothing more, which is how a concentrated
+    pool leaving its active range is priced (conservatively).
+    """
+    net_in = np.minimum(amount_in * (1 - fee), max_in)
+    return reserve_out * net_in / (reserve_in + net_in)
+
+
+def gas_units(legs):
+    return ARB_GAS_BASE + np.asarray(legs) * ARB_GAS_PER_SWAP
+
+
+class RouteQuoter:
+    """Vectorised quotes for many multi-hop routes at once.
+
+    A route is a list of (pool, token_in) legs. Leg parameters are packed
+    into (routes, legs) arrays, padded with pass-through legs for shorter
+    routes, so quoting every route at every input size costs one array
+    operation per leg position instead of a Python loop per pool and size.
+    """
+
+    def __init__(self, routes):
+        count = len(routes)
+        width = max((len(route) for route in routes), default=0)
+        self.reserve_in = np.ones((count, width))
+        self.reserve_out = np.ones((count, width))
+        self.fee = np.zeros((count, width))
+        self.max_in = np.full((count, width), np.inf)
+        self.active = np.zeros((count, width), dtype=bool)
+
+        for i, route in enumerate(routes):
+            for j, (pool, token_in) in enumerate(route):
+                if token_in == pool.token0:
+                    self.reserve_in[i, j], self.reserve_out[i, j] = pool.reserve0, pool.reserve1
+                else:
+                    self.reserve_in[i, j], self.reserve_out[i, j] = pool.reserve1, pool.reserve0
+                self.fee[i, j] = pool.fee
+                self.max_in[i, j] = pool.max_input(token_in)
+                self.active[i, j] = True
+        self.legs = self.active.sum(axis=1)
+
+    def __len__(self):
+        return len(self.legs)
+
+    def spot_rate(self):
+        """Output per unit input for an infinitesimal trade (fees included, no slippage)"""
+        rates = (1 - self.fee) * self.reserve_out / self.reserve_in
+        return np.prod(np.where(self.active, rates, 1.0), axis=1)
+
+    def quote(self, amounts):
+        """Route outputs for the given inputs: (sizes,) -> (routes, sizes); (routes, sizes) also accepted"""
+        amount = np.asarray(amounts, dtype=float)
+        if amount.ndim == 1:
+            amount = np.broadcast_to(amount, (len(self), amount.shape[0]))
+        for j in range(self.active.shape[1]):
+            out = swap_out(amount, self.reserve_in[:, j, None], self.reserve_out[:, j, None],
+                           self.fee[:, j, None], self.max_in[:, j, None])
+            amount = np.where(self.active[:, j, None], out, amount)
+        return amount
+
+    def price_impact(self, amounts, outputs=None):
+        """Fraction of the spot rate lost to slippage at each input size"""
+        amount = np.asarray(amounts, dtype=float)
+        if outputs is None:
+            outputs = self.quote(amount)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            executed = outputs / amount
+        return np.nan_to_num(1 - executed / self.spot_rate()[:, None])
+
+    def optimal(self):
+        """Profit-maximising input for each cyclic route, in closed form.
+
+        A constant-product leg maps y -> a*y / (b + c*y), and such maps compose
+        into the same shape, so a whole route is out(x) = A*x / (B + C*x).
+        Profit out(x) - x peaks at x* = (sqrt(A*B) - B) / C, which is then
+        clipped to the largest input every concentrated leg can absorb.
+        """
+        count = len(self)
+        a = np.ones(count)
+        b = np.ones(count)
+        c = np.zeros(count)
+        x_cap = np.full(count, np.inf)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for j in range(self.active.shape[1]):
+                active = self.active[:, j]
+                gamma = 1 - self.fee[:, j]
+                # Input reaching this leg is a*x / (b + c*x); invert it at the leg's cap
+                leg_cap = self.max_in[:, j] / gamma
+                denominator = a - c * leg_cap
+                x_limit = np.where(denominator > 0, b * leg_cap / denominator, np.inf)
+                x_cap = np.where(active, np.minimum(x_cap, x_limit), x_cap)
+
+                leg_a = gamma * self.reserve_out[:, j]
+                leg_b = self.reserve_in[:, j]
+                a, b, c = (
+                    np.where(active, a * leg_a, a),
+                    np.where(active, b * leg_b, b),
+                    np.where(active, leg_b * c + gamma * a, c)
+                )
+
+            best = np.where((a > b) & (c > 0), (np.sqrt(a * b) - b) / c, 0.0)
+        amount_in = np.clip(np.nan_to_num(best), 0.0, x_cap)
+
+        amount_out = self.quote(amount_in[:, None])[:, 0]
+        return {
+            'amount_in': amount_in,
+            'amount_out': amount_out,
+            'profit': amount_out - amount_in,
+            'price_impact': self.price_impact(amount_in[:, None], amount_out[:, None])[:, 0]
+        }
+
+
+def cycle_routes(cycles, pools):
+    """Routes for scanner cycles: each leg sells the cycle's token into its pool"""
+    return [
+        [(pools[pool_id], token_in) for token_in, pool_id in zip(cycle['path'], cycle['pools'])]
+        for cycle in cycles
+    ]
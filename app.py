@@ -1,11 +1,38 @@
 import os
-import requests
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, session, stream_with_context
 from flask_cors import CORS
 from datetime import datetime, timedelta
-import json
+import time
+import uuid
 import random
-from web3 import Web3
+from urllib.parse import urlsplit
+from eth_utils import is_address
+from price_cache import PriceCache, parse_token_ttls
+from http_client import http_client
+from snapshots import read_snapshot, snapshot_status, track_tokens
+from streams import StreamHub, sse_events
+from eth_reads import EthReader
+from rpc_pool import RPCPool, rpc_urls
+from eth_connection import EthConnection
+from gas_oracle import GasOracle
+from chains import ChainRegistry, EVMAdapter, SolanaAdapter, SOLANA_RPC_URL
+from multicall import BulkBalanceResolver
+from state_store import create_store, to_epoch_ms
+from arbitrage import ArbitrageScanner
+from dex_pools import TOKENS, build_pools, read_pool_states, simulated_pool_states
+from amm_quotes import RouteQuoter, cycle_routes, gas_units
+from swap_quotes import OneInchClient, SwapQuoter, ONEINCH_API_URL
+from agents import AgentRuntime
+from event_bus import create_event_bus, MarketFeed
+from timeseries import TimeSeriesStore, MarketRecorder, RESOLUTIONS, parse_duration
+from portfolio import PortfolioEngine, PortfolioFeed, describe_asset
+from response_cache import ResponseCache
+from json_codec import FastJSONProvider
+from compression import compress_response
+from metrics import (
+    metrics, start_trace, end_trace, record_span, span,
+    METRICS_ENABLED, TRACE_SLOW_MS, PROMETHEUS_CONTENT_TYPE
+)
 
 app = Flask(__name__)
 
@@ -16,92 +43,199 @@ CORS(app, origins='*', methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
+# orjson-backed jsonify (stdlib fallback), same key order and separators as Flask's default
+app.json = FastJSONProvider(app)
+
 # API Keys
 COINGECKO_API_KEY = os.environ.get('COINGECKO_API_KEY', 'CG-N4rPDTz4tYR4muz3yzvn6L14')
+COINGECKO_API_URL = os.environ.get('COINGECKO_API_URL', 'https://pro-api.coingecko.com/api/v3')
 ETHEREUM_RPC_URL = os.environ.get('ETHEREUM_RPC_URL', 'https://eth-mainnet.g.alchemy.com/v2/dVXsVPqTznZkn1iqVj2ON')
+BSC_RPC_URL = os.environ.get('BSC_RPC_URL', 'https://bsc-dataseed.bnbchain.org')
 ONEINCH_API_KEY = os.environ.get('ONEINCH_API_KEY', '5acfmewC4Zl7oFD78chDa0P8EcwmrRi6')
 WALLET_ENCRYPTION_KEY = os.environ.get('WALLET_ENCRYPTION_KEY', 'vQeH7xJGzBzK9mL3pN5rF8sU1vY2wZ4aC6dE9gH0iJ2kL5mN8pQ1rS4tU7vW0xYzA=')
 
-# Initialize Web3 (with error handling)
-try:
-    w3 = Web3(Web3.HTTPProvider(ETHEREUM_RPC_URL))
-    ETH_CONNECTED = w3.is_connected()
-except Exception as e:
-    print(f"⚠️  Ethereum connection failed: {str(e)}")
-    ETH_CONNECTED = False
-    w3 = None
-
-# In-memory storage for demo (in production, use Redis/PostgreSQL)
-connected_wallets = {}
-trade_history = []
-ai_agents = [
+# Every JSON-RPC call is routed over the providers in ETHEREUM_RPC_URLS (or just ETHEREUM_RPC_URL)
+rpc_pool = RPCPool(rpc_urls(ETHEREUM_RPC_URL))
+# Batched, block-scoped JSON-RPC reads (gas price, balances, head)
+eth_reader = EthReader(rpc_pool)
+# Connection state is tracked live and nothing is fetched at import (see EthConnection)
+eth_connection = EthConnection(eth_reader, http_client)
+balance_resolver = BulkBalanceResolver(eth_reader)
+
+# BNB Smart Chain: the same EVM read path over its own providers (BSC_RPC_URLS, or just BSC_RPC_URL)
+bsc_rpc_pool = RPCPool(rpc_urls(BSC_RPC_URL, os.environ.get('BSC_RPC_URLS', '')))
+bsc_reader = EthReader(bsc_rpc_pool, ws_url='')
+bsc_connection = EthConnection(bsc_reader, http_client, name='BSC')
+
+# Wallets, agents and trades live in the shared state store (Redis when configured)
+store = create_store()
+
+DEFAULT_AGENTS = [
     {
         'id': 'arbitrage_scanner',
         'name': 'Arbitrage Scanner',
         'type': 'arbitrage_detector',
         'status': 'active',
-        'profit_24h': 125.50,
-        'trades_24h': 8,
-        'success_rate': 87.5,
-        'performance': 'excellent'
+        'profit_24h': 0.0,
+        'trades_24h': 0,
+        'success_rate': None,
+        'performance': 'idle'
     },
     {
         'id': 'flash_loan_hunter',
         'name': 'Flash Loan Hunter',
         'type': 'flash_loan_exploiter',
         'status': 'active',
-        'profit_24h': 89.25,
-        'trades_24h': 3,
-        'success_rate': 100.0,
-        'performance': 'excellent'
+        'profit_24h': 0.0,
+        'trades_24h': 0,
+        'success_rate': None,
+        'performance': 'idle'
     },
     {
         'id': 'mev_protector',
         'name': 'MEV Protector',
         'type': 'mev_protection',
         'status': 'active',
-        'profit_24h': 45.75,
-        'trades_24h': 12,
-        'success_rate': 75.0,
-        'performance': 'good'
+        'profit_24h': 0.0,
+        'trades_24h': 0,
+        'success_rate': None,
+        'performance': 'idle'
     }
 ]
+store.seed_agents(DEFAULT_AGENTS)
+
+def get_session_id():
+    """Identify the caller: X-Session-Id header, else a signed session cookie"""
+    session_id = request.headers.get('X-Session-Id')
+    if session_id:
+        return session_id
+    if 'sid' not in session:
+        session['sid'] = uuid.uuid4().hex
+    return session['sid']
+
+# ============================================================================
+# METRICS & TRACING
+# ============================================================================
+
+# Outbound hosts by provider; anything else is labelled with its host
+UPSTREAM_PROVIDERS = {
+    urlsplit(COINGECKO_API_URL).netloc: 'coingecko',
+    **{host: 'ethereum_rpc' for host in rpc_pool.hosts},
+    **{host: 'bsc_rpc' for host in bsc_rpc_pool.hosts},
+    urlsplit(SOLANA_RPC_URL).netloc: 'solana_rpc',
+    urlsplit(ONEINCH_API_URL).netloc: 'oneinch'
+}
+
+request_latency = metrics.histogram(
+    'lootos_request_duration_seconds', 'Time to build each response, by route',
+    ('route', 'method', 'status')
+)
+request_hop_time = metrics.histogram(
+    'lootos_request_hop_seconds', 'Time each request spent in one traced hop (upstream or heavy step), by route',
+    ('route', 'hop')
+)
+upstream_latency = metrics.histogram(
+    'lootos_upstream_duration_seconds', 'Outbound HTTP attempt latency, by provider', ('provider',)
+)
+upstream_requests = metrics.counter(
+    'lootos_upstream_requests_total', 'Outbound HTTP attempts, by provider and outcome', ('provider', 'outcome')
+)
+simulated_fallbacks = metrics.counter(
+    'lootos_simulated_fallbacks_total', 'Simulated values generated because the real source failed',
+    ('data',)
+)
+
+def observe_upstream(host, seconds, errored):
+    provider = UPSTREAM_PROVIDERS.get(host, host)
+    upstream_latency.observe(seconds, provider)
+    upstream_requests.inc(provider, 'error' if errored else 'ok')
+    record_span(provider, seconds)
+
+if METRICS_ENABLED:
+    http_client.on_request(observe_upstream)
+
+def request_route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def observe_request(route, method, status, trace):
+    """Record a finished request; returns its Server-Timing header value"""
+    elapsed = trace.elapsed()
+    request_latency.observe(elapsed, route, method, str(status))
+    summary = trace.summary()
+    for name, (_, seconds) in summary.items():
+        request_hop_time.observe(seconds, route, name)
+    if TRACE_SLOW_MS and elapsed * 1000 >= TRACE_SLOW_MS:
+        hops = ', '.join(f'{name} {seconds * 1000:.0f}ms x{calls}' for name, (calls, seconds) in summary.items())
+        print(f"🐢 Slow request {method} {route}: {elapsed * 1000:.0f}ms ({hops or 'no traced hops'})")
+    return trace.server_timing(elapsed)
+
+@app.before_request
+def begin_trace():
+    if METRICS_ENABLED:
+        start_trace()
+
+# Registered before the other response hooks so it runs last and times them too
+@app.after_request
+def finish_trace(response):
+    trace = end_trace()
+    if trace is not None:
+        response.headers['Server-Timing'] = observe_request(
+            request_route(), request.method, response.status_code, trace
+        )
+    return response
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def get_real_token_price(token_id):
-    """Get real token price from CoinGecko"""
+def fetch_token_prices(token_ids):
+    """Fetch several token prices from CoinGecko in a single request"""
+    url = f"{COINGECKO_API_URL}/simple/price"
+    params = {
+        'ids': ','.join(token_ids),
+        'vs_currencies': 'usd',
+        'include_24hr_change': 'true'
+    }
+    headers = {'x-cg-pro-api-key': COINGECKO_API_KEY}
+    
     try:
-        url = f"https://pro-api.coingecko.com/api/v3/simple/price"
-        params = {
-            'ids': token_id,
-            'vs_currencies': 'usd',
-            'include_24hr_change': 'true'
-        }
-        headers = {'x-cg-pro-api-key': COINGECKO_API_KEY}
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if token_id in data:
-                return {
-                    'price': data[token_id]['usd'],
-                    'change_24h': data[token_id].get('usd_24h_change', 0),
-                    'source': 'coingecko_pro_real_time'
-                }
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
+        response.raise_for_status()
+        data = response.json()
     except Exception as e:
         print(f"⚠️  CoinGecko API error: {str(e)}")
+        raise
     
-    # Fallback to simulated data with realistic variation
+    return {
+        token_id: {
+            'price': data[token_id]['usd'],
+            'change_24h': data[token_id].get('usd_24h_change', 0),
+            'source': 'coingecko_pro_real_time'
+        }
+        for token_id in token_ids
+        if token_id in data and 'usd' in data[token_id]
+    }
+
+def fetch_token_price(token_id):
+    """Fetch a token price from CoinGecko, raising if it is unavailable"""
+    prices = fetch_token_prices([token_id])
+    if token_id not in prices:
+        raise KeyError(f'CoinGecko returned no price for {token_id}')
+    return prices[token_id]
+
+def simulated_token_price(token_id):
+    """Fallback to simulated data with realistic variation"""
+    simulated_fallbacks.inc('price')
     base_prices = {
         'ethereum': 2450.0,
         'bitcoin': 43500.0,
         'solana': 98.5,
+        'binancecoin': 310.0,
         'usd-coin': 1.0,
-        'tether': 1.0
+        'tether': 1.0,
+        'dai': 1.0,
+        'wrapped-bitcoin': 43500.0,
+        'chainlink': 14.5
     }
     
     base_price = base_prices.get(token_id, 100.0)
@@ -115,24 +249,58 @@ def get_real_token_price(token_id):
         'source': 'simulated_with_variation'
     }
 
-def get_real_gas_prices():
-    """Get real gas prices from Ethereum network"""
-    try:
-        if ETH_CONNECTED and w3:
-            gas_price = w3.eth.gas_price
-            gas_price_gwei = w3.from_wei(gas_price, 'gwei')
-            
-            return {
-                'safe': float(gas_price_gwei * 0.9),
-                'standard': float(gas_price_gwei),
-                'fast': float(gas_price_gwei * 1.2),
-                'instant': float(gas_price_gwei * 1.5),
-                'source': 'ethereum_network_real_time'
-            }
-    except Exception as e:
-        print(f"⚠️  Gas price fetch error: {str(e)}")
+# Shared across gunicorn workers through Redis (REDIS_URL), with an in-process LRU in front
+price_cache = PriceCache(
+    fetch_token_price,
+    simulated_token_price,
+    batch_loader=fetch_token_prices,
+    token_ttls=parse_token_ttls(os.environ.get('PRICE_CACHE_TTLS', ''))
+)
+
+def get_real_token_price(token_id):
+    """Get real token price from CoinGecko (worker snapshot first, then the shared cache)"""
+    return get_real_token_prices([token_id])[token_id]
+
+def get_real_token_prices(token_ids):
+    """Get prices for many tokens, batching cache misses into one CoinGecko call per chunk"""
+    snapshot = read_snapshot('prices')
+    snapshot_prices = snapshot['data'] if snapshot else {}
+    
+    missing = [token_id for token_id in token_ids if token_id not in snapshot_prices]
+    prices = {}
+    if missing:
+        # Have the worker pick these up so later requests are served from the snapshot
+        track_tokens(missing)
+        prices = price_cache.get_many(missing)
     
-    # Fallback to realistic simulated gas prices
+    return {
+        token_id: snapshot_prices[token_id] if token_id in snapshot_prices else prices[token_id]
+        for token_id in token_ids
+    }
+
+# Fee estimates from a rolling window of recent blocks, refreshed only when the head moves
+gas_oracle = GasOracle(eth_reader)
+bsc_gas_oracle = GasOracle(bsc_reader, chain='bsc')
+
+# Balances, heads and fee estimates per chain; queries over several chains run concurrently
+chains = ChainRegistry([
+    EVMAdapter('ethereum', 'ETH', 'ethereum', eth_reader, eth_connection, gas_oracle),
+    EVMAdapter('bsc', 'BNB', 'binancecoin', bsc_reader, bsc_connection, bsc_gas_oracle),
+    SolanaAdapter(SOLANA_RPC_URL)
+])
+if METRICS_ENABLED:
+    chains['solana'].on_request(observe_upstream)
+
+def fetch_gas_prices():
+    """Fetch gas prices from the Ethereum network, raising if it is unavailable"""
+    if not eth_connection.connected:
+        raise ConnectionError('Ethereum RPC not connected')
+    # Nodes without eth_feeHistory (pre-London chains) get the legacy estimate
+    return chains['ethereum'].read_fees()
+
+def simulated_gas_prices():
+    """Fallback to realistic simulated gas prices"""
+    simulated_fallbacks.inc('gas')
     base_gas = random.uniform(15, 45)  # Realistic range
     return {
         'safe': round(base_gas * 0.9, 1),
@@ -142,35 +310,258 @@ def get_real_gas_prices():
         'source': 'simulated_realistic'
     }
 
+def get_real_gas_prices():
+    """Get real gas prices from the ingestion worker snapshot, or the Ethereum network"""
+    snapshot = read_snapshot('gas')
+    if snapshot:
+        return snapshot['data']
+    
+    try:
+        if eth_connection.connected:
+            return fetch_gas_prices()
+    except Exception as e:
+        print(f"⚠️  Gas price fetch error: {str(e)}")
+    
+    return simulated_gas_prices()
+
+def get_block_number():
+    """Latest Ethereum block number from the worker snapshot, or the RPC node"""
+    snapshot = read_snapshot('block')
+    if snapshot:
+        return snapshot['data']['block_number']
+    return eth_reader.head() if eth_connection.connected else 0
+
+# Token/pool graph for the arbitrage scanner; only pools whose reserves changed are rescanned
+arb_scanner = ArbitrageScanner()
+for pool in build_pools():
+    arb_scanner.add_pool(pool, scan=False)
+
+# Opportunities are priced off one block's reserves
+ARB_OPPORTUNITY_TTL = int(os.environ.get('ARB_OPPORTUNITY_TTL', 12))
+
+def get_pool_token_prices():
+    """USD price of every token in the pool registry, by symbol"""
+    token_prices = current_token_prices([coingecko_id for _, _, coingecko_id in TOKENS.values()])
+    return {symbol: token_prices[coingecko_id]['price'] for symbol, (_, _, coingecko_id) in TOKENS.items()}
+
+def refresh_pool_reserves(prices):
+    """Feed the latest pool states into the scanner; returns where they came from"""
+    pools = list(arb_scanner.pools.values())
+    states = None
+    source = 'onchain'
+    
+    try:
+        if eth_connection.connected:
+            # Block-scoped read: repeated refreshes within a block cost nothing
+            states = read_pool_states(eth_reader, pools)
+    except Exception as e:
+        print(f"⚠️  Pool reserve fetch error: {str(e)}")
+    
+    if not states:
+        states = simulated_pool_states(pools, prices)
+        source = 'simulated'
+        simulated_fallbacks.inc('pool_reserves')
+    
+    for pool_id, state in states.items():
+        if arb_scanner.pools[pool_id].state() != state:
+            arb_scanner.update_reserves(pool_id, *state)
+    return source
+
 def generate_arbitrage_opportunities():
-    """Generate realistic arbitrage opportunities"""
-    opportunities = []
-    tokens = ['ETH/USDC', 'BTC/USDT', 'SOL/USDC', 'LINK/ETH']
-    dexs = ['uniswap_v3', 'sushiswap', 'curve', 'balancer']
+    """Profitable pool cycles from the scanner, sized for maximum profit net of gas"""
+    prices = get_pool_token_prices()
+    source = refresh_pool_reserves(prices)
+    with span('arbitrage_scan'):
+        cycles = arb_scanner.opportunities()
+        if not cycles:
+            return []
+        
+        # Optimal size, output and slippage for every cycle in one vectorised pass
+        quoter = RouteQuoter(cycle_routes(cycles, arb_scanner.pools))
+        sized = quoter.optimal()
+    start_prices = [prices[cycle['path'][0]] for cycle in cycles]
+    gross_profit = sized['profit'] * start_prices
+    gas_cost_eth = gas_units(quoter.legs) * current_gas_prices()['standard'] * 1e-9
+    gas_cost_usd = gas_cost_eth * prices['WETH']
+    net_profit = gross_profit - gas_cost_usd
     
-    for i, token_pair in enumerate(tokens):
-        if random.random() > 0.3:  # 70% chance of opportunity
-            buy_dex = random.choice(dexs)
-            sell_dex = random.choice([d for d in dexs if d != buy_dex])
-            
-            profit_potential = random.uniform(0.005, 0.025)  # 0.5% to 2.5%
-            estimated_profit = profit_potential * 10000  # For $10k trade
-            
-            opportunity = {
-                'id': f'arb_{int(datetime.now().timestamp())}_{i}',
-                'token_pair': token_pair,
-                'buy_dex': buy_dex,
-                'sell_dex': sell_dex,
-                'profit_potential': round(profit_potential, 4),
-                'estimated_profit': round(estimated_profit, 2),
-                'confidence': 'high' if profit_potential > 0.015 else 'medium',
-                'expires_in': random.randint(30, 300),  # 30s to 5min
-                'gas_cost_estimate': round(random.uniform(0.005, 0.02), 3)
-            }
-            opportunities.append(opportunity)
+    timestamp = int(datetime.now().timestamp())
+    opportunities = []
+    for i in sorted(range(len(cycles)), key=lambda i: net_profit[i], reverse=True):
+        if net_profit[i] <= 0:
+            break
+        cycle = cycles[i]
+        path = cycle['path']
+        
+        opportunity = {
+            'id': f'arb_{timestamp}_{len(opportunities)}',
+            'token_pair': f'{path[0]}/{path[1]}',
+            'route': path,
+            'pools': cycle['pools'],
+            'dexes': cycle['dexes'],
+            'legs': cycle['legs'],
+            'buy_dex': cycle['dexes'][0],
+            'sell_dex': cycle['dexes'][-1],
+            'profit_potential': round(cycle['profit_potential'], 4),
+            'optimal_trade_size': round(float(sized['amount_in'][i]), 6),
+            'optimal_trade_size_usd': round(float(sized['amount_in'][i] * start_prices[i]), 2),
+            'price_impact': round(float(sized['price_impact'][i]), 4),
+            'estimated_profit': round(float(gross_profit[i]), 2),
+            'gas_cost_estimate': round(float(gas_cost_eth[i]), 5),
+            'gas_cost_usd': round(float(gas_cost_usd[i]), 2),
+            'net_profit': round(float(net_profit[i]), 2),
+            'confidence': 'high' if net_profit[i] > gas_cost_usd[i] else 'medium',
+            'expires_in': ARB_OPPORTUNITY_TTL,
+            'source': source
+        }
+        opportunities.append(opportunity)
     
     return opportunities
 
+# ============================================================================
+# MARKET DATA BUS
+# ============================================================================
+
+# Each source is read once per interval and published; endpoints, agents and streams share it
+MARKET_FEED_INTERVALS = {
+    'prices': float(os.environ.get('FEED_PRICES_INTERVAL', 5)),
+    'gas': float(os.environ.get('FEED_GAS_INTERVAL', 6)),
+    'blocks': float(os.environ.get('FEED_BLOCKS_INTERVAL', 6)),
+    'arbitrage': float(os.environ.get('FEED_ARBITRAGE_INTERVAL', 5))
+}
+MARKET_FEED_ENABLED = os.environ.get('MARKET_FEED', 'on') != 'off'
+
+def market_token_ids():
+    token_ids = PORTFOLIO_TOKENS + [coingecko_id for _, _, coingecko_id in TOKENS.values()]
+    return list(dict.fromkeys(token_ids + portfolio_engine.assets()))
+
+event_bus = create_event_bus()
+market_feed = MarketFeed(event_bus)
+market_feed.add_source('prices', lambda: get_real_token_prices(market_token_ids()), MARKET_FEED_INTERVALS['prices'])
+market_feed.add_source('gas', get_real_gas_prices, MARKET_FEED_INTERVALS['gas'])
+market_feed.add_source('blocks', lambda: {'block_number': get_block_number()}, MARKET_FEED_INTERVALS['blocks'])
+market_feed.add_source('arbitrage', generate_arbitrage_opportunities, MARKET_FEED_INTERVALS['arbitrage'])
+
+def current_token_prices(token_ids):
+    """Prices from the market feed, fetching only tokens it does not carry"""
+    published = market_feed.current('prices') or {}
+    missing = [token_id for token_id in token_ids if token_id not in published]
+    fetched = get_real_token_prices(missing) if missing else {}
+    return {token_id: published[token_id] if token_id in published else fetched[token_id] for token_id in token_ids}
+
+def current_gas_prices():
+    return market_feed.current('gas') or get_real_gas_prices()
+
+def current_block_number():
+    published = market_feed.current('blocks')
+    return published['block_number'] if published else get_block_number()
+
+def current_arbitrage_opportunities():
+    published = market_feed.current('arbitrage')
+    return published if published is not None else generate_arbitrage_opportunities()
+
+# Price and gas history, recorded from the bus into 1m/1h/1d rollups
+timeseries = TimeSeriesStore()
+market_recorder = MarketRecorder(event_bus, timeseries)
+
+def price_samples(prices):
+    # Simulated fallbacks are noise around a constant; keep them out of the history
+    return {
+        f'price:{token_id}': price_data['price']
+        for token_id, price_data in prices.items()
+        if not price_data['source'].startswith('simulated')
+    }
+
+def gas_samples(gas_prices):
+    if gas_prices['source'].startswith('simulated'):
+        return {}
+    return {f'gas:{tier}': gas_prices[tier] for tier in ('safe', 'standard', 'fast', 'instant')}
+
+market_recorder.add_topic('prices', price_samples)
+market_recorder.add_topic('gas', gas_samples)
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+# Serialized GET responses, keyed by the versions of the data they were built from
+response_cache = ResponseCache()
+
+def bus_version(topic):
+    event = event_bus.latest(topic)
+    return event['offset'] if event else None
+
+for topic in ('prices', 'gas', 'blocks', 'arbitrage', 'fills'):
+    response_cache.register_version(topic, lambda topic=topic: bus_version(topic))
+response_cache.register_version('portfolio', lambda: portfolio_engine.version)
+
+STATIC_CACHE_CONTROL = 'public, max-age=300'
+
+def cache_metrics():
+    """Hit/miss counters of every cache layer, read from their own stats at scrape time"""
+    prices = price_cache.stats()
+    responses = response_cache.stats()
+    reads = eth_reader.stats()
+    quotes = swap_quoter.stats()
+    caches = {
+        'price': (prices['local_hits'] + prices['redis_hits'] + prices['stale_hits'], prices['misses']),
+        'response': (responses['hits'], responses['misses']),
+        'eth_reads': (reads['cache_hits'], reads['rpc_calls']),
+        'swap_quotes': (quotes['hits'] + quotes['coalesced'], quotes['misses'])
+    }
+    return [
+        ('lootos_cache_lookups_total', 'counter', 'Cache lookups, by cache and result', [
+            sample
+            for cache, (hits, misses) in caches.items()
+            for sample in (({'cache': cache, 'result': 'hit'}, hits), ({'cache': cache, 'result': 'miss'}, misses))
+        ]),
+        ('lootos_cache_hit_ratio', 'gauge', 'Hits / lookups since process start, by cache', [
+            ({'cache': cache}, round(hits / (hits + misses), 4) if hits + misses else 0.0)
+            for cache, (hits, misses) in caches.items()
+        ]),
+        ('lootos_response_not_modified_total', 'counter', 'Cached GETs answered with 304 Not Modified', [
+            ({}, responses['not_modified'])
+        ])
+    ]
+
+def upstream_metrics():
+    return [
+        ('lootos_upstream_circuit_open', 'gauge', 'Whether the circuit breaker for a provider is open', [
+            ({'provider': UPSTREAM_PROVIDERS.get(host, host)}, int(host_stats['circuit'] == 'open'))
+            for host, host_stats in http_client.stats().items()
+        ])
+    ]
+
+def rpc_pool_metrics():
+    stats = rpc_pool.stats()
+    providers = stats['providers']
+    return [
+        ('lootos_rpc_provider_latency_seconds', 'gauge', 'EWMA latency of successful requests, by RPC provider', [
+            ({'provider': provider['url']}, provider['latency_ms'] / 1000)
+            for provider in providers if provider['latency_ms'] is not None
+        ]),
+        ('lootos_rpc_provider_error_rate', 'gauge', 'EWMA error rate, by RPC provider', [
+            ({'provider': provider['url']}, provider['error_rate']) for provider in providers
+        ]),
+        ('lootos_rpc_provider_ejected', 'gauge', 'Whether the RPC provider is currently ejected', [
+            ({'provider': provider['url']}, int(provider['ejected'])) for provider in providers
+        ]),
+        ('lootos_rpc_provider_ejections_total', 'counter', 'Times the RPC provider was ejected', [
+            ({'provider': provider['url']}, provider['ejections']) for provider in providers
+        ]),
+        ('lootos_rpc_hedges_total', 'counter', 'Reads duplicated to a second provider, and how many it won', [
+            ({'result': 'sent'}, stats['hedges']),
+            ({'result': 'won'}, stats['hedges_won'])
+        ]),
+        ('lootos_rpc_failovers_total', 'counter', 'Requests retried on the next provider after a failure', [
+            ({}, stats['failovers'])
+        ])
+    ]
+
+metrics.add_collector(cache_metrics)
+metrics.add_collector(upstream_metrics)
+metrics.add_collector(rpc_pool_metrics)
+
 # ============================================================================
 # BASIC ENDPOINTS
 # ============================================================================
@@ -184,27 +575,52 @@ def home():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text exposition of this process's metrics"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.route('/api/health')
+@response_cache.cached(ttl=2)
 def health():
     return jsonify({
         'status': 'healthy',
         'service': 'LootOS API',
         'blockchain_connections': {
-            'ethereum': 'connected' if ETH_CONNECTED else 'disconnected'
+            'ethereum': eth_connection.state,
+            'bsc': bsc_connection.state,
+            'solana': 'connected' if chains['solana'].connected else 'disconnected'
         },
         'apis': {
             'coingecko': 'connected' if COINGECKO_API_KEY else 'missing_key',
             'oneinch': 'connected' if ONEINCH_API_KEY else 'missing_key'
         },
+        'price_cache': price_cache.stats(),
+        'upstreams': http_client.stats(),
+        'snapshots': snapshot_status(['prices', 'gas', 'block']),
+        'eth_reads': eth_reader.stats(),
+        'eth_connection': eth_connection.status(),
+        'rpc_pool': rpc_pool.stats(),
+        'chains': chains.stats(),
+        'gas_oracle': gas_oracle.stats(),
+        'response_cache': response_cache.stats(),
+        'json_encoder': app.json.encoder.name,
+        'state_backend': store.backend,
+        'arbitrage_scanner': arb_scanner.stats(),
+        'swap_quotes': swap_quoter.stats(),
+        'event_bus': event_bus.stats(),
+        'timeseries': timeseries.stats(),
+        'portfolio_engine': portfolio_engine.stats(),
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/config')
+@response_cache.cached(cache_control=STATIC_CACHE_CONTROL)
 def config():
     return jsonify({
         'success': True,
         'config': {
-            'supported_chains': ['ethereum', 'solana', 'bsc'],
+            'supported_chains': chains.names,
             'supported_dexs': ['uniswap_v3', 'sushiswap', 'curve', 'balancer'],
             'features': {
                 'arbitrage_detection': True,
@@ -219,20 +635,18 @@ def config():
 # PRICE ENDPOINTS
 # ============================================================================
 
+TOKEN_ALIASES = {
+    'eth': 'ethereum',
+    'btc': 'bitcoin',
+    'sol': 'solana'
+}
+
 @app.route('/api/price/<token>')
+@response_cache.cached(depends=('prices',), ttl=MARKET_FEED_INTERVALS['prices'])
 def get_token_price(token):
     try:
-        token_map = {
-            'ethereum': 'ethereum',
-            'bitcoin': 'bitcoin',
-            'solana': 'solana',
-            'eth': 'ethereum',
-            'btc': 'bitcoin',
-            'sol': 'solana'
-        }
-        
-        token_id = token_map.get(token.lower(), token.lower())
-        price_data = get_real_token_price(token_id)
+        token_id = TOKEN_ALIASES.get(token.lower(), token.lower())
+        price_data = current_token_prices([token_id])[token_id]
         
         return jsonify({
             'success': True,
@@ -250,15 +664,12 @@ def get_token_price(token):
         }), 500
 
 @app.route('/api/prices/multi')
+@response_cache.cached(depends=('prices',), ttl=MARKET_FEED_INTERVALS['prices'])
 def get_multiple_prices():
     try:
         tokens = request.args.get('tokens', 'ethereum,bitcoin,solana').split(',')
-        prices = {}
-        
-        for token in tokens:
-            token_id = token.strip().lower()
-            price_data = get_real_token_price(token_id)
-            prices[token_id] = price_data
+        token_ids = [token.strip().lower() for token in tokens if token.strip()]
+        prices = current_token_prices(token_ids)
         
         return jsonify({
             'success': True,
@@ -272,6 +683,105 @@ def get_multiple_prices():
             'error': str(e)
         }), 500
 
+# ============================================================================
+# HISTORY ENDPOINTS
+# ============================================================================
+
+HISTORY_DEFAULT_CANDLES = int(os.environ.get('HISTORY_DEFAULT_CANDLES', 500))
+HISTORY_MAX_CANDLES = 50000  # a month of 1m candles
+RETURN_WINDOWS = {'1d': 86400, '7d': 7 * 86400, '30d': 30 * 86400}
+
+def history_series(token):
+    """Series name for a token id/alias, or 'gas' / 'gas:<tier>'"""
+    token = token.lower()
+    if token == 'gas':
+        return 'gas:standard'
+    if token.startswith('gas:'):
+        return token
+    return 'price:' + TOKEN_ALIASES.get(token, token)
+
+def parse_history_range(args, default_resolution='1h'):
+    """(resolution, start, end, limit) from query args; start/end are ISO-8601 or epoch seconds"""
+    resolution = args.get('resolution', default_resolution)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    start = to_epoch_ms(args['start']) // 1000 if args.get('start') else None
+    end = to_epoch_ms(args['end']) // 1000 if args.get('end') else None
+    limit = min(int(args.get('limit', HISTORY_DEFAULT_CANDLES)), HISTORY_MAX_CANDLES)
+    return resolution, start, end, limit
+
+@app.route('/api/history/ohlc/<token>')
+@response_cache.cached(depends=('prices', 'gas'), ttl=60)
+def get_ohlc(token):
+    try:
+        try:
+            resolution, start, end, limit = parse_history_range(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        series = history_series(token)
+        candles = timeseries.candles(series, resolution, start, end, limit)
+        if candles is None:
+            return jsonify({'success': False, 'error': f'No history recorded for {token}'}), 404
+        
+        return jsonify({
+            'success': True,
+            'series': series,
+            'resolution': resolution,
+            # Column-oriented: candles[field][i] belongs to the bucket starting at time[i];
+            # numpy columns go to the JSON encoder as they are
+            'candles': candles,
+            'count': len(candles['time']),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/history/returns/<token>')
+@response_cache.cached(depends=('prices', 'gas'), ttl=60)
+def get_historical_returns(token):
+    try:
+        try:
+            windows = {
+                label: parse_duration(label)
+                for label in request.args.get('windows', ','.join(RETURN_WINDOWS)).split(',') if label.strip()
+            }
+            resolution, start, end, limit = parse_history_range(request.args, '1d')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        series = history_series(token)
+        candles = timeseries.candles(series, resolution, start, end, limit)
+        if candles is None:
+            return jsonify({'success': False, 'error': f'No history recorded for {token}'}), 404
+        
+        # Close-to-close percent returns per bucket
+        closes = candles['close']
+        period_returns = (closes[1:] / closes[:-1] - 1) * 100 if len(closes) > 1 else closes[:0]
+        
+        return jsonify({
+            'success': True,
+            'series': series,
+            'returns': timeseries.returns(series, windows),
+            'periods': {
+                'resolution': resolution,
+                'time': candles['time'][1:],
+                'return': period_returns.round(4),
+                'volatility': round(float(period_returns.std()), 4) if len(period_returns) > 1 else None
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ============================================================================
 # WALLET ENDPOINTS
 # ============================================================================
@@ -282,6 +792,7 @@ def connect_wallet():
         data = request.get_json()
         wallet_type = data.get('type', 'unknown')
         address = data.get('address', '')
+        chain = data.get('chain') or ('ethereum' if wallet_type == 'MetaMask' else 'solana')
         
         if not address:
             return jsonify({
@@ -289,14 +800,22 @@ def connect_wallet():
                 'error': 'Wallet address is required'
             }), 400
         
-        # Store connected wallet
+        if chain not in chains:
+            return jsonify({
+                'success': False,
+                'error': f'Unsupported chain: {chain}',
+                'supported_chains': chains.names
+            }), 400
+        
+        # Store connected wallet under the caller's session
         wallet_id = f"wallet_{int(datetime.now().timestamp())}"
-        connected_wallets[wallet_id] = {
+        store.add_wallet(get_session_id(), {
+            'wallet_id': wallet_id,
             'type': wallet_type,
             'address': address,
             'connected_at': datetime.now().isoformat(),
-            'chain': 'ethereum' if wallet_type == 'MetaMask' else 'solana'
-        }
+            'chain': chain
+        })
         
         return jsonify({
             'success': True,
@@ -314,12 +833,14 @@ def connect_wallet():
 @app.route('/api/wallet/disconnect', methods=['POST'])
 def disconnect_wallet():
     try:
-        # Clear all connected wallets (simplified)
-        connected_wallets.clear()
+        # Disconnect one address, or every wallet in this session
+        data = request.get_json(silent=True) or {}
+        removed = store.remove_wallets(get_session_id(), data.get('address'))
         
         return jsonify({
             'success': True,
-            'message': 'Wallet disconnected successfully'
+            'message': 'Wallet disconnected successfully',
+            'disconnected': removed
         })
         
     except Exception as e:
@@ -331,28 +852,43 @@ def disconnect_wallet():
 @app.route('/api/wallet/balance/<address>')
 def get_wallet_balance(address):
     try:
-        chain = request.args.get('chain', 'ethereum')
+        chain = request.args.get('chain', 'ethereum').lower()
+        adapter = chains.get(chain)
+        
+        if adapter is None:
+            return jsonify({
+                'success': False,
+                'error': f'Unsupported chain: {chain}',
+                'supported_chains': chains.names
+            }), 400
         
-        # Get real balance if connected to Ethereum
-        if chain == 'ethereum' and ETH_CONNECTED and w3:
+        if not adapter.is_address(address):
+            return jsonify({
+                'success': False,
+                'error': f'Invalid {chain} address'
+            }), 400
+        
+        # Get real balance if the chain's RPC is reachable
+        if adapter.connected:
             try:
-                balance_wei = w3.eth.get_balance(address)
-                balance_eth = w3.from_wei(balance_wei, 'ether')
+                raw_balance = chains.run(adapter.balance(address))
                 
                 return jsonify({
                     'success': True,
                     'balance': {
                         'address': address,
-                        'native_balance': float(balance_eth),
-                        'balance_wei': str(balance_wei),
+                        'native_balance': adapter.to_native(raw_balance),
+                        f'balance_{adapter.raw_unit}': str(raw_balance),
+                        'symbol': adapter.symbol,
                         'chain': chain,
-                        'source': 'ethereum_network_real_time'
+                        'source': f'{chain}_network_real_time'
                     }
                 })
             except Exception as e:
                 print(f"⚠️  Real balance fetch failed: {str(e)}")
         
         # Fallback to simulated balance
+        simulated_fallbacks.inc('balance')
         simulated_balance = random.uniform(0.1, 10.0)
         
         return jsonify({
@@ -360,6 +896,7 @@ def get_wallet_balance(address):
             'balance': {
                 'address': address,
                 'native_balance': round(simulated_balance, 4),
+                'symbol': adapter.symbol,
                 'chain': chain,
                 'source': 'simulated'
             }
@@ -371,47 +908,275 @@ def get_wallet_balance(address):
             'error': str(e)
         }), 500
 
+BULK_BALANCE_MAX_ADDRESSES = int(os.environ.get('BULK_BALANCE_MAX_ADDRESSES', 1000))
+
+def simulated_balance(address):
+    simulated_fallbacks.inc('balance')
+    return {
+        'address': address,
+        'native_balance': round(random.uniform(0.1, 10.0), 4)
+    }
+
+@app.route('/api/wallet/balances', methods=['POST'])
+def get_wallet_balances():
+    """Bulk native/ERC-20 balances, streamed as one JSON line per chunk of addresses"""
+    try:
+        data = request.get_json() or {}
+        addresses = data.get('addresses', [])
+        tokens = data.get('tokens', [])
+        chain = data.get('chain', 'ethereum')
+        adapter = chains.get(chain)
+        
+        if adapter is None:
+            return jsonify({
+                'success': False,
+                'error': f'Unsupported chain: {chain}',
+                'supported_chains': chains.names
+            }), 400
+        
+        if tokens and chain != 'ethereum':
+            return jsonify({
+                'success': False,
+                'error': 'Token balances are only supported on ethereum'
+            }), 400
+        
+        if not addresses:
+            return jsonify({
+                'success': False,
+                'error': 'At least one address is required'
+            }), 400
+        
+        if len(addresses) > BULK_BALANCE_MAX_ADDRESSES:
+            return jsonify({
+                'success': False,
+                'error': f'At most {BULK_BALANCE_MAX_ADDRESSES} addresses per request'
+            }), 400
+        
+        invalid = [item for item in addresses if not adapter.is_address(item)]
+        invalid += [item for item in tokens if not is_address(item)]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid address',
+                'invalid': invalid
+            }), 400
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    def generate():
+        resolved = 0
+        chunk_index = 0
+        
+        if chain == 'ethereum' and eth_connection.connected:
+            try:
+                for balances in balance_resolver.resolve(addresses, tokens):
+                    yield app.json.dumps_bytes({
+                        'chunk': chunk_index,
+                        'chain': chain,
+                        'source': 'ethereum_network_real_time',
+                        'balances': balances
+                    }) + b'\n'
+                    resolved += len(balances)
+                    chunk_index += 1
+            except Exception as e:
+                print(f"⚠️  Bulk balance fetch failed: {str(e)}")
+        elif chain != 'ethereum' and adapter.connected:
+            try:
+                for start in range(0, len(addresses), balance_resolver.chunk_size):
+                    chunk = addresses[start:start + balance_resolver.chunk_size]
+                    raw_balances = chains.run(adapter.balances(chunk))
+                    yield app.json.dumps_bytes({
+                        'chunk': chunk_index,
+                        'chain': chain,
+                        'source': f'{chain}_network_real_time',
+                        'balances': [
+                            {'address': address, 'native_balance': adapter.to_native(raw)}
+                            for address, raw in zip(chunk, raw_balances)
+                        ]
+                    }) + b'\n'
+                    resolved += len(chunk)
+                    chunk_index += 1
+            except Exception as e:
+                print(f"⚠️  Bulk balance fetch failed: {str(e)}")
+        
+        # Fallback to simulated balances for whatever is left
+        remaining = addresses[resolved:]
+        for start in range(0, len(remaining), balance_resolver.chunk_size):
+            yield app.json.dumps_bytes({
+                'chunk': chunk_index,
+                'chain': chain,
+                'source': 'simulated',
+                'balances': [simulated_balance(address) for address in remaining[start:start + balance_resolver.chunk_size]]
+            }) + b'\n'
+            chunk_index += 1
+        
+        yield app.json.dumps_bytes({
+            'success': True,
+            'done': True,
+            'total_addresses': len(addresses),
+            'chunks': chunk_index,
+            'timestamp': datetime.now().isoformat()
+        }) + b'\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def parse_chain_wallets(value):
+    """[(chain, address), ...] from 'chain:address,chain:address'"""
+    wallets = []
+    for item in value.split(','):
+        chain, _, address = item.strip().partition(':')
+        if item.strip():
+            wallets.append((chain.lower(), address))
+    return wallets
+
+@app.route('/api/wallet/portfolio')
+def get_wallet_portfolio():
+    """Native balances of wallets across chains, valued in USD; every chain is queried at once"""
+    try:
+        if request.args.get('wallets'):
+            wallets = parse_chain_wallets(request.args['wallets'])
+        else:
+            wallets = [(wallet.get('chain', 'ethereum'), wallet['address']) for wallet in store.list_wallets(get_session_id())]
+        
+        if not wallets:
+            return jsonify({
+                'success': False,
+                'error': 'No wallets: connect one or pass wallets=chain:address,...'
+            }), 400
+        
+        invalid = [f'{chain}:{address}' for chain, address in wallets
+                   if chain not in chains or not chains[chain].is_address(address)]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': 'Unsupported chain or invalid address',
+                'invalid': invalid,
+                'supported_chains': chains.names
+            }), 400
+        
+        addresses_by_chain = {}
+        for chain, address in wallets:
+            addresses_by_chain.setdefault(chain, []).append(address)
+        # One batched read per chain, all chains in flight together while prices are looked up
+        connected = {chain: addresses for chain, addresses in addresses_by_chain.items() if chains[chain].connected}
+        pending = chains.submit(chains.balances(connected)) if connected else None
+        prices = current_token_prices(list(dict.fromkeys(chains[chain].price_id for chain in addresses_by_chain)))
+        results = pending.result(chains.timeout + 1) if pending else {}
+        
+        assets = []
+        sources = {}
+        for chain, addresses in addresses_by_chain.items():
+            adapter = chains[chain]
+            raw_balances = results.get(chain)
+            if isinstance(raw_balances, Exception) or raw_balances is None:
+                if raw_balances is not None:
+                    print(f"⚠️  {chain} balance fetch failed: {str(raw_balances) or type(raw_balances).__name__}")
+                sources[chain] = 'simulated'
+                balances = [simulated_balance(address)['native_balance'] for address in addresses]
+            else:
+                sources[chain] = f'{chain}_network_real_time'
+                balances = [adapter.to_native(raw) for raw in raw_balances]
+            price = prices[adapter.price_id]['price']
+            for address, balance in zip(addresses, balances):
+                assets.append({
+                    'chain': chain,
+                    'address': address,
+                    'symbol': adapter.symbol,
+                    'native_balance': balance,
+                    'price_usd': price,
+                    'value_usd': round(balance * price, 2),
+                    'source': sources[chain]
+                })
+        
+        return jsonify({
+            'success': True,
+            'portfolio': {
+                'total_value_usd': round(sum(asset['value_usd'] for asset in assets), 2),
+                'assets': assets,
+                'sources': sources
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ============================================================================
 # PORTFOLIO ENDPOINTS
 # ============================================================================
 
+# Sample holdings for the default portfolio; wallets set their own through /api/portfolio/holdings
+PORTFOLIO_HOLDINGS = {'ethereum': 2.5, 'bitcoin': 0.1, 'solana': 15.0}
+PORTFOLIO_TOKENS = list(PORTFOLIO_HOLDINGS)
+DEFAULT_PORTFOLIO = 'default'
+PORTFOLIO_MAX_ASSETS = int(os.environ.get('PORTFOLIO_MAX_ASSETS', 1000))
+
+ASSET_NAMES = {
+    **{coingecko_id: (symbol, symbol) for symbol, (_, _, coingecko_id) in TOKENS.items()},
+    'ethereum': ('ETH', 'Ethereum'),
+    'bitcoin': ('BTC', 'Bitcoin'),
+    'solana': ('SOL', 'Solana')
+}
+
+def describe_portfolio_asset(token_id):
+    return ASSET_NAMES.get(token_id) or describe_asset(token_id)
+
+# Valuations are kept current from price ticks on the bus; requests read precomputed results
+store.seed_holdings(DEFAULT_PORTFOLIO, PORTFOLIO_HOLDINGS)
+portfolio_engine = PortfolioEngine(describe_portfolio_asset)
+portfolio_feed = PortfolioFeed(event_bus, portfolio_engine)
+
+def portfolio_id_from_request():
+    wallet = request.args.get('wallet', '').strip().lower()
+    return wallet or DEFAULT_PORTFOLIO
+
+def portfolio_valuation(portfolio_id):
+    """Precomputed valuation, loading holdings and pricing assets the feed has not covered yet"""
+    if portfolio_id not in portfolio_engine:
+        holdings = store.get_holdings(portfolio_id)
+        if holdings is None:
+            return None
+        portfolio_engine.set_holdings(portfolio_id, holdings)
+    
+    stale = portfolio_engine.stale_assets(portfolio_id, MARKET_FEED_INTERVALS['prices'] * 2)
+    if stale:
+        portfolio_engine.apply_prices(current_token_prices(stale))
+    return portfolio_engine.valuation(portfolio_id)
+
+def build_portfolio(valuation):
+    """Build the /api/portfolio payload from a portfolio valuation"""
+    return {
+        'total_value': valuation['total_value'],
+        'assets': valuation['assets']
+    }
+
+def build_portfolio_overview(valuation):
+    """Build the /api/portfolio-overview payload from a portfolio valuation"""
+    return {
+        'total_value': valuation['total_value'],
+        'daily_change': valuation['daily_change'],
+        'daily_change_percent': valuation['daily_change_percent'],
+        'asset_allocation': valuation['assets']
+    }
+
 @app.route('/api/portfolio')
+@response_cache.cached(depends=('portfolio',), ttl=MARKET_FEED_INTERVALS['prices'], cache_control='private, no-cache')
 def get_portfolio():
     try:
-        # Get real prices for portfolio calculation
-        eth_data = get_real_token_price('ethereum')
-        btc_data = get_real_token_price('bitcoin')
-        sol_data = get_real_token_price('solana')
-        
-        portfolio = {
-            'total_value': 0,
-            'assets': []
-        }
-        
-        # Sample portfolio with real prices
-        holdings = [
-            {'symbol': 'ETH', 'amount': 2.5, 'price_data': eth_data},
-            {'symbol': 'BTC', 'amount': 0.1, 'price_data': btc_data},
-            {'symbol': 'SOL', 'amount': 15.0, 'price_data': sol_data}
-        ]
-        
-        for holding in holdings:
-            value = holding['amount'] * holding['price_data']['price']
-            portfolio['total_value'] += value
-            
-            portfolio['assets'].append({
-                'symbol': holding['symbol'],
-                'amount': holding['amount'],
-                'price': holding['price_data']['price'],
-                'value': round(value, 2),
-                'change_24h': holding['price_data']['change_24h']
-            })
-        
-        portfolio['total_value'] = round(portfolio['total_value'], 2)
+        valuation = portfolio_valuation(portfolio_id_from_request())
+        if valuation is None:
+            return jsonify({'success': False, 'error': 'No holdings for this wallet'}), 404
         
         return jsonify({
             'success': True,
-            'portfolio': portfolio,
+            'portfolio': build_portfolio(valuation),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -422,59 +1187,57 @@ def get_portfolio():
         }), 500
 
 @app.route('/api/portfolio-overview')
+@response_cache.cached(depends=('portfolio',), ttl=MARKET_FEED_INTERVALS['prices'], cache_control='private, no-cache')
 def get_portfolio_overview():
     try:
-        # Get real prices
-        eth_data = get_real_token_price('ethereum')
-        btc_data = get_real_token_price('bitcoin')
-        sol_data = get_real_token_price('solana')
-        
-        # Calculate portfolio with real prices
-        total_value = (2.5 * eth_data['price']) + (0.1 * btc_data['price']) + (15.0 * sol_data['price'])
-        daily_change = (2.5 * eth_data['price'] * eth_data['change_24h'] / 100) + \
-                      (0.1 * btc_data['price'] * btc_data['change_24h'] / 100) + \
-                      (15.0 * sol_data['price'] * sol_data['change_24h'] / 100)
-        
-        daily_change_percent = (daily_change / total_value) * 100 if total_value > 0 else 0
-        
-        overview = {
-            'total_value': round(total_value, 2),
-            'daily_change': round(daily_change, 2),
-            'daily_change_percent': round(daily_change_percent, 2),
-            'asset_allocation': [
-                {
-                    'symbol': 'ETH',
-                    'name': 'Ethereum',
-                    'amount': 2.5,
-                    'price': eth_data['price'],
-                    'value': round(2.5 * eth_data['price'], 2),
-                    'percentage': round((2.5 * eth_data['price'] / total_value) * 100, 1),
-                    'change_24h': eth_data['change_24h']
-                },
-                {
-                    'symbol': 'BTC',
-                    'name': 'Bitcoin',
-                    'amount': 0.1,
-                    'price': btc_data['price'],
-                    'value': round(0.1 * btc_data['price'], 2),
-                    'percentage': round((0.1 * btc_data['price'] / total_value) * 100, 1),
-                    'change_24h': btc_data['change_24h']
-                },
-                {
-                    'symbol': 'SOL',
-                    'name': 'Solana',
-                    'amount': 15.0,
-                    'price': sol_data['price'],
-                    'value': round(15.0 * sol_data['price'], 2),
-                    'percentage': round((15.0 * sol_data['price'] / total_value) * 100, 1),
-                    'change_24h': sol_data['change_24h']
-                }
-            ]
-        }
+        valuation = portfolio_valuation(portfolio_id_from_request())
+        if valuation is None:
+            return jsonify({'success': False, 'error': 'No holdings for this wallet'}), 404
+        
+        return jsonify({
+            'success': True,
+            'overview': build_portfolio_overview(valuation),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/portfolio/holdings', methods=['POST'])
+def set_portfolio_holdings():
+    try:
+        data = request.get_json(silent=True) or {}
+        portfolio_id = str(data.get('wallet') or '').strip().lower()
+        raw_holdings = data.get('holdings')
+        
+        if not portfolio_id or portfolio_id == DEFAULT_PORTFOLIO:
+            return jsonify({'success': False, 'error': 'wallet is required'}), 400
+        if not isinstance(raw_holdings, dict):
+            return jsonify({'success': False, 'error': 'holdings must be an object of {token: amount}'}), 400
+        if len(raw_holdings) > PORTFOLIO_MAX_ASSETS:
+            return jsonify({'success': False, 'error': f'At most {PORTFOLIO_MAX_ASSETS} assets per portfolio'}), 400
+        try:
+            holdings = {
+                TOKEN_ALIASES.get(token.lower(), token.lower()): float(amount)
+                for token, amount in raw_holdings.items()
+            }
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'Amounts must be numbers'}), 400
+        if any(amount < 0 for amount in holdings.values()):
+            return jsonify({'success': False, 'error': 'Amounts must not be negative'}), 400
+        
+        store.set_holdings(portfolio_id, holdings)
+        portfolio_engine.set_holdings(portfolio_id, holdings)
+        # Other workers pick the change up from the bus
+        event_bus.publish('holdings', holdings, key=portfolio_id)
         
         return jsonify({
             'success': True,
-            'overview': overview,
+            'wallet': portfolio_id,
+            'portfolio': build_portfolio_overview(portfolio_valuation(portfolio_id)),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -488,12 +1251,17 @@ def get_portfolio_overview():
 # TRADING ENDPOINTS
 # ============================================================================
 
+TRADE_HISTORY_PAGE_SIZE = int(os.environ.get('TRADE_HISTORY_PAGE_SIZE', 50))
+TRADE_HISTORY_MAX_PAGE_SIZE = 500
+
 @app.route('/api/trading/history')
 def get_trade_history():
+    """Newest-first trade history; filter with type, pair, status, since, until and page with cursor"""
     try:
         # Generate realistic trade history with current prices
-        if not trade_history:
-            # Generate some sample trades
+        if not store.count_trades():
+            # Generate some sample trades, oldest first so the stream stays time-ordered
+            sample_trades = []
             for i in range(10):
                 trade_time = datetime.now() - timedelta(hours=random.randint(1, 48))
                 profit = random.uniform(-50, 200)
@@ -508,12 +1276,43 @@ def get_trade_history():
                     'timestamp': trade_time.isoformat(),
                     'tx_hash': f'0x{"".join([hex(random.randint(0, 15))[2:] for _ in range(64)])}'
                 }
-                trade_history.append(trade)
+                sample_trades.append(trade)
+            store.seed_trades(sorted(sample_trades, key=lambda t: t['timestamp']))
+        
+        limit = min(int(request.args.get('limit', TRADE_HISTORY_PAGE_SIZE)), TRADE_HISTORY_MAX_PAGE_SIZE)
+        trades, next_cursor = store.query_trades(
+            filters={
+                'type': request.args.get('type'),
+                'token_pair': request.args.get('pair'),
+                'status': request.args.get('status')
+            },
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            cursor=request.args.get('cursor'),
+            limit=max(limit, 1)
+        )
         
         return jsonify({
             'success': True,
-            'trades': trade_history,
-            'total_trades': len(trade_history),
+            'trades': trades,
+            'count': len(trades),
+            'next_cursor': next_cursor,
+            'total_trades': store.count_trades(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/trading/stats')
+def get_trade_stats():
+    try:
+        return jsonify({
+            'success': True,
+            'stats': store.trade_aggregates(),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -524,14 +1323,72 @@ def get_trade_history():
         }), 500
 
 @app.route('/api/arbitrage')
+@response_cache.cached(depends=('arbitrage',), ttl=MARKET_FEED_INTERVALS['arbitrage'])
 def get_arbitrage_opportunities():
     try:
-        opportunities = generate_arbitrage_opportunities()
+        opportunities = current_arbitrage_opportunities()
         
         return jsonify({
             'success': True,
             'opportunities': opportunities,
             'count': len(opportunities),
+            'scanner': arb_scanner.stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ============================================================================
+# SWAP QUOTE ENDPOINTS
+# ============================================================================
+
+# 1inch and the on-chain pools are quoted in parallel; results are cached per block and amount bucket
+swap_quoter = SwapQuoter(
+    arb_scanner.pools,
+    TOKENS,
+    lambda: refresh_pool_reserves(get_pool_token_prices()),
+    OneInchClient(ONEINCH_API_KEY) if ONEINCH_API_KEY else None
+)
+
+# Native ETH is quoted as WETH
+SWAP_TOKEN_ALIASES = {'ETH': 'WETH'}
+
+@app.route('/api/swap/quote')
+def get_swap_quote():
+    """Best route for selling amount of one token for another (?from=WETH&to=USDC&amount=1.5)"""
+    try:
+        src = request.args.get('from', '').upper()
+        dst = request.args.get('to', '').upper()
+        src, dst = SWAP_TOKEN_ALIASES.get(src, src), SWAP_TOKEN_ALIASES.get(dst, dst)
+        
+        unsupported = [symbol for symbol in (src, dst) if symbol not in TOKENS]
+        if unsupported or src == dst:
+            return jsonify({
+                'success': False,
+                'error': 'from and to must be two different supported tokens',
+                'supported_tokens': list(TOKENS)
+            }), 400
+        
+        try:
+            amount = float(request.args.get('amount', 1))
+        except ValueError:
+            amount = 0
+        if not 0 < amount < float('inf'):
+            return jsonify({'success': False, 'error': 'amount must be a positive number'}), 400
+        
+        prices = get_pool_token_prices()
+        gas_price_gwei = current_gas_prices()['standard']
+        # Gas units -> ETH -> units of the output token
+        gas_cost = lambda units: units * gas_price_gwei * 1e-9 * prices['WETH'] / prices[dst]
+        quote = swap_quoter.quote(src, dst, amount, current_block_number(), gas_cost)
+        
+        return jsonify({
+            'success': True,
+            'quote': quote,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -545,19 +1402,61 @@ def get_arbitrage_opportunities():
 # AI AGENTS ENDPOINTS
 # ============================================================================
 
+# Agent strategies tick on a bounded pool; status and metrics are shared through the store
+AGENT_RUNTIME_ENABLED = os.environ.get('AGENT_RUNTIME', 'on') != 'off'
+
+agent_runtime = AgentRuntime(store, {
+    'opportunities': current_arbitrage_opportunities,
+    'gas_prices': current_gas_prices,
+    'subscribe': event_bus.subscribe,
+    'on_trade': lambda trade: event_bus.publish('fills', trade, key=trade['id'])
+})
+
+@app.before_request
+def start_background_services():
+    eth_connection.ensure_started()
+    bsc_connection.ensure_started()
+    market_recorder.ensure_started()
+    portfolio_feed.ensure_started()
+    if MARKET_FEED_ENABLED:
+        market_feed.ensure_started()
+    if AGENT_RUNTIME_ENABLED:
+        agent_runtime.ensure_started()
+
+def reset_after_fork():
+    """Per-process clients for a freshly forked worker (gunicorn post_fork, celery worker_process_init).
+
+    Pooled sockets inherited from the parent must not be shared, and
+    threads do not survive a fork; background services restart lazily.
+    """
+    http_client.reset()
+    chains.reset()
+    eth_connection.ensure_started()
+    bsc_connection.ensure_started()
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+def find_agent(agent_ref):
+    """Agent by id or by type"""
+    for agent in store.list_agents():
+        if agent['id'] == agent_ref or agent['type'] == agent_ref:
+            return agent
+    return None
+
 @app.route('/api/agents')
 def get_agents():
     try:
-        # Update agent profits with some variation
-        for agent in ai_agents:
-            agent['profit_24h'] += random.uniform(-5, 10)
-            agent['profit_24h'] = max(0, agent['profit_24h'])  # No negative profits
+        agents = store.list_agents()
         
         return jsonify({
             'success': True,
-            'agents': ai_agents,
-            'total_agents': len(ai_agents),
-            'active_agents': len([a for a in ai_agents if a['status'] == 'active']),
+            'agents': agents,
+            'total_agents': len(agents),
+            'active_agents': len([a for a in agents if a['status'] == 'active']),
+            'total_profit_24h': round(sum(a.get('profit_24h') or 0 for a in agents), 2),
+            'runtime': agent_runtime.stats(),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -568,6 +1467,7 @@ def get_agents():
         }), 500
 
 @app.route('/api/agents/templates')
+@response_cache.cached(cache_control=STATIC_CACHE_CONTROL)
 def get_agent_templates():
     try:
         templates = [
@@ -609,23 +1509,52 @@ def get_agent_templates():
             'error': str(e)
         }), 500
 
+def set_agent_status(status, verb):
+    data = request.get_json() or {}
+    agent_type = data.get('agent_type') or data.get('agent_id')
+    agent = find_agent(agent_type)
+    if agent is None:
+        return jsonify({
+            'success': False,
+            'error': f'Agent {agent_type} not found'
+        }), 404
+    
+    agent_runtime.set_status(agent['id'], status)
+    
+    return jsonify({
+        'success': True,
+        'message': f'Agent {agent_type} {verb} successfully',
+        'agent_id': agent['id'],
+        'status': status,
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/agents/start', methods=['POST'])
 def start_agent():
     try:
-        data = request.get_json()
-        agent_type = data.get('agent_type')
+        return set_agent_status('active', 'started')
         
-        # Find and activate agent
-        for agent in ai_agents:
-            if agent['type'] == agent_type or agent['id'] == agent_type:
-                agent['status'] = 'active'
-                break
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/agents/pause', methods=['POST'])
+def pause_agent():
+    try:
+        return set_agent_status('paused', 'paused')
         
+    except Exception as e:
         return jsonify({
-            'success': True,
-            'message': f'Agent {agent_type} started successfully',
-            'timestamp': datetime.now().isoformat()
-        })
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/agents/stop', methods=['POST'])
+def stop_agent():
+    try:
+        return set_agent_status('stopped', 'stopped')
         
     except Exception as e:
         return jsonify({
@@ -637,29 +1566,55 @@ def start_agent():
 # ANALYTICS ENDPOINTS
 # ============================================================================
 
+def portfolio_returns(holdings, windows, now=None):
+    """Percent change in portfolio value over each window; None until every holding has that much history"""
+    now = time.time() if now is None else now
+    
+    def value_at(ts):
+        prices = [timeseries.value_at(f'price:{token_id}', ts) for token_id in holdings]
+        if any(price is None for price in prices):
+            return None
+        return sum(amount * price for amount, price in zip(holdings.values(), prices))
+    
+    current = value_at(now)
+    returns = {}
+    for label, seconds in windows.items():
+        past = value_at(now - seconds)
+        returns[label] = round((current / past - 1) * 100, 2) if current is not None and past else None
+    return returns
+
+def build_dashboard_analytics(gas_prices):
+    """Build the /api/dashboard-analytics payload"""
+    # Calculate real analytics based on current data
+    agents = store.list_agents()
+    trade_stats = store.trade_aggregates()  # maintained on insert, O(1) to read
+    total_profit = sum(agent['profit_24h'] for agent in agents)
+    active_trades = trade_stats['by_status'].get('pending', 0)
+    success_rate = trade_stats['win_rate'] if trade_stats['total_trades'] else 85.0
+    ai_agents_active = len([a for a in agents if a['status'] == 'active'])
+    
+    analytics = {
+        'total_profit': round(total_profit, 2),
+        'active_trades': active_trades,
+        'success_rate': round(success_rate, 1),
+        'ai_agents_active': ai_agents_active,
+        'portfolio_performance': portfolio_returns(store.get_holdings(DEFAULT_PORTFOLIO) or PORTFOLIO_HOLDINGS, {
+            'daily_return': RETURN_WINDOWS['1d'],
+            'weekly_return': RETURN_WINDOWS['7d'],
+            'monthly_return': RETURN_WINDOWS['30d']
+        }),
+        'market_sentiment': random.choice(['bullish', 'bearish', 'neutral']),
+        'gas_prices': gas_prices,
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    return analytics
+
 @app.route('/api/dashboard-analytics')
+@response_cache.cached(depends=('prices', 'gas', 'fills'), ttl=5)
 def get_dashboard_analytics():
     try:
-        # Calculate real analytics based on current data
-        total_profit = sum(agent['profit_24h'] for agent in ai_agents)
-        active_trades = len([t for t in trade_history if t['status'] == 'pending'])
-        success_rate = sum(1 for t in trade_history if t['profit'] > 0) / len(trade_history) * 100 if trade_history else 85.0
-        ai_agents_active = len([a for a in ai_agents if a['status'] == 'active'])
-        
-        analytics = {
-            'total_profit': round(total_profit, 2),
-            'active_trades': active_trades,
-            'success_rate': round(success_rate, 1),
-            'ai_agents_active': ai_agents_active,
-            'portfolio_performance': {
-                'daily_return': round(random.uniform(-2, 5), 2),
-                'weekly_return': round(random.uniform(-5, 15), 2),
-                'monthly_return': round(random.uniform(-10, 30), 2)
-            },
-            'market_sentiment': random.choice(['bullish', 'bearish', 'neutral']),
-            'gas_prices': get_real_gas_prices(),
-            'timestamp': datetime.now().isoformat()
-        }
+        analytics = build_dashboard_analytics(current_gas_prices())
         
         return jsonify({
             'success': True,
@@ -677,20 +1632,35 @@ def get_dashboard_analytics():
 # BLOCKCHAIN ENDPOINTS
 # ============================================================================
 
+# Chains whose status is read live; Ethereum's comes from the market feed
+SIDE_CHAINS = [name for name in chains.names if name != 'ethereum']
+
+def build_blockchain_status(block_number, gas_prices, side_chains):
+    """Build the /api/blockchain/status payload (side_chains: status by chain from chains.status)"""
+    gas_is_real = not gas_prices['source'].startswith('simulated')
+    
+    status = {
+        'ethereum': {
+            'connected': eth_connection.state == 'connected',
+            'block_number': block_number,
+            'gas_price_gwei': round(gas_prices['standard'], 1) if gas_is_real else 0,
+            'base_fee_gwei': gas_prices.get('base_fee') if gas_is_real else None,
+            'next_base_fee_gwei': gas_prices.get('next_base_fee') if gas_is_real else None
+        },
+        **side_chains
+    }
+    
+    return status
+
 @app.route('/api/blockchain/status')
+@response_cache.cached(depends=('gas', 'blocks'), ttl=MARKET_FEED_INTERVALS['blocks'])
 def get_blockchain_status():
     try:
-        status = {
-            'ethereum': {
-                'connected': ETH_CONNECTED,
-                'block_number': w3.eth.block_number if ETH_CONNECTED and w3 else 0,
-                'gas_price_gwei': round(w3.from_wei(w3.eth.gas_price, 'gwei'), 1) if ETH_CONNECTED and w3 else 0
-            },
-            'solana': {
-                'connected': False,  # Simplified for now
-                'slot': 0
-            }
-        }
+        # Other chains are queried in the background while Ethereum is read
+        side_chains = chains.submit(chains.status(SIDE_CHAINS))
+        # Gas first: its batch also refreshes the head, so the block number is free
+        gas_prices = current_gas_prices()
+        status = build_blockchain_status(current_block_number(), gas_prices, side_chains.result(chains.timeout + 1))
         
         return jsonify({
             'success': True,
@@ -705,10 +1675,29 @@ def get_blockchain_status():
         }), 500
 
 @app.route('/api/blockchain/gas-prices')
+@response_cache.cached(depends=('gas',), ttl=MARKET_FEED_INTERVALS['gas'])
 def get_gas_prices():
     try:
-        chain = request.args.get('chain', 'ethereum')
-        gas_prices = get_real_gas_prices()
+        chain = request.args.get('chain', 'ethereum').lower()
+        adapter = chains.get(chain)
+        
+        if adapter is None:
+            return jsonify({
+                'success': False,
+                'error': f'Unsupported chain: {chain}',
+                'supported_chains': chains.names
+            }), 400
+        
+        if chain == 'ethereum':
+            gas_prices = current_gas_prices()
+        else:
+            try:
+                gas_prices = chains.run(adapter.fees())
+            except Exception as e:
+                return jsonify({
+                    'success': False,
+                    'error': f'{chain} fee estimate unavailable: {str(e) or type(e).__name__}'
+                }), 503
         
         return jsonify({
             'success': True,
@@ -723,6 +1712,114 @@ def get_gas_prices():
             'error': str(e)
         }), 500
 
+# ============================================================================
+# STREAMING ENDPOINTS
+# ============================================================================
+
+# Seconds between recomputations of each topic; subscribers only receive what changed
+STREAM_INTERVALS = {
+    'prices': float(os.environ.get('STREAM_PRICES_INTERVAL', 5)),
+    'gas': float(os.environ.get('STREAM_GAS_INTERVAL', 12)),
+    'arbitrage': float(os.environ.get('STREAM_ARBITRAGE_INTERVAL', 10)),
+    'agents': float(os.environ.get('STREAM_AGENTS_INTERVAL', 5)),
+    'blocks': float(os.environ.get('STREAM_BLOCKS_INTERVAL', 6))
+}
+
+def stream_prices():
+    return current_token_prices(PORTFOLIO_TOKENS)
+
+def stream_arbitrage():
+    opportunities = current_arbitrage_opportunities()
+    return {'opportunities': opportunities, 'count': len(opportunities)}
+
+def stream_agents():
+    agents = store.list_agents()
+    return {
+        'agents': agents,
+        'total_agents': len(agents),
+        'active_agents': len([a for a in agents if a['status'] == 'active'])
+    }
+
+def stream_blocks():
+    return {'ethereum': {'block_number': current_block_number()}}
+
+stream_hub = StreamHub()
+stream_hub.register('prices', stream_prices, STREAM_INTERVALS['prices'])
+stream_hub.register('gas', current_gas_prices, STREAM_INTERVALS['gas'])
+stream_hub.register('arbitrage', stream_arbitrage, STREAM_INTERVALS['arbitrage'])
+stream_hub.register('agents', stream_agents, STREAM_INTERVALS['agents'])
+stream_hub.register('blocks', stream_blocks, STREAM_INTERVALS['blocks'])
+
+def parse_stream_topics(value):
+    """Validate a comma-separated topic list, raising ValueError on unknown topics"""
+    topics = [topic.strip() for topic in (value or ','.join(stream_hub.topics)).split(',') if topic.strip()]
+    unknown = [topic for topic in topics if topic not in stream_hub.topics]
+    if unknown:
+        raise ValueError(f"Unknown topics: {', '.join(unknown)}")
+    return topics
+
+@app.route('/api/stream')
+def stream():
+    """Server-Sent Events: a snapshot per topic, then merge-patch deltas as data changes"""
+    try:
+        topics = parse_stream_topics(request.args.get('topics'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'available_topics': stream_hub.topics
+        }), 400
+    
+    subscription = stream_hub.subscribe(topics)
+    return Response(
+        stream_with_context(sse_events(stream_hub, subscription)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/stream/stats')
+def stream_stats():
+    return jsonify({
+        'success': True,
+        'stream': stream_hub.stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+EVENT_REPLAY_MAX = 1000
+
+@app.route('/api/events')
+def get_events():
+    """Replay retained bus events: ?topics=fills,prices&from_offset=N (default: newest only)"""
+    try:
+        topics = [topic.strip() for topic in request.args.get('topics', 'fills').split(',') if topic.strip()]
+        from_offset = request.args.get('from_offset')
+        if from_offset is None:
+            events = [event for event in (event_bus.latest(topic) for topic in topics) if event]
+        else:
+            if event_bus.backend == 'memory':
+                from_offset = int(from_offset)
+            events = event_bus.replay(topics, from_offset)
+        limit = min(int(request.args.get('limit', EVENT_REPLAY_MAX)), EVENT_REPLAY_MAX)
+        
+        return jsonify({
+            'success': True,
+            'events': events[:limit],
+            'count': len(events[:limit]),
+            'bus': event_bus.stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -736,18 +1833,31 @@ def not_found(error):
             '/api/health',
             '/api/config',
             '/api/price/<token>',
+            '/api/history/ohlc/<token>',
+            '/api/history/returns/<token>',
             '/api/portfolio',
             '/api/portfolio-overview',
+            '/api/portfolio/holdings',
             '/api/trading/history',
+            '/api/trading/stats',
             '/api/dashboard-analytics',
             '/api/arbitrage',
+            '/api/swap/quote',
             '/api/agents',
             '/api/agents/templates',
+            '/api/agents/start',
+            '/api/agents/pause',
+            '/api/agents/stop',
             '/api/wallet/connect',
             '/api/wallet/disconnect',
             '/api/wallet/balance/<address>',
+            '/api/wallet/balances',
+            '/api/wallet/portfolio',
             '/api/blockchain/status',
-            '/api/blockchain/gas-prices'
+            '/api/blockchain/gas-prices',
+            '/api/stream',
+            '/api/events',
+            '/metrics'
         ]
     }), 404
 
@@ -766,7 +1876,8 @@ def internal_error(error):
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print(f"🚀 Starting LootOS API on port {port}")
-    print(f"🔗 Ethereum connected: {ETH_CONNECTED}")
+    print(f"🔗 Ethereum RPC: {urlsplit(ETHEREUM_RPC_URL).netloc} (connection checked in the background)")
+    print(f"🔗 BSC RPC: {urlsplit(BSC_RPC_URL).netloc}, Solana RPC: {urlsplit(SOLANA_RPC_URL).netloc}")
     print(f"🔑 CoinGecko API: {'✅' if COINGECKO_API_KEY else '❌'}")
     print(f"🔑 1inch API: {'✅' if ONEINCH_API_KEY else '❌'}")
     print(f"🔐 Wallet encryption: {'✅' if WALLET_ENCRYPTION_KEY else '❌'}")
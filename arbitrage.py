@@ -0,0 +1,325 @@
+import os
+import math
+import random
+import threading
+
+# Longest cycle searched, in legs (2 = simple cross-DEX arbitrage)
+ARB_MAX_LEGS = int(os.environ.get('ARB_MAX_LEGS', 3))
+# Ignore cycles whose spot profit is below this (rounding noise, dust)
+ARB_MIN_PROFIT = float(os.environ.get('ARB_MIN_PROFIT', 0.0005))
+
+
+class Pool:
+    """A constant-product pool between token0 and token1"""
+
+    __slots__ = ('id', 'dex', 'token0', 'token1', 'reserve0', 'reserve1', 'fee')
+
+    def __init__(self, pool_id, dex, token0, token1, reserve0, reserve1, fee=0.003):
+        self.id = pool_id
+        self.dex = dex
+        self.token0 = token0
+        self.token1 = token1
+        self.reserve0 = float(reserve0)
+        self.reserve1 = float(reserve1)
+        self.fee = fee
+
+    def state(self):
+        return (self.reserve0, self.reserve1)
+
+    def set_state(self, reserve0, reserve1):
+        self.reserve0 = float(reserve0)
+        self.reserve1 = float(reserve1)
+
+    def max_input(self, token_in):
+        """Largest (net of fee) input the pool's pricing curve holds for"""
+        return math.inf
+
+    def weight(self, token_in):
+        """-log of the fee-adjusted marginal rate when selling token_in into this pool"""
+        if self.reserve0 <= 0 or self.reserve1 <= 0:
+            return math.inf
+        if token_in == self.token0:
+            rate = self.reserve1 / self.reserve0
+        else:
+            rate = self.reserve0 / self.reserve1
+        return -math.log(rate * (1 - self.fee))
+
+
+class ConcentratedPool(Pool):
+    """A concentrated-liquidity pool, priced on the active range only.
+
+    reserve0/reserve1 are the virtual reserves L/sqrt(P) and L*sqrt(P), so
+    inside the range it quotes exactly like a constant-product pool. Inputs
+    that would push the price past the range edge are capped by max_input,
+    since liquidity beyond the next tick is unknown.
+    """
+
+    __slots__ = ('max_in0', 'max_in1')
+
+    def __init__(self, pool_id, dex, token0, token1, reserve0, reserve1, fee=0.003,
+                 max_in0=math.inf, max_in1=math.inf):
+        super().__init__(pool_id, dex, token0, token1, reserve0, reserve1, fee)
+        self.max_in0 = max_in0
+        self.max_in1 = max_in1
+
+    @classmethod
+    def from_range(cls, pool_id, dex, token0, token1, liquidity, sqrt_price, sqrt_price_lower,
+                   sqrt_price_upper, fee=0.003):
+        pool = cls(pool_id, dex, token0, token1, 0, 0, fee)
+        pool.set_range(liquidity, sqrt_price, sqrt_price_lower, sqrt_price_upper)
+        return pool
+
+    def set_range(self, liquidity, sqrt_price, sqrt_price_lower, sqrt_price_upper):
+        """Virtual reserves and input caps from L and sqrt prices (token1 per token0)"""
+        if liquidity <= 0 or sqrt_price <= 0:
+            self.set_state(0, 0, 0, 0)
+            return
+        self.set_state(
+            liquidity / sqrt_price,
+            liquidity * sqrt_price,
+            # token0 in pushes the price down to the lower bound, token1 in pushes it up
+            max(0.0, liquidity * (1 / sqrt_price_lower - 1 / sqrt_price)),
+            max(0.0, liquidity * (sqrt_price_upper - sqrt_price))
+        )
+
+    def state(self):
+        return (self.reserve0, self.reserve1, self.max_in0, self.max_in1)
+
+    def set_state(self, reserve0, reserve1, max_in0=None, max_in1=None):
+        super().set_state(reserve0, reserve1)
+        if max_in0 is not None:
+            self.max_in0 = float(max_in0)
+        if max_in1 is not None:
+            self.max_in1 = float(max_in1)
+
+    def max_input(self, token_in):
+        return self.max_in0 if token_in == self.token0 else self.max_in1
+
+
+class ArbitrageScanner:
+    """Finds profitable cycles in a token/pool graph using log-price edge weights.
+
+    An edge token_in -> token_out through a pool has weight -log(rate), so a
+    cycle whose weights sum below zero multiplies value by more than one:
+    arbitrage. A negative cycle created by a reserve update has to pass
+    through the updated pool, so an update only searches cycles anchored on
+    that pool's two edges and re-prices the known cycles that use it.
+
+    Intermediate hops follow the cheapest pool for each token pair, so the
+    best route for every profitable token cycle is always current; costlier
+    parallel routes are reported when their own pool is the one that moves.
+    """
+
+    def __init__(self, max_legs=ARB_MAX_LEGS, min_profit=ARB_MIN_PROFIT):
+        self.max_legs = max_legs
+        self.min_profit = min_profit
+        self.pools = {}
+        self._pair_pools = {}   # (token_in, token_out) -> {pool_id: weight}
+        self._out = {}          # token_in -> {token_out: (best weight, pool_id)}
+        self._in = {}           # token_out -> {token_in: (best weight, pool_id)}
+        self._cycles = {}       # cycle key -> cycle dict
+        self._pool_cycles = {}  # pool_id -> set of cycle keys
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Graph maintenance
+    # ------------------------------------------------------------------
+
+    def add_pool(self, pool, scan=True):
+        with self._lock:
+            self.pools[pool.id] = pool
+            self._pool_cycles.setdefault(pool.id, set())
+            self._reweight(pool)
+            if scan:
+                self._scan_pool(pool)
+
+    def update_reserves(self, pool_id, *state):
+        """Apply a reserve change and re-evaluate only the cycles through this pool.
+
+        state is whatever the pool's set_state takes: (reserve0, reserve1) for
+        constant-product pools, plus the range caps for concentrated ones.
+        """
+        with self._lock:
+            pool = self.pools[pool_id]
+            pool.set_state(*state)
+            promoted = self._reweight(pool)
+
+            for key in list(self._pool_cycles[pool_id]):
+                cycle = self._cycles[key]
+                profit = self._cycle_profit(cycle['path'], cycle['pools'])
+                if profit < self.min_profit:
+                    self._remove_cycle(key)
+                else:
+                    cycle['profit_potential'] = profit
+            self._scan_pool(pool)
+            # A parallel pool that is now the cheapest for its pair opens routes of its own
+            for pool_id in promoted:
+                self._scan_pool(self.pools[pool_id])
+
+    def full_scan(self):
+        """Rebuild every cycle from scratch (initial load)"""
+        with self._lock:
+            self._cycles.clear()
+            for cycle_keys in self._pool_cycles.values():
+                cycle_keys.clear()
+            for pool in self.pools.values():
+                self._scan_pool(pool)
+
+    def opportunities(self, limit=None):
+        """Known profitable cycles, best first"""
+        with self._lock:
+            cycles = sorted(self._cycles.values(), key=lambda c: c['profit_potential'], reverse=True)
+            return [dict(cycle, path=list(cycle['path']), pools=list(cycle['pools']), dexes=list(cycle['dexes']))
+                    for cycle in cycles[:limit]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pools': len(self.pools),
+                'tokens': len(set(self._out) | set(self._in)),
+                'cycles': len(self._cycles),
+                'max_legs': self.max_legs
+            }
+
+    def _reweight(self, pool):
+        """Refresh the pool's edge weights; returns other pools that became the cheapest for their pair"""
+        promoted = set()
+        for token_in, token_out in ((pool.token0, pool.token1), (pool.token1, pool.token0)):
+            parallel = self._pair_pools.setdefault((token_in, token_out), {})
+            parallel[pool.id] = pool.weight(token_in)
+            best_id = min(parallel, key=parallel.get)
+            previous = self._out.get(token_in, {}).get(token_out)
+            if best_id != pool.id and (previous is None or previous[1] != best_id):
+                promoted.add(best_id)
+            best = (parallel[best_id], best_id)
+            self._out.setdefault(token_in, {})[token_out] = best
+            self._in.setdefault(token_out, {})[token_in] = best
+        return promoted
+
+    # ------------------------------------------------------------------
+    # Cycle search
+    # ------------------------------------------------------------------
+
+    def _scan_pool(self, pool):
+        for token_in, token_out in ((pool.token0, pool.token1), (pool.token1, pool.token0)):
+            weight = self._pair_pools[(token_in, token_out)][pool.id]
+            if math.isinf(weight):
+                continue
+            # Two legs: back through every other pool on the same pair
+            for pool_id, back in self._pair_pools.get((token_out, token_in), {}).items():
+                if pool_id != pool.id and weight + back < 0:
+                    self._record_cycle([token_in, token_out], [pool.id, pool_id], weight + back)
+            if self.max_legs > 2:
+                self._extend(token_in, [token_in, token_out], [pool.id], weight)
+
+    def _extend(self, target, tokens, pools, dist):
+        """Depth-first search for cycles back to target, at most max_legs long.
+
+        The last two hops meet in the middle: rather than expanding every
+        neighbour of the current token and then checking its edge into
+        target, walk whichever of the two adjacency lists is shorter.
+        """
+        current = tokens[-1]
+        legs_left = self.max_legs - len(pools)
+        if legs_left >= 3:
+            for token, (weight, pool_id) in self._out.get(current, {}).items():
+                if token not in tokens:
+                    tokens.append(token)
+                    pools.append(pool_id)
+                    # Closing from here right away is a cycle one leg shorter
+                    closing = self._out.get(token, {}).get(target)
+                    if closing and dist + weight + closing[0] < 0:
+                        self._record_cycle(tokens, pools + [closing[1]], dist + weight + closing[0])
+                    self._extend(target, tokens, pools, dist + weight)
+                    tokens.pop()
+                    pools.pop()
+            return
+
+        # legs_left == 2: current -> token -> target
+        out_edges = self._out.get(current, {})
+        in_edges = self._in.get(target, {})
+        if len(out_edges) <= len(in_edges):
+            pairs = ((token, edge, in_edges.get(token)) for token, edge in out_edges.items())
+        else:
+            pairs = ((token, out_edges.get(token), edge) for token, edge in in_edges.items())
+        for token, first, second in pairs:
+            if first is None or second is None or token in tokens:
+                continue
+            total = dist + first[0] + second[0]
+            if total < 0:
+                self._record_cycle(tokens + [token], pools + [first[1], second[1]], total)
+
+    def _record_cycle(self, tokens, pools, total_weight):
+        profit = math.exp(-total_weight) - 1
+        if profit < self.min_profit:
+            return
+
+        # Canonical rotation so the same cycle found from any of its pools is stored once
+        start = min(range(len(pools)), key=lambda i: pools[i])
+        tokens = tokens[start:] + tokens[:start]
+        pools = pools[start:] + pools[:start]
+        key = '|'.join(pools) + '@' + tokens[0]
+
+        self._cycles[key] = {
+            'key': key,
+            'path': tokens + [tokens[0]],
+            'pools': pools,
+            'dexes': [self.pools[pool_id].dex for pool_id in pools],
+            'legs': len(pools),
+            'profit_potential': profit
+        }
+        for pool_id in pools:
+            self._pool_cycles[pool_id].add(key)
+
+    def _remove_cycle(self, key):
+        cycle = self._cycles.pop(key)
+        for pool_id in cycle['pools']:
+            self._pool_cycles[pool_id].discard(key)
+
+    def _cycle_profit(self, path, pools):
+        total = sum(self._pair_pools[(token, token_out)][pool_id]
+                    for token, token_out, pool_id in zip(path, path[1:], pools))
+        return math.exp(-total) - 1
+
+
+# ============================================================================
+# SYNTHETIC POOL SETS (benchmarks and offline fallback)
+# ============================================================================
+
+SYNTHETIC_DEXES = ['uniswap_v2', 'uniswap_v3', 'sushiswap', 'curve', 'balancer']
+
+
+def generate_pool_set(num_tokens=200, num_pools=2000, num_hubs=5, mispricing=0.005, seed=None,
+                      token_prices=None):
+    """Random pool graph around consistent 'true' prices, each pool mispriced by up to
+    +/- mispricing so that some cycles are profitable after fees.
+
+    Most pools pair a token with one of the hub tokens, like real DEX liquidity.
+    """
+    rng = random.Random(seed)
+    prices = dict(token_prices or {})
+    tokens = list(prices)
+    while len(tokens) < num_tokens:
+        token = f'TKN{len(tokens)}'
+        tokens.append(token)
+        prices[token] = 10 ** rng.uniform(-2, 4)
+    hubs = tokens[:num_hubs]
+
+    pools = []
+    for index in range(num_pools):
+        token0 = rng.choice(hubs) if rng.random() < 0.8 else rng.choice(tokens)
+        token1 = rng.choice(tokens)
+        while token1 == token0:
+            token1 = rng.choice(tokens)
+        liquidity_usd = 10 ** rng.uniform(4, 7)
+        skew = 1 + rng.uniform(-mispricing, mispricing)
+        reserve0 = liquidity_usd / 2 / prices[token0]
+        reserve1 = liquidity_usd / 2 / prices[token1] * skew
+        pools.append(Pool(f'pool_{index}', rng.choice(SYNTHETIC_DEXES), token0, token1, reserve0, reserve1))
+    return pools
+
+
+def jitter_reserves(pool, rng, volatility=0.005):
+    """A plausible next reserve state for a pool (one swap's worth of movement)"""
+    move = 1 + rng.uniform(-volatility, volatility)
+    return pool.reserve0 * move, pool.reserve1 / move
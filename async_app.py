@@ -0,0 +1,343 @@
+"""Async (aiohttp) serving mode for the LootOS API.
+
+Run with:
+    gunicorn async_app:create_app --config gunicorn.conf.py --bind 0.0.0.0:$PORT --worker-class aiohttp.GunicornWebWorker
+
+The fan-out endpoints are served natively here and run their upstream calls
+concurrently, each with its own deadline; every other route is bridged to the
+Flask app so the JSON contracts stay identical.
+"""
+import os
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from aiohttp import web
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Response as WerkzeugResponse
+
+import app as flask_module
+from app import (
+    app as flask_app,
+    current_token_prices, current_gas_prices, simulated_token_price, simulated_gas_prices,
+    current_block_number, build_portfolio, build_portfolio_overview, build_dashboard_analytics,
+    build_blockchain_status, portfolio_valuation, DEFAULT_PORTFOLIO, stream_hub, parse_stream_topics,
+    observe_request, chains, SIDE_CHAINS
+)
+from metrics import start_trace, end_trace, METRICS_ENABLED
+from streams import AsyncSubscription, format_sse, STREAM_HEARTBEAT
+from compression import COMPRESS_MIN_SIZE
+
+# Per-upstream-call deadline; slower calls are dropped and replaced by fallback data
+ASYNC_UPSTREAM_DEADLINE = float(os.environ.get('ASYNC_UPSTREAM_DEADLINE', 2.0))
+# Threads available for blocking upstream/cache work (the event loop itself never blocks)
+ASYNC_UPSTREAM_THREADS = int(os.environ.get('ASYNC_UPSTREAM_THREADS', 64))
+
+TOKEN_MAP = {
+    'ethereum': 'ethereum',
+    'bitcoin': 'bitcoin',
+    'solana': 'solana',
+    'eth': 'ethereum',
+    'btc': 'bitcoin',
+    'sol': 'solana'
+}
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_UPSTREAM_THREADS, thread_name_prefix='upstream')
+
+
+# ============================================================================
+# UPSTREAM FAN-OUT
+# ============================================================================
+
+async def run_blocking(func, *args):
+    # Run in a copy of the caller's context so upstream spans land on the request's trace
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_executor, context.run, func, *args)
+
+
+async def with_deadline(coro, fallback, deadline=ASYNC_UPSTREAM_DEADLINE):
+    """Await coro within deadline; on timeout or error return fallback() instead"""
+    try:
+        return await asyncio.wait_for(coro, deadline)
+    except Exception as e:
+        print(f"⚠️  Async upstream call failed: {type(e).__name__} {str(e)}")
+        return fallback()
+
+
+async def fetch_prices(token_ids):
+    return await with_deadline(
+        run_blocking(current_token_prices, token_ids),
+        lambda: {token_id: simulated_token_price(token_id) for token_id in token_ids}
+    )
+
+
+async def fetch_gas_prices():
+    return await with_deadline(run_blocking(current_gas_prices), simulated_gas_prices)
+
+
+async def fetch_block_number():
+    return await with_deadline(run_blocking(current_block_number), lambda: 0)
+
+
+def json_response(payload, status=200):
+    # Same encoder as Flask's jsonify, so both modes emit identical bytes
+    body = flask_app.json.dumps_bytes(payload) + b'\n'
+    response = web.Response(body=body, status=status, content_type='application/json')
+    if len(body) >= COMPRESS_MIN_SIZE:
+        response.enable_compression()
+    return response
+
+
+def error_response(e):
+    return json_response({
+        'success': False,
+        'error': str(e)
+    }, status=500)
+
+
+# ============================================================================
+# NATIVE ASYNC ENDPOINTS
+# ============================================================================
+
+async def get_token_price(request):
+    try:
+        token = request.match_info['token']
+        token_id = TOKEN_MAP.get(token.lower(), token.lower())
+        price_data = (await fetch_prices([token_id]))[token_id]
+
+        return json_response({
+            'success': True,
+            'token': token.upper(),
+            'price_usd': price_data['price'],
+            'change_24h': price_data['change_24h'],
+            'source': price_data['source'],
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def get_multiple_prices(request):
+    try:
+        tokens = request.query.get('tokens', 'ethereum,bitcoin,solana').split(',')
+        token_ids = [token.strip().lower() for token in tokens if token.strip()]
+        prices = await fetch_prices(token_ids)
+
+        return json_response({
+            'success': True,
+            'prices': prices,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def get_portfolio(request):
+    try:
+        wallet = request.query.get('wallet', '').strip().lower() or DEFAULT_PORTFOLIO
+        valuation = await run_blocking(portfolio_valuation, wallet)
+        if valuation is None:
+            return json_response({'success': False, 'error': 'No holdings for this wallet'}, status=404)
+        portfolio = build_portfolio(valuation)
+
+        return json_response({
+            'success': True,
+            'portfolio': portfolio,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def get_portfolio_overview(request):
+    try:
+        wallet = request.query.get('wallet', '').strip().lower() or DEFAULT_PORTFOLIO
+        valuation = await run_blocking(portfolio_valuation, wallet)
+        if valuation is None:
+            return json_response({'success': False, 'error': 'No holdings for this wallet'}, status=404)
+        overview = build_portfolio_overview(valuation)
+
+        return json_response({
+            'success': True,
+            'overview': overview,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def get_dashboard_analytics(request):
+    try:
+        analytics = build_dashboard_analytics(await fetch_gas_prices())
+
+        return json_response({
+            'success': True,
+            'analytics': analytics,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def get_blockchain_status(request):
+    try:
+        # Chain adapters are coroutines, so the other chains run on this loop alongside Ethereum
+        block_number, gas_prices, side_chains = await asyncio.gather(
+            fetch_block_number(), fetch_gas_prices(), chains.status(SIDE_CHAINS)
+        )
+        status = build_blockchain_status(block_number, gas_prices, side_chains)
+
+        return json_response({
+            'success': True,
+            'blockchain_status': status,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def get_gas_prices(request):
+    try:
+        chain = request.query.get('chain', 'ethereum').lower()
+        adapter = chains.get(chain)
+        if adapter is None:
+            return json_response({
+                'success': False,
+                'error': f'Unsupported chain: {chain}',
+                'supported_chains': chains.names
+            }, status=400)
+
+        if chain == 'ethereum':
+            gas_prices = await fetch_gas_prices()
+        else:
+            try:
+                gas_prices = await asyncio.wait_for(adapter.fees(), chains.timeout)
+            except Exception as e:
+                return json_response({
+                    'success': False,
+                    'error': f'{chain} fee estimate unavailable: {str(e) or type(e).__name__}'
+                }, status=503)
+
+        return json_response({
+            'success': True,
+            'chain': chain,
+            'gas_prices': gas_prices,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+async def stream(request):
+    """Server-Sent Events; each open stream costs a queue, not a thread"""
+    try:
+        topics = parse_stream_topics(request.query.get('topics'))
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e),
+            'available_topics': stream_hub.topics
+        }, status=400)
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Access-Control-Allow-Origin': '*'
+    })
+    await response.prepare(request)
+
+    subscription = stream_hub.subscribe(topics, AsyncSubscription(topics, asyncio.get_running_loop()))
+    try:
+        await response.write(b'retry: 3000\n\n')
+        while True:
+            frame = await subscription.next_frame(STREAM_HEARTBEAT)
+            await response.write((format_sse(frame) if frame else ': keep-alive\n\n').encode())
+    except ConnectionResetError:
+        pass
+    finally:
+        stream_hub.unsubscribe(subscription)
+    return response
+
+
+# ============================================================================
+# FLASK BRIDGE
+# ============================================================================
+
+def _call_flask(method, path, query_string, headers, body):
+    environ = EnvironBuilder(
+        path=path, method=method, query_string=query_string, headers=headers, data=body
+    ).get_environ()
+    response = WerkzeugResponse.from_app(flask_app.wsgi_app, environ)
+    return response.status_code, list(response.headers.items()), response.get_data()
+
+
+async def flask_bridge(request):
+    """Serve any route that has no native async handler through the Flask app"""
+    body = await request.read()
+    headers = [(key, value) for key, value in request.headers.items() if key.lower() != 'host']
+    status, response_headers, data = await run_blocking(
+        _call_flask, request.method, request.path, request.query_string, headers, body
+    )
+    response = web.Response(body=data, status=status)
+    for key, value in response_headers:
+        if key.lower() != 'content-length':
+            response.headers[key] = value
+    return response
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == 'OPTIONS':
+        return await flask_bridge(request)
+    response = await handler(request)
+    response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Latency and Server-Timing for native routes (bridged ones are measured by Flask)"""
+    if not METRICS_ENABLED or request.match_info.handler is flask_bridge:
+        return await handler(request)
+    route = request.match_info.route.resource.canonical if request.match_info.route.resource else 'unmatched'
+    start_trace()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+    finally:
+        server_timing = observe_request(route, request.method, status, end_trace())
+    if not response.prepared:
+        response.headers['Server-Timing'] = server_timing
+    return response
+
+
+def create_app():
+    aio_app = web.Application(middlewares=[metrics_middleware, cors_middleware])
+    aio_app.router.add_get('/api/price/{token}', get_token_price)
+    aio_app.router.add_get('/api/prices/multi', get_multiple_prices)
+    aio_app.router.add_get('/api/portfolio', get_portfolio)
+    aio_app.router.add_get('/api/portfolio-overview', get_portfolio_overview)
+    aio_app.router.add_get('/api/dashboard-analytics', get_dashboard_analytics)
+    aio_app.router.add_get('/api/blockchain/status', get_blockchain_status)
+    aio_app.router.add_get('/api/blockchain/gas-prices', get_gas_prices)
+    aio_app.router.add_get('/api/stream', stream)
+    aio_app.router.add_route('*', '/{tail:.*}', flask_bridge)
+    flask_module.eth_connection.ensure_started()
+    flask_module.bsc_connection.ensure_started()
+    flask_module.market_recorder.ensure_started()
+    flask_module.portfolio_feed.ensure_started()
+    if flask_module.MARKET_FEED_ENABLED:
+        flask_module.market_feed.ensure_started()
+    if flask_module.AGENT_RUNTIME_ENABLED:
+        flask_module.agent_runtime.ensure_started()
+    return aio_app
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5000))
+    print(f"🚀 Starting LootOS async API on port {port}")
+    print(f"🔗 Ethereum RPC: {flask_module.eth_connection.state}")
+    web.run_app(create_app(), host='0.0.0.0', port=port)
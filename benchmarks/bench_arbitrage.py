@@ -0,0 +1,84 @@
+"""Arbitrage scanner latency on synthetic pool sets.
+
+    python benchmarks/bench_arbitrage.py --pools 5000 --tokens 500 --updates 2000
+
+Builds a random token/pool graph, times the initial full scan, then applies
+random reserve updates one at a time and reports per-update rescan latency.
+"""
+import os
+import sys
+import time
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arbitrage import ArbitrageScanner, generate_pool_set, jitter_reserves
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pools', type=int, default=5000)
+    parser.add_argument('--tokens', type=int, default=500)
+    parser.add_argument('--hubs', type=int, default=5)
+    parser.add_argument('--legs', type=int, default=3)
+    parser.add_argument('--mispricing', type=float, default=0.005)
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pools = generate_pool_set(args.tokens, args.pools, args.hubs, args.mispricing, seed=args.seed)
+    scanner = ArbitrageScanner(max_legs=args.legs)
+
+    started = time.perf_counter()
+    for pool in pools:
+        scanner.add_pool(pool, scan=False)
+    scanner.full_scan()
+    full_scan_ms = (time.perf_counter() - started) * 1000
+    initial_cycles = len(scanner.opportunities())
+
+    latencies = []
+    for _ in range(args.updates):
+        pool = rng.choice(pools)
+        reserve0, reserve1 = jitter_reserves(pool, rng)
+        started = time.perf_counter()
+        scanner.update_reserves(pool.id, reserve0, reserve1)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    results = {
+        'pools': args.pools,
+        'tokens': args.tokens,
+        'max_legs': args.legs,
+        'full_scan_ms': round(full_scan_ms, 1),
+        'initial_cycles': initial_cycles,
+        'final_cycles': len(scanner.opportunities()),
+        'updates': args.updates,
+        'update_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies), 3)
+        }
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.pools} pools / {args.tokens} tokens, cycles up to {args.legs} legs")
+    print(f"full scan: {results['full_scan_ms']} ms, {initial_cycles} profitable cycles")
+    latency = results['update_ms']
+    print(f"incremental update ({args.updates}x): mean {latency['mean']} ms, p50 {latency['p50']} ms, "
+          f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, max {latency['max']} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Event bus throughput and fan-out latency with a synthetic market-data producer.
+
+    python benchmarks/bench_event_bus.py --events 200000 --subscribers 8
+    python benchmarks/bench_event_bus.py --redis redis://localhost:6379/0 --events 20000
+
+One producer publishes price ticks over --keys tokens; half of the
+subscribers take every event, the other half coalesce per token. Reports
+publish rate, delivered events/s and publish-to-consumer latency.
+"""
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_bus import EventBus, RedisEventBus
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else None
+
+
+def consume(subscription, latencies, stop):
+    while not stop.is_set() or subscription.stats()['queued']:
+        event = subscription.get(timeout=0.05)
+        if event is not None:
+            latencies.append(time.time() - event['ts'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--subscribers', type=int, default=8)
+    parser.add_argument('--keys', type=int, default=50)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    parser.add_argument('--redis', default='', help='Redis URL to benchmark the Redis Streams backend')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    if args.redis:
+        import redis
+        bus = RedisEventBus(redis.Redis.from_url(args.redis), retention=args.events)
+    else:
+        bus = EventBus(retention=args.events)
+
+    stop = threading.Event()
+    subscriptions = []
+    threads = []
+    for index in range(args.subscribers):
+        coalesce = index % 2 == 1
+        subscription = bus.subscribe(['prices'], maxsize=args.queue_size, coalesce=coalesce)
+        latencies = []
+        thread = threading.Thread(target=consume, args=(subscription, latencies, stop), daemon=True)
+        thread.start()
+        subscriptions.append((subscription, latencies))
+        threads.append(thread)
+
+    rng = random.Random(1)
+    tokens = [f'token_{i}' for i in range(args.keys)]
+    started = time.perf_counter()
+    for _ in range(args.events):
+        token = rng.choice(tokens)
+        bus.publish('prices', {'price': rng.uniform(1, 100)}, key=token)
+    publish_seconds = time.perf_counter() - started
+
+    # Let the consumers (and the Redis reader) catch up
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and any(s.stats()['queued'] for s, _ in subscriptions):
+        time.sleep(0.01)
+    if args.redis:
+        time.sleep(1.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    total_seconds = time.perf_counter() - started
+
+    results = {'backend': bus.backend, 'events': args.events, 'subscribers': args.subscribers,
+               'publish_events_per_s': round(args.events / publish_seconds)}
+    for label, coalesce in (('plain', False), ('coalescing', True)):
+        group = [(s, l) for s, l in subscriptions if s.coalesce == coalesce]
+        latencies = [value for _, values in group for value in values]
+        received = sum(len(values) for _, values in group)
+        results[label] = {
+            'received': received,
+            'delivered_events_per_s': round(received / total_seconds),
+            'dropped': sum(s.stats()['dropped'] for s, _ in group),
+            'coalesced': sum(s.stats()['coalesced'] for s, _ in group),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+                'p99': round(percentile(latencies, 99) * 1000, 3) if latencies else None
+            }
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{bus.backend} bus: {args.events} events -> {args.subscribers} subscribers")
+    print(f"publish: {results['publish_events_per_s']:,} events/s")
+    for label in ('plain', 'coalescing'):
+        group = results[label]
+        print(f"{label}: received {group['received']:,} ({group['delivered_events_per_s']:,}/s), "
+              f"dropped {group['dropped']}, coalesced {group['coalesced']}, "
+              f"latency p50 {group['latency_ms']['p50']} ms / p99 {group['latency_ms']['p99']} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Encode time and bytes on the wire for the heaviest response payloads.
+
+    python benchmarks/bench_json.py --repeats 20
+
+Payloads mirror /api/trading/history (page of trades), /api/wallet/balances
+(bulk balances) and /api/history/ohlc (a month of 1m candles). Each is
+encoded with the stdlib encoder (Flask's default settings) and with the
+orjson encoder, then compressed with gzip and, when installed, brotli.
+"""
+import os
+import sys
+import time
+import json
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_codec import StdlibEncoder, OrjsonEncoder, orjson
+from compression import compress, supported_encodings
+
+
+def trade_history(count):
+    now = datetime.now()
+    return {
+        'success': True,
+        'trades': [
+            {
+                'id': uuid.uuid4().hex,
+                'type': random.choice(['arbitrage', 'flash_loan', 'swap']),
+                'token_pair': random.choice(['ETH/USDC', 'WBTC/ETH', 'LINK/ETH']),
+                'amount': round(random.uniform(0.1, 50), 4),
+                'price': round(random.uniform(1, 50000), 2),
+                'profit': round(random.uniform(-20, 80), 2),
+                'status': random.choice(['completed', 'pending', 'failed']),
+                'dex': random.choice(['uniswap_v3', 'sushiswap', 'curve']),
+                'timestamp': (now - timedelta(seconds=i * 37)).isoformat()
+            }
+            for i in range(count)
+        ],
+        'next_cursor': None,
+        'timestamp': now.isoformat()
+    }
+
+
+def bulk_balances(count):
+    return {
+        'chunk': 0,
+        'chain': 'ethereum',
+        'source': 'ethereum_network_real_time',
+        'balances': [
+            {
+                'address': '0x' + uuid.uuid4().hex + uuid.uuid4().hex[:8],
+                'native_balance': round(random.uniform(0, 100), 6),
+                'tokens': {'0x' + 'a' * 40: round(random.uniform(0, 1e6), 6)}
+            }
+            for _ in range(count)
+        ]
+    }
+
+
+def candles(rows, as_lists):
+    rng = np.random.default_rng(1)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    columns = {
+        'time': np.arange(rows, dtype=np.int64) * 60 + 1_700_000_000,
+        'open': close * 0.999, 'high': close * 1.001, 'low': close * 0.998, 'close': close,
+        'mean': close, 'samples': np.full(rows, 12, dtype=np.int64)
+    }
+    if as_lists:
+        # What the stdlib path needs: numpy columns converted to Python lists first
+        columns = {field: values.tolist() for field, values in columns.items()}
+    return {'success': True, 'series': 'price:ethereum', 'resolution': '1m', 'candles': columns, 'count': rows}
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(sorted(samples)[len(samples) // 2], 3), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trades', type=int, default=500)
+    parser.add_argument('--addresses', type=int, default=1000)
+    parser.add_argument('--candles', type=int, default=43200)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    random.seed(1)
+    payloads = {
+        'trading_history': (lambda: trade_history(args.trades), None),
+        'wallet_balances': (lambda: bulk_balances(args.addresses), None),
+        'history_ohlc_1m_month': (lambda: candles(args.candles, True), lambda: candles(args.candles, False)),
+    }
+    encoders = [StdlibEncoder()] + ([OrjsonEncoder()] if orjson is not None else [])
+
+    results = {}
+    for name, (build, build_native) in payloads.items():
+        results[name] = {}
+        for encoder in encoders:
+            # orjson takes numpy columns directly; the stdlib path pays for .tolist() too
+            if encoder.name == 'orjson' and build_native is not None:
+                obj = build_native()
+                encode = lambda: encoder.dumps(obj)
+            elif build_native is not None:
+                native = build_native()
+                encode = lambda: encoder.dumps({**native, 'candles': {k: v.tolist() for k, v in native['candles'].items()}})
+            else:
+                obj = build()
+                encode = lambda: encoder.dumps(obj)
+            encode_ms, body = timed(encode, args.repeats)
+            row = {'encode_ms': encode_ms, 'bytes': len(body)}
+            for encoding in supported_encodings():
+                compress_ms, compressed = timed(lambda: compress(body, encoding), max(3, args.repeats // 4))
+                row[f'{encoding}_bytes'] = len(compressed)
+                row[f'{encoding}_ms'] = compress_ms
+            results[name][encoder.name] = row
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, rows in results.items():
+        print(name)
+        for encoder_name, row in rows.items():
+            compressed = ', '.join(
+                f"{encoding} {row[f'{encoding}_bytes']:,} B in {row[f'{encoding}_ms']} ms" for encoding in supported_encodings()
+            )
+            print(f"  {encoder_name:7s} encode {row['encode_ms']:8.3f} ms  raw {row['bytes']:,} B  {compressed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Portfolio engine: tick cost across many portfolios, and read cost by portfolio size.
+
+    python benchmarks/bench_portfolio.py --portfolios 2000 --assets 500
+
+Builds --portfolios random portfolios over an --assets universe, then
+times price ticks (a fraction of assets moving) and valuation reads for a
+3-asset and a --assets-asset portfolio, cached and freshly rebuilt.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import PortfolioEngine
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {'p50_ms': round(samples[len(samples) // 2], 4), 'p99_ms': round(samples[int(len(samples) * 0.99)], 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--portfolios', type=int, default=2000)
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--held', type=int, default=20, help='assets held by each random portfolio')
+    parser.add_argument('--moving', type=float, default=0.2, help='fraction of assets moving per tick')
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    tokens = [f'token-{i}' for i in range(args.assets)]
+    engine = PortfolioEngine()
+    started = time.perf_counter()
+    for index in range(args.portfolios):
+        held = rng.choice(args.assets, size=min(args.held, args.assets), replace=False)
+        engine.set_holdings(f'wallet-{index}', {tokens[j]: float(rng.uniform(0.1, 10)) for j in held})
+    engine.set_holdings('small', {token: 1.0 for token in tokens[:3]})
+    engine.set_holdings('large', {token: 1.0 for token in tokens})
+    load_seconds = time.perf_counter() - started
+
+    prices = {token: {'price': float(rng.uniform(1, 1000)), 'change_24h': 0.0} for token in tokens}
+    engine.apply_prices(prices)
+
+    def tick():
+        moving = rng.choice(args.assets, size=max(1, int(args.assets * args.moving)), replace=False)
+        engine.apply_prices({
+            tokens[j]: {'price': prices[tokens[j]]['price'] * float(rng.uniform(0.99, 1.01)), 'change_24h': 1.0}
+            for j in moving
+        })
+
+    def rebuilt(portfolio_id):
+        engine.apply_prices({tokens[0]: {'price': float(rng.uniform(1, 1000)), 'change_24h': 0.0}})
+        engine.valuation(portfolio_id)
+
+    results = {
+        'portfolios': args.portfolios + 2,
+        'assets': args.assets,
+        'load_ms': round(load_seconds * 1000, 1),
+        'tick': timed(tick, args.repeats),
+        'read_cached_3_assets': timed(lambda: engine.valuation('small'), args.repeats),
+        f'read_cached_{args.assets}_assets': timed(lambda: engine.valuation('large'), args.repeats),
+        'read_after_tick_3_assets': timed(lambda: rebuilt('small'), args.repeats),
+        f'read_after_tick_{args.assets}_assets': timed(lambda: rebuilt('large'), args.repeats)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['portfolios']} portfolios over {args.assets} assets (loaded in {results['load_ms']} ms)")
+    for label, value in results.items():
+        if isinstance(value, dict):
+            print(f"{label}: p50 {value['p50_ms']} ms, p99 {value['p99_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
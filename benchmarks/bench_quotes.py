@@ -0,0 +1,91 @@
+"""AMM quote throughput: vectorised RouteQuoter vs a per-pool Python loop.
+
+    python benchmarks/bench_quotes.py --pools 5000 --routes 2000 --sizes 64
+
+A quote is one (route, input size) pair priced through every leg of the
+route. Also times closed-form optimal sizing for all routes at once.
+"""
+import os
+import sys
+import time
+import json
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arbitrage import ArbitrageScanner, generate_pool_set
+from amm_quotes import RouteQuoter, cycle_routes
+
+
+def python_quote(route, amount):
+    for pool, token_in in route:
+        if token_in == pool.token0:
+            reserve_in, reserve_out = pool.reserve0, pool.reserve1
+        else:
+            reserve_in, reserve_out = pool.reserve1, pool.reserve0
+        net_in = min(amount * (1 - pool.fee), pool.max_input(token_in))
+        amount = reserve_out * net_in / (reserve_in + net_in)
+    return amount
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pools', type=int, default=5000)
+    parser.add_argument('--tokens', type=int, default=500)
+    parser.add_argument('--routes', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    pools = generate_pool_set(args.tokens, args.pools, mispricing=0.01, seed=args.seed)
+    scanner = ArbitrageScanner()
+    for pool in pools:
+        scanner.add_pool(pool, scan=False)
+    scanner.full_scan()
+    cycles = scanner.opportunities(limit=args.routes)
+    routes = cycle_routes(cycles, scanner.pools)
+    amounts = np.geomspace(0.01, 1000, args.sizes)
+    quotes = len(routes) * args.sizes
+
+    build_seconds = best_of(args.repeat, lambda: RouteQuoter(routes))
+    quoter = RouteQuoter(routes)
+    vector_seconds = best_of(args.repeat, lambda: quoter.quote(amounts))
+    optimal_seconds = best_of(args.repeat, quoter.optimal)
+    python_seconds = best_of(1, lambda: [[python_quote(route, amount) for amount in amounts] for route in routes])
+
+    results = {
+        'routes': len(routes),
+        'sizes': args.sizes,
+        'quotes': quotes,
+        'pack_ms': round(build_seconds * 1000, 2),
+        'vectorised_quotes_per_s': round(quotes / vector_seconds),
+        'python_quotes_per_s': round(quotes / python_seconds),
+        'speedup': round(python_seconds / vector_seconds, 1),
+        'optimal_sizing_ms': round(optimal_seconds * 1000, 2)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{len(routes)} routes x {args.sizes} sizes = {quotes} quotes")
+    print(f"vectorised: {results['vectorised_quotes_per_s']:,} quotes/s (packing {results['pack_ms']} ms)")
+    print(f"python loop: {results['python_quotes_per_s']:,} quotes/s ({results['speedup']}x slower)")
+    print(f"optimal size for all routes: {results['optimal_sizing_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
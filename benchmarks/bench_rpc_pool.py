@@ -0,0 +1,176 @@
+"""RPC provider pool: tail latency with hedging, and failover through an outage.
+
+    python benchmarks/bench_rpc_pool.py --requests 2000 --concurrency 8
+    python benchmarks/bench_rpc_pool.py --scenario outage --seconds 30
+
+Runs against local JSON-RPC stand-ins (benchmarks/standins.py) with
+injected latency:
+
+  tail    three providers (20/30/60ms; the first two add --spike-ms to
+          --spike-rate of calls). Compares one provider, the pool without
+          hedging, and the pool hedging after --hedge-after-ms.
+  outage  the fastest provider fails every call for the middle third of
+          the run. Reports errors the caller saw, failovers, ejections and
+          when the provider came back into rotation.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standins import RPCStandIn
+from http_client import HttpClient
+from rpc_pool import RPCPool
+
+REQUEST = {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}
+
+
+def drive(pool, requests, concurrency, deadline=None):
+    """Send requests from concurrency threads; returns (latencies in ms, errors)"""
+    remaining = [requests]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0 or (deadline is not None and time.monotonic() >= deadline):
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                body = pool.send(REQUEST)
+                failed = 'result' not in body
+            except Exception:
+                failed = True
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors[0]
+
+
+def summarize(name, latencies, errors, pool):
+    stats = pool.stats()
+    return {
+        'name': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'max_ms': round(float(latencies.max()), 2),
+        'hedges': stats['hedges'],
+        'hedges_won': stats['hedges_won'],
+        'failovers': stats['failovers'],
+        'share': {provider['url']: provider['requests'] for provider in stats['providers']}
+    }
+
+
+def tail_scenario(args):
+    standins = [
+        RPCStandIn(latency_ms=20, jitter_ms=3, spike_rate=args.spike_rate, spike_ms=args.spike_ms, seed=1).start(),
+        RPCStandIn(latency_ms=30, jitter_ms=3, spike_rate=args.spike_rate, spike_ms=args.spike_ms, seed=2).start(),
+        RPCStandIn(latency_ms=60, jitter_ms=3, seed=3).start()
+    ]
+    urls = [standin.url for standin in standins]
+    runs = [
+        ('single provider', RPCPool(urls[:1], HttpClient(), hedge_after=0)),
+        ('pool, no hedging', RPCPool(urls, HttpClient(), hedge_after=0)),
+        (f'pool, hedge after {args.hedge_after_ms:.0f}ms', RPCPool(urls, HttpClient(), hedge_after=args.hedge_after_ms / 1000))
+    ]
+    results = []
+    for name, pool in runs:
+        latencies, errors = drive(pool, args.requests, args.concurrency)
+        results.append(summarize(name, latencies, errors, pool))
+    return results
+
+
+def outage_scenario(args):
+    standins = [
+        RPCStandIn(latency_ms=20, jitter_ms=3, seed=1).start(),
+        RPCStandIn(latency_ms=35, jitter_ms=3, seed=2).start(),
+        RPCStandIn(latency_ms=50, jitter_ms=3, seed=3).start()
+    ]
+    pool = RPCPool(
+        [standin.url for standin in standins], HttpClient(),
+        hedge_after=args.hedge_after_ms / 1000, eject_seconds=args.eject_seconds
+    )
+    third = args.seconds / 3
+    timeline = []
+
+    def stage():
+        time.sleep(third)
+        standins[0].error_rate = 1.0
+        timeline.append((round(third, 1), 'provider 1 starts failing'))
+        time.sleep(third)
+        standins[0].error_rate = 0.0
+        timeline.append((round(2 * third, 1), 'provider 1 recovers'))
+
+    def watch(started):
+        was_ejected, ejections = False, 0
+        while time.monotonic() - started < args.seconds:
+            provider = pool.stats()['providers'][0]
+            at = round(time.monotonic() - started, 1)
+            # A failed probation call re-ejects at once, so count ejections rather than only state flips
+            if provider['ejections'] > ejections or (was_ejected and not provider['ejected']):
+                if was_ejected:
+                    timeline.append((at, 'provider 1 readmitted on probation'))
+                if provider['ejections'] > ejections:
+                    timeline.append((at, f"provider 1 ejected for {provider['ejected_for']:.0f}s"))
+            was_ejected, ejections = provider['ejected'], provider['ejections']
+            time.sleep(0.01)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=stage, daemon=True), threading.Thread(target=watch, args=(started,), daemon=True)]
+    for thread in threads:
+        thread.start()
+    latencies, errors = drive(pool, 10 ** 9, args.concurrency, deadline=started + args.seconds)
+    result = summarize('outage', latencies, errors, pool)
+    result['ejections'] = pool.stats()['providers'][0]['ejections']
+    result['timeline'] = sorted(timeline, key=lambda event: event[0])
+    return [result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=('tail', 'outage'), default='tail')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--spike-rate', type=float, default=0.05)
+    parser.add_argument('--spike-ms', type=float, default=500)
+    parser.add_argument('--hedge-after-ms', type=float, default=100)
+    parser.add_argument('--seconds', type=float, default=30, help='outage scenario length')
+    parser.add_argument('--eject-seconds', type=float, default=2)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = tail_scenario(args) if args.scenario == 'tail' else outage_scenario(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(f"{result['name']:<28} p50 {result['p50_ms']:>7.2f}  p95 {result['p95_ms']:>7.2f}  "
+              f"p99 {result['p99_ms']:>7.2f}  max {result['max_ms']:>7.2f} ms  errors {result['errors']}  "
+              f"hedges {result['hedges']} (won {result['hedges_won']})  failovers {result['failovers']}")
+        print(f"{'':<28} requests per provider: {result['share']}")
+        for at, event in result.get('timeline', []):
+            print(f"{'':<28} t={at:>5}s  {event}")
+
+
+if __name__ == '__main__':
+    main()
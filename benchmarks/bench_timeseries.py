@@ -0,0 +1,79 @@
+"""Time-series store ingest rate and range-query latency.
+
+    python benchmarks/bench_timeseries.py --series 20 --days 30
+
+Fills each series with one sample per --interval seconds over --days, then
+times month-long 1m range queries, 1h/1d candle queries and point lookups.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeseries import TimeSeriesStore
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--series', type=int, default=20)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--interval', type=int, default=60, help='seconds between samples')
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    store = TimeSeriesStore()
+    now = time.time()
+    times = np.arange(now - args.days * 86400, now, args.interval)
+
+    started = time.perf_counter()
+    for index in range(args.series):
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(times))))
+        for ts, price in zip(times.tolist(), prices.tolist()):
+            store.add(f'price:token_{index}', price, ts)
+    ingest_seconds = time.perf_counter() - started
+    samples = args.series * len(times)
+
+    names = store.names()
+    month_start = now - args.days * 86400
+    results = {
+        'series': args.series,
+        'samples': samples,
+        'ingest_samples_per_s': round(samples / ingest_seconds),
+        'month_1m': timed(lambda: store.candles(rng.choice(names), '1m', month_start, now), args.repeats),
+        'month_1h': timed(lambda: store.candles(rng.choice(names), '1h', month_start, now), args.repeats),
+        'all_1d': timed(lambda: store.candles(rng.choice(names), '1d'), args.repeats),
+        'returns_1d_7d_30d': timed(
+            lambda: store.returns(rng.choice(names), {'1d': 86400, '7d': 604800, '30d': 2592000}), args.repeats
+        )
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{samples:,} samples over {args.series} series: {results['ingest_samples_per_s']:,} samples/s ingest")
+    for label in ('month_1m', 'month_1h', 'all_1d', 'returns_1d_7d_30d'):
+        print(f"{label}: p50 {results[label]['p50_ms']} ms, p99 {results[label]['p99_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""Load test: every API route, against local stand-ins for CoinGecko, the chain RPC nodes and 1inch.
+
+    python benchmarks/load_test.py --requests 300 --concurrency 16 --output results.json
+    python benchmarks/load_test.py --latency-ms 50 --error-rate 0.02 --compare results.json
+
+By default the stand-ins (benchmarks/standins.py) and the Flask app run in
+this process, the app on a threaded werkzeug server. To measure a real
+deployment, start the stand-ins on their own, point gunicorn at them with
+the environment they print, and pass --url.
+
+Each route runs --requests requests at --concurrency after a short warmup.
+Reported per route: p50/p95/p99/max latency (client side), requests/s,
+status codes and the upstream calls the route caused (from the target's
+/metrics, so under gunicorn only one worker's calls are seen). SSE routes
+are timed to their first data frame.
+
+--output saves the results as JSON; --compare prints the change against an
+earlier results file and exits 1 if any route's p95 or throughput
+regressed by more than --threshold percent.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from standins import start_standins
+
+ADDRESS = '0x00000000219ab540356cBB839Cbe05303d7705Fa'
+SOLANA_ADDRESS = '9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM'
+HOLDINGS = {'ethereum': 2.5, 'bitcoin': 0.1, 'solana': 40, 'chainlink': 120}
+
+# (method, route rule, request path, JSON body); the rule is the name results are reported under
+ROUTES = [
+    ('GET', '/', '/', None),
+    ('GET', '/metrics', '/metrics', None),
+    ('GET', '/api/health', '/api/health', None),
+    ('GET', '/api/config', '/api/config', None),
+    ('GET', '/api/price/<token>', '/api/price/eth', None),
+    ('GET', '/api/prices/multi', '/api/prices/multi?tokens=ethereum,bitcoin,solana,chainlink', None),
+    ('GET', '/api/history/ohlc/<token>', '/api/history/ohlc/ethereum?resolution=1m', None),
+    ('GET', '/api/history/returns/<token>', '/api/history/returns/ethereum', None),
+    ('POST', '/api/wallet/connect', '/api/wallet/connect', {'type': 'metamask', 'address': ADDRESS}),
+    ('POST', '/api/wallet/disconnect', '/api/wallet/disconnect', {'address': ADDRESS}),
+    ('GET', '/api/wallet/balance/<address>', f'/api/wallet/balance/{ADDRESS}', None),
+    ('POST', '/api/wallet/balances', '/api/wallet/balances',
+     {'addresses': ['0x' + format(i + 1, '040x') for i in range(250)]}),
+    ('GET', '/api/wallet/portfolio',
+     f'/api/wallet/portfolio?wallets=ethereum:{ADDRESS},bsc:{ADDRESS},solana:{SOLANA_ADDRESS}', None),
+    ('POST', '/api/portfolio/holdings', '/api/portfolio/holdings', {'wallet': 'loadtest', 'holdings': HOLDINGS}),
+    ('GET', '/api/portfolio', '/api/portfolio', None),
+    ('GET', '/api/portfolio-overview', '/api/portfolio-overview?wallet=loadtest', None),
+    ('GET', '/api/trading/history', '/api/trading/history?limit=50', None),
+    ('GET', '/api/trading/stats', '/api/trading/stats', None),
+    ('GET', '/api/arbitrage', '/api/arbitrage', None),
+    ('GET', '/api/swap/quote', '/api/swap/quote?from=WETH&to=USDC&amount=2', None),
+    ('GET', '/api/agents', '/api/agents', None),
+    ('GET', '/api/agents/templates', '/api/agents/templates', None),
+    ('POST', '/api/agents/start', '/api/agents/start', {'agent_id': 'arbitrage_scanner'}),
+    ('POST', '/api/agents/pause', '/api/agents/pause', {'agent_id': 'arbitrage_scanner'}),
+    ('POST', '/api/agents/stop', '/api/agents/stop', {'agent_id': 'mev_protector'}),
+    ('GET', '/api/dashboard-analytics', '/api/dashboard-analytics', None),
+    ('GET', '/api/blockchain/status', '/api/blockchain/status', None),
+    ('GET', '/api/blockchain/gas-prices', '/api/blockchain/gas-prices', None),
+    ('GET', '/api/stream', '/api/stream?topics=prices,gas', None),
+    ('GET', '/api/stream/stats', '/api/stream/stats', None),
+    ('GET', '/api/events', '/api/events?topics=fills&limit=100', None)
+]
+# Routes the load test deliberately leaves out
+SKIPPED_RULES = {'/static/<path:filename>'}
+
+SSE_TIMEOUT = 10
+
+
+def seed_history(timeseries, token_ids, days, seed=42):
+    """Minute samples (a random walk per token) so the history routes have data to serve"""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    times = now - np.arange(days * 1440)[::-1] * 60
+    for token_id in token_ids:
+        walk = np.exp(np.cumsum(rng.normal(0, 0.001, len(times))))
+        for ts, value in zip(times.tolist(), (walk * 100).tolist()):
+            timeseries.add(f'price:{token_id}', value, ts)
+
+
+def serve_app_in_process(env, history_days):
+    """Import the app against the stand-ins and serve it on a background werkzeug server"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    os.environ.update(env)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+
+    uncovered = sorted(
+        rule.rule for rule in app_module.app.url_map.iter_rules()
+        if rule.rule not in SKIPPED_RULES and rule.rule not in {route for _, route, _, _ in ROUTES}
+    )
+    if uncovered:
+        print(f"⚠️  Routes without a load-test entry: {', '.join(uncovered)}")
+
+    seed_history(app_module.timeseries, HOLDINGS, history_days)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='app-server').start()
+    return f'http://127.0.0.1:{server.server_port}', server
+
+
+def upstream_calls(base_url):
+    """{provider: attempts} parsed from the target's /metrics"""
+    calls = {}
+    try:
+        text = requests.get(base_url + '/metrics', timeout=10).text
+    except requests.RequestException:
+        return calls
+    for line in text.splitlines():
+        if line.startswith('lootos_upstream_requests_total{'):
+            labels, value = line[len('lootos_upstream_requests_total{'):].rsplit('} ', 1)
+            provider = labels.split('provider="', 1)[1].split('"', 1)[0]
+            calls[provider] = calls.get(provider, 0) + int(float(value))
+    return calls
+
+
+def send(session, base_url, method, path, body):
+    """One request; returns (status, seconds). SSE requests end at the first data frame."""
+    started = time.perf_counter()
+    if path.startswith('/api/stream?'):
+        with session.get(base_url + path, stream=True, timeout=SSE_TIMEOUT) as response:
+            for line in response.iter_lines():
+                if line.startswith(b'data:'):
+                    break
+            return response.status_code, time.perf_counter() - started
+    response = session.request(method, base_url + path, json=body, timeout=30)
+    response.content  # read the whole body, streamed or not
+    return response.status_code, time.perf_counter() - started
+
+
+def run_route(base_url, method, path, body, total, concurrency, warmup):
+    """Results for one route, plus its latencies in ms"""
+    local = threading.local()
+    remaining = [total]
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    errors = [0]
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    for _ in range(warmup):
+        try:
+            send(session(), base_url, method, path, body)
+        except requests.RequestException:
+            pass
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            try:
+                status, seconds = send(session(), base_url, method, path, body)
+            except requests.RequestException:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(seconds)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if status >= 400:
+                    errors[0] += 1
+
+    upstream_before = upstream_calls(base_url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+    upstream_after = upstream_calls(base_url)
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    # The two /metrics scrapes around the run count themselves as requests, not upstream calls
+    upstream = {
+        provider: count - upstream_before.get(provider, 0)
+        for provider, count in upstream_after.items()
+        if count - upstream_before.get(provider, 0)
+    }
+    return {
+        'method': method,
+        'path': path,
+        'requests': total,
+        'errors': errors[0],
+        'status': statuses,
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2),
+        'mean_ms': round(float(ms.mean()), 2),
+        'max_ms': round(float(ms.max()), 2),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'upstream_calls': upstream,
+        'upstream_calls_per_request': round(sum(upstream.values()) / total, 3) if total else 0.0
+    }, ms[:len(latencies)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'route':<38} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'err':>5}  upstream/req")
+    for name, route in results['routes'].items():
+        print(f"{name:<38} {route['p50_ms']:>8.2f} {route['p95_ms']:>8.2f} {route['p99_ms']:>8.2f} "
+              f"{route['rps']:>8.1f} {route['errors']:>5}  {route['upstream_calls_per_request']}")
+    totals = results['totals']
+    print(f"\n{totals['requests']} requests, {totals['errors']} errors, overall p50/p95/p99 "
+          f"{totals['p50_ms']}/{totals['p95_ms']}/{totals['p99_ms']}ms, {totals['rps']} req/s")
+    if results.get('standin_calls'):
+        print(f"stand-in calls: {json.dumps(results['standin_calls'], sort_keys=True)}")
+
+
+def compare(results, baseline, threshold):
+    """Print p95 and throughput changes per route; returns the routes that regressed"""
+    regressions = []
+    print(f"\nvs {baseline.get('git_commit') or 'baseline'} ({baseline.get('timestamp')}):")
+    for name, route in results['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if not before:
+            print(f"  {name:<38} new")
+            continue
+        p95_change = (route['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0.0
+        rps_change = (route['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0.0
+        regressed = p95_change > threshold or rps_change < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<38} p95 {before['p95_ms']:>8.2f} -> {route['p95_ms']:>8.2f} ({p95_change:+6.1f}%)  "
+              f"rps {before['rps']:>8.1f} -> {route['rps']:>8.1f} ({rps_change:+6.1f}%)"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='target an already running server instead of an in-process app')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per route before measuring')
+    parser.add_argument('--routes', help='comma-separated substrings; only matching routes run')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='stand-in upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='stand-in upstream error rate (0-1)')
+    parser.add_argument('--block-time', type=float, default=12.0, help='seconds per stand-in block')
+    parser.add_argument('--history-days', type=int, default=7, help='minute price history seeded in-process')
+    parser.add_argument('--background', action='store_true',
+                        help='keep the market feed and agent runtime running during the test')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regression threshold, percent')
+    args = parser.parse_args()
+
+    standins = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        standins, env = start_standins(args.latency_ms, args.jitter_ms, args.error_rate, args.block_time)
+        if not args.background:
+            env.update({'MARKET_FEED': 'off', 'AGENT_RUNTIME': 'off'})
+        base_url, _ = serve_app_in_process(env, args.history_days)
+
+    routes = ROUTES
+    if args.routes:
+        wanted = [part.strip() for part in args.routes.split(',') if part.strip()]
+        routes = [route for route in ROUTES if any(part in route[1] for part in wanted)]
+
+    results = {
+        'benchmark': 'load_test',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'config': {
+            'target': args.url or 'in-process',
+            'requests_per_route': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'upstream_latency_ms': args.latency_ms,
+            'upstream_jitter_ms': args.jitter_ms,
+            'upstream_error_rate': args.error_rate,
+            'block_time': args.block_time,
+            'background_services': args.background
+        },
+        'routes': {}
+    }
+
+    started = time.perf_counter()
+    all_ms = []
+    for method, rule, path, body in routes:
+        name = f'{method} {rule}'
+        route, ms = run_route(base_url, method, path, body, args.requests, args.concurrency, args.warmup)
+        results['routes'][name] = route
+        all_ms.append(ms)
+        print(f"  {name:<38} p95 {route['p95_ms']:>8.2f}ms  {route['rps']:>8.1f} req/s", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+
+    total_requests = sum(route['requests'] for route in results['routes'].values())
+    all_ms = np.concatenate(all_ms) if all_ms else np.zeros(1)
+    results['totals'] = {
+        'requests': total_requests,
+        'errors': sum(route['errors'] for route in results['routes'].values()),
+        'p50_ms': round(float(np.percentile(all_ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(all_ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(all_ms, 99)), 2),
+        'rps': round(total_requests / elapsed, 1) if elapsed else 0.0,
+        'seconds': round(elapsed, 2)
+    }
+    if standins is not None:
+        results['standin_calls'] = {name: standin.snapshot() for name, standin in standins.items()}
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} route(s) regressed by more than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+"""Local stand-ins for the upstream APIs, for benchmarks and offline runs.
+
+    python benchmarks/standins.py --latency-ms 40 --error-rate 0.01
+
+Serves a fake CoinGecko (`/api/v3/simple/price`), EVM JSON-RPC stubs for
+Ethereum and BSC, a Solana JSON-RPC stub and a mock of the 1inch quote API
+(`/swap/v6.0/1/quote`, rate limited like a real API key), each with
+configurable latency and error rate, and prints the environment that
+points the app at them.
+Each counts every call it answers, so a benchmark can report upstream
+traffic per route.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_abi import encode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multicall import selector
+from dex_pools import TOKENS, build_pools
+
+SLOT0 = '0x' + selector('slot0()').hex()
+LIQUIDITY = '0x' + selector('liquidity()').hex()
+
+BASE_PRICES = {
+    'ethereum': 2450.0,
+    'bitcoin': 43500.0,
+    'solana': 98.5,
+    'binancecoin': 310.0,
+    'usd-coin': 1.0,
+    'tether': 1.0,
+    'dai': 1.0,
+    'wrapped-bitcoin': 43500.0,
+    'weth': 2450.0,
+    'chainlink': 14.5,
+    'uniswap': 6.2
+}
+
+
+class StandIn:
+    """A threaded HTTP server on 127.0.0.1 with injected latency and errors"""
+
+    def __init__(self, handler, port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 spike_rate=0.0, spike_ms=0.0, seed=None):
+        # All of these may be changed while serving, e.g. to stage an outage mid-run
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.spike_rate = spike_rate  # share of calls that take spike_ms longer (tail latency)
+        self.spike_ms = spike_ms
+        self.calls = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        class Handler(handler):
+            def log_message(self, *args):
+                pass
+
+        Handler.standin = self
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name=type(self).__name__)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.calls)
+
+    def delay(self):
+        """Sleep for the configured latency; True if this call should fail"""
+        with self._lock:
+            seconds = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            if self._rng.random() < self.spike_rate:
+                seconds += self.spike_ms / 1000
+            failed = self._rng.random() < self.error_rate
+        if seconds:
+            time.sleep(seconds)
+        return failed
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40ms per call
+    disable_nagle_algorithm = True
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class CoinGeckoHandler(JSONHandler):
+    """GET /api/v3/simple/price?ids=...&vs_currencies=usd&include_24hr_change=true"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.standin.count('simple/price' if url.path.endswith('/simple/price') else url.path)
+        if self.standin.delay():
+            self.send_json(429, {'status': {'error_code': 429, 'error_message': 'rate limited'}}, {'Retry-After': '0'})
+            return
+        if not url.path.endswith('/simple/price'):
+            self.send_json(404, {'error': 'not found'})
+            return
+        ids = [token_id for token_id in parse_qs(url.query).get('ids', [''])[0].split(',') if token_id]
+        self.send_json(200, {
+            token_id: {
+                'usd': round(BASE_PRICES.get(token_id, 100.0) * (1 + random.uniform(-0.01, 0.01)), 4),
+                'usd_24h_change': round(random.uniform(-5, 5), 3)
+            }
+            for token_id in ids
+        })
+
+
+class CoinGeckoStandIn(StandIn):
+    def __init__(self, **kwargs):
+        super().__init__(CoinGeckoHandler, **kwargs)
+
+    @property
+    def api_url(self):
+        return self.url + '/api/v3'
+
+
+class RPCHandler(JSONHandler):
+    """JSON-RPC over POST, single requests and batches; a new block every block_time seconds"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        requests = body if isinstance(body, list) else [body]
+        for item in requests:
+            self.standin.count(item.get('method', '?'))
+        self.standin.count('http_requests')
+        if self.standin.delay():
+            self.send_json(503, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32603, 'message': 'unavailable'}})
+            return
+        results = [self.standin.answer(item) for item in requests]
+        self.send_json(200, results if isinstance(body, list) else results[0])
+
+
+class RPCStandIn(StandIn):
+    def __init__(self, block_time=12.0, first_block=19000000, chain_id=1, **kwargs):
+        super().__init__(RPCHandler, **kwargs)
+        self.block_time = block_time
+        self.first_block = first_block
+        self.chain_id = chain_id
+        self.started = time.time()
+        self.pools = {pool.id.lower(): pool for pool in build_pools()}
+
+    def head(self):
+        if not self.block_time:
+            return self.first_block
+        return self.first_block + int((time.time() - self.started) / self.block_time)
+
+    def answer(self, item):
+        method, params = item.get('method'), item.get('params') or []
+        try:
+            result = self.result(method, params)
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': item.get('id'), 'error': {'code': -32602, 'message': str(e)}}
+        return {'jsonrpc': '2.0', 'id': item.get('id'), 'result': result}
+
+    def result(self, method, params):
+        if method == 'eth_blockNumber':
+            return hex(self.head())
+        if method in ('eth_chainId', 'net_version'):
+            return hex(self.chain_id) if method == 'eth_chainId' else str(self.chain_id)
+        if method == 'web3_clientVersion':
+            return 'LootOS-standin/1.0'
+        if method == 'eth_gasPrice':
+            return hex(int(20e9 * (1 + 0.05 * (self.head() % 5))))
+        if method == 'eth_getBalance':
+            return hex(int(params[0], 16) % 10 ** 20 + 10 ** 17)
+        if method == 'eth_getCode':
+            return '0x'  # no Multicall3: balance reads take the plain batch path
+        if method == 'eth_call':
+            return self.call_result(params[0].get('to', ''), params[0].get('data', '0x'))
+        if method == 'eth_feeHistory':
+            return self.fee_history(int(params[0], 16), params[1], params[2] if len(params) > 2 else [])
+        raise ValueError(f'method {method} not supported by the stand-in')
+
+    def call_result(self, to, data):
+        pool = self.pools.get(to.lower())
+        if pool is None:
+            return '0x' + encode(
+                ['uint112', 'uint112', 'uint32'],
+                [random.randint(10 ** 20, 10 ** 21), random.randint(10 ** 20, 10 ** 21), 1]
+            ).hex()
+        # Known pools hold ~$5M at BASE_PRICES (within 1%), in raw units like the contracts report
+        reserve0, reserve1 = (
+            2.5e6 / BASE_PRICES[TOKENS[token][2]] * 10 ** TOKENS[token][1] * random.uniform(0.99, 1.01)
+            for token in (pool.token0, pool.token1)
+        )
+        if data == SLOT0:
+            price = reserve1 / reserve0
+            return '0x' + encode(
+                ['uint160', 'int24', 'uint16', 'uint16', 'uint16', 'uint8', 'bool'],
+                [int(2 ** 96 * price ** 0.5), math.floor(math.log(price, 1.0001)), 0, 1, 1, 0, True]
+            ).hex()
+        if data == LIQUIDITY:
+            return '0x' + encode(['uint128'], [int((reserve0 * reserve1) ** 0.5)]).hex()
+        return '0x' + encode(['uint112', 'uint112', 'uint32'], [int(reserve0), int(reserve1), 1]).hex()
+
+    def fee_history(self, count, newest, percentiles):
+        head = self.head() if newest in ('latest', 'pending') else int(newest, 16)
+        oldest = head - count + 1
+        blocks = range(oldest, head + 1)
+        return {
+            'oldestBlock': hex(oldest),
+            'baseFeePerGas': [hex(int(20e9 * (1 + 0.01 * ((b % 7) - 3)))) for b in range(oldest, head + 2)],
+            'gasUsedRatio': [0.3 + 0.05 * (b % 9) for b in blocks],
+            'reward': [[hex(int(pct * 1e7 * (1 + b % 3))) for pct in percentiles] for b in blocks]
+        }
+
+
+class SolanaHandler(JSONHandler):
+    """Solana JSON-RPC over POST, single requests and batches; a new slot every slot_time seconds"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        requests = body if isinstance(body, list) else [body]
+        for item in requests:
+            self.standin.count(item.get('method', '?'))
+        self.standin.count('http_requests')
+        if self.standin.delay():
+            self.send_json(429, {'jsonrpc': '2.0', 'id': None, 'error': {'code': 429, 'message': 'Too many requests'}})
+            return
+        results = [self.standin.answer(item) for item in requests]
+        self.send_json(200, results if isinstance(body, list) else results[0])
+
+
+class SolanaStandIn(StandIn):
+    def __init__(self, slot_time=0.4, first_slot=250000000, **kwargs):
+        super().__init__(SolanaHandler, **kwargs)
+        self.slot_time = slot_time
+        self.first_slot = first_slot
+        self.started = time.time()
+
+    def slot(self):
+        return self.first_slot + int((time.time() - self.started) / self.slot_time)
+
+    def answer(self, item):
+        method, params = item.get('method'), item.get('params') or []
+        if method == 'getSlot':
+            result = self.slot()
+        elif method == 'getHealth':
+            result = 'ok'
+        elif method == 'getBalance':
+            result = {'context': {'slot': self.slot()}, 'value': self.lamports(params[0])}
+        elif method == 'getMultipleAccounts':
+            # Every other key is an account that does not exist
+            result = {'context': {'slot': self.slot()}, 'value': [
+                {'lamports': self.lamports(key), 'owner': '11111111111111111111111111111111', 'data': ['', 'base64'],
+                 'executable': False, 'rentEpoch': 0, 'space': 0} if index % 2 == 0 else None
+                for index, key in enumerate(params[0])
+            ]}
+        elif method == 'getRecentPrioritizationFees':
+            slot = self.slot()
+            result = [{'slot': slot - offset, 'prioritizationFee': (offset * 7919) % 5000} for offset in range(150)]
+        else:
+            return {'jsonrpc': '2.0', 'id': item.get('id'), 'error': {'code': -32601, 'message': 'Method not found'}}
+        return {'jsonrpc': '2.0', 'id': item.get('id'), 'result': result}
+
+    @staticmethod
+    def lamports(key):
+        return sum(key.encode()) * 10 ** 7
+
+
+class OneInchHandler(JSONHandler):
+    """GET /swap/v6.0/<chain>/quote?src=...&dst=...&amount=... with a Bearer API key"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.standin.count('quote' if url.path.endswith('/quote') else url.path)
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self.send_json(401, {'statusCode': 401, 'description': 'Unauthorized'})
+            return
+        if not self.standin.admit():
+            self.standin.count('rate_limited')
+            self.send_json(429, {'statusCode': 429, 'description': 'Too many requests'}, {'Retry-After': '1'})
+            return
+        if self.standin.delay():
+            self.send_json(500, {'statusCode': 500, 'description': 'Internal error'})
+            return
+        if not url.path.endswith('/quote'):
+            self.send_json(404, {'statusCode': 404, 'description': 'Not found'})
+            return
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            self.send_json(200, self.standin.quote(query['src'], query['dst'], int(query['amount'])))
+        except (KeyError, ValueError) as e:
+            self.send_json(400, {'statusCode': 400, 'description': f'invalid request: {str(e)}'})
+
+
+class OneInchStandIn(StandIn):
+    """Quotes at BASE_PRICES less a small routing edge; answers 429 above rate_limit requests/s"""
+
+    def __init__(self, rate_limit=1.0, edge=0.0005, **kwargs):
+        super().__init__(OneInchHandler, **kwargs)
+        self.rate_limit = rate_limit
+        self.edge = edge
+        self.tokens = {address.lower(): (symbol, decimals, price_id) for symbol, (address, decimals, price_id) in TOKENS.items()}
+        self._admitted = []
+
+    @property
+    def api_url(self):
+        return self.url + '/swap/v6.0/1'
+
+    def admit(self):
+        """Sliding one-second window of admitted requests, like a per-key API limit"""
+        with self._lock:
+            now = time.monotonic()
+            self._admitted = [at for at in self._admitted if now - at < 1.0]
+            if self.rate_limit and len(self._admitted) >= self.rate_limit:
+                return False
+            self._admitted.append(now)
+            return True
+
+    def quote(self, src, dst, amount):
+        src_symbol, src_decimals, src_id = self.tokens[src.lower()]
+        dst_symbol, dst_decimals, dst_id = self.tokens[dst.lower()]
+        value = amount / 10 ** src_decimals * BASE_PRICES[src_id] / BASE_PRICES[dst_id] * (1 - self.edge)
+        return {
+            'dstAmount': str(int(value * 10 ** dst_decimals)),
+            'gas': 180000,
+            'protocols': [[[
+                {'name': 'UNISWAP_V3', 'part': 60, 'fromTokenAddress': src.lower(), 'toTokenAddress': dst.lower()},
+                {'name': 'CURVE', 'part': 40, 'fromTokenAddress': src.lower(), 'toTokenAddress': dst.lower()}
+            ]]]
+        }
+
+
+def start_standins(latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, block_time=12.0,
+                   coingecko_port=0, rpc_port=0, bsc_port=0, solana_port=0, oneinch_port=0, seed=None):
+    """Start every stand-in; returns ({provider: stand-in}, env) where env points the app at them"""
+    options = {'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'error_rate': error_rate, 'seed': seed}
+    standins = {
+        'coingecko': CoinGeckoStandIn(port=coingecko_port, **options).start(),
+        'ethereum_rpc': RPCStandIn(port=rpc_port, block_time=block_time, **options).start(),
+        'bsc_rpc': RPCStandIn(port=bsc_port, block_time=3.0, chain_id=56, first_block=36000000, **options).start(),
+        'solana_rpc': SolanaStandIn(port=solana_port, **options).start(),
+        'oneinch': OneInchStandIn(port=oneinch_port, **options).start()
+    }
+    env = {
+        'COINGECKO_API_URL': standins['coingecko'].api_url,
+        'ETHEREUM_RPC_URL': standins['ethereum_rpc'].url,
+        'BSC_RPC_URL': standins['bsc_rpc'].url,
+        'SOLANA_RPC_URL': standins['solana_rpc'].url,
+        'ONEINCH_API_URL': standins['oneinch'].api_url
+    }
+    return standins, env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--block-time', type=float, default=12.0)
+    parser.add_argument('--coingecko-port', type=int, default=8601)
+    parser.add_argument('--rpc-port', type=int, default=8545)
+    parser.add_argument('--bsc-port', type=int, default=8546)
+    parser.add_argument('--solana-port', type=int, default=8899)
+    parser.add_argument('--oneinch-port', type=int, default=8602)
+    args = parser.parse_args()
+
+    standins, env = start_standins(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.block_time,
+        args.coingecko_port, args.rpc_port, args.bsc_port, args.solana_port, args.oneinch_port
+    )
+    for key, value in env.items():
+        print(f'export {key}={value}')
+    try:
+        while True:
+            time.sleep(10)
+            calls = ' '.join(f'{name}={standin.snapshot()}' for name, standin in standins.items())
+            print(f'# calls: {calls}', file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+import os
+import re
+import time
+import asyncio
+import itertools
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+from eth_utils import is_address
+
+from eth_reads import RPCError
+from gas_oracle import GAS_TIERS, GWEI, SortedWindow
+
+# Deadline for each chain's part of a query; a slow chain is reported as failed, not waited on
+CHAIN_QUERY_TIMEOUT = float(os.environ.get('CHAIN_QUERY_TIMEOUT', 5))
+SOLANA_RPC_URL = os.environ.get('SOLANA_RPC_URL', 'https://api.mainnet-beta.solana.com')
+SOLANA_RPC_TIMEOUT = float(os.environ.get('SOLANA_RPC_TIMEOUT', 10))
+# After this many consecutive failed requests Solana is skipped for SOLANA_RETRY_AFTER seconds
+SOLANA_DISCONNECT_AFTER = int(os.environ.get('SOLANA_DISCONNECT_AFTER', 3))
+SOLANA_RETRY_AFTER = float(os.environ.get('SOLANA_RETRY_AFTER', 15))
+
+SOLANA_BASE_FEE_LAMPORTS = 5000  # per signature
+SOLANA_MAX_ACCOUNTS = 100  # getMultipleAccounts limit per call
+SOLANA_ADDRESS = re.compile(r'^[1-9A-HJ-NP-Za-km-z]{32,44}$')  # base58 public key
+
+
+class ChainAdapter:
+    """Reads for one chain: head height, native balances (batched) and fee estimates.
+
+    The read methods are coroutines, so a query spanning several chains
+    awaits them together and costs the slowest chain rather than the sum.
+    Balances are in the chain's smallest unit (raw_unit); to_native scales
+    them by decimals.
+    """
+
+    name = None
+    symbol = None
+    price_id = None  # CoinGecko id of the native asset
+    decimals = 18
+    raw_unit = 'wei'
+    head_unit = 'block_number'
+
+    @property
+    def connected(self):
+        raise NotImplementedError
+
+    def is_address(self, address):
+        raise NotImplementedError
+
+    async def head(self):
+        raise NotImplementedError
+
+    async def balances(self, addresses):
+        """Raw native balances, in the order of addresses, in as few round trips as the chain allows"""
+        raise NotImplementedError
+
+    async def fees(self):
+        raise NotImplementedError
+
+    async def balance(self, address):
+        return (await self.balances([address]))[0]
+
+    async def status(self):
+        """Head and fee estimate, fetched together; a chain that cannot be reached reports connected False"""
+        status = {'connected': False, self.head_unit: 0, 'fees': None}
+        if not self.connected:
+            return status
+        head, fees = await asyncio.gather(self.head(), self.fees(), return_exceptions=True)
+        if isinstance(head, Exception):
+            status['error'] = str(head) or type(head).__name__
+            return status
+        status.update({'connected': True, self.head_unit: head})
+        if not isinstance(fees, Exception):
+            status['fees'] = fees
+        return status
+
+    def to_native(self, raw):
+        return raw / 10 ** self.decimals
+
+    def reset(self):
+        """Drop per-process client state after a fork"""
+
+    def stats(self):
+        return {'connected': self.connected}
+
+
+class EVMAdapter(ChainAdapter):
+    """An EVM chain over an EthReader (batched, block-cached JSON-RPC) and its EthConnection.
+
+    The reader is synchronous, so reads run in a worker thread; the sync
+    read_* methods are also what single-chain callers use directly.
+    """
+
+    def __init__(self, name, symbol, price_id, reader, connection, gas_oracle=None):
+        self.name = name
+        self.symbol = symbol
+        self.price_id = price_id
+        self.reader = reader
+        self.connection = connection
+        self.gas_oracle = gas_oracle
+
+    @property
+    def connected(self):
+        return self.connection.connected
+
+    def is_address(self, address):
+        return is_address(address)
+
+    async def head(self):
+        return await asyncio.to_thread(self.reader.head)
+
+    async def balances(self, addresses):
+        return await asyncio.to_thread(self.read_balances, addresses)
+
+    async def fees(self):
+        return await asyncio.to_thread(self.read_fees)
+
+    def read_balances(self, addresses):
+        """eth_getBalance for every address in one JSON-RPC batch (cached within a block)"""
+        results = self.reader.read_many([('eth_getBalance', (address, 'latest')) for address in addresses])
+        for result in results:
+            if isinstance(result, RPCError):
+                raise result
+        return [int(result, 16) for result in results]
+
+    def read_fees(self):
+        """Fee-history estimate, or tiers around eth_gasPrice on nodes without eth_feeHistory"""
+        if self.gas_oracle is not None:
+            try:
+                snapshot = self.gas_oracle.refresh()
+                if snapshot:
+                    return snapshot
+            except RPCError as e:
+                print(f"⚠️  {self.name} gas oracle unavailable: {str(e)}")
+
+        gas_price_gwei = int(self.reader.read('eth_gasPrice'), 16) / GWEI
+        return {
+            'safe': gas_price_gwei * 0.9,
+            'standard': gas_price_gwei,
+            'fast': gas_price_gwei * 1.2,
+            'instant': gas_price_gwei * 1.5,
+            'source': f'{self.name}_network_real_time'
+        }
+
+    def stats(self):
+        return {'connected': self.connected, 'state': self.connection.state, **self.reader.stats()}
+
+
+class SolanaAdapter(ChainAdapter):
+    """Solana JSON-RPC over aiohttp.
+
+    Balances for many accounts go out as getMultipleAccounts calls of up to
+    100 keys, all in one JSON-RPC batch. Fee tiers are percentiles of
+    getRecentPrioritizationFees (micro-lamports per compute unit, on top of
+    the 5000-lamport signature fee). aiohttp sessions belong to the event
+    loop that created them, so there is one per loop.
+    """
+
+    name = 'solana'
+    symbol = 'SOL'
+    price_id = 'solana'
+    decimals = 9
+    raw_unit = 'lamports'
+    head_unit = 'slot'
+
+    def __init__(self, url=SOLANA_RPC_URL, timeout=SOLANA_RPC_TIMEOUT,
+                 disconnect_after=SOLANA_DISCONNECT_AFTER, retry_after=SOLANA_RETRY_AFTER):
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.timeout = timeout
+        self.disconnect_after = disconnect_after
+        self.retry_after = retry_after
+        self._sessions = {}
+        self._listeners = []
+        self._ids = itertools.count(1)
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._counters = {'rpc_requests': 0, 'rpc_calls': 0, 'errors': 0}
+
+    @property
+    def connected(self):
+        # Once the retry window has passed, the next call finds out whether it is back
+        return self._failures < self.disconnect_after or time.monotonic() >= self._retry_at
+
+    def on_request(self, listener):
+        """Register listener(host, seconds, errored), called for every HTTP request"""
+        self._listeners.append(listener)
+
+    def is_address(self, address):
+        return bool(SOLANA_ADDRESS.match(address or ''))
+
+    async def batch(self, calls):
+        """Send [(method, params), ...] as one JSON-RPC batch; failed calls come back as RPCError"""
+        payload = [
+            {'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': list(params)}
+            for method, params in calls
+        ]
+        with self._lock:
+            self._counters['rpc_requests'] += 1
+            self._counters['rpc_calls'] += len(calls)
+        body = await self._post(payload)
+        if isinstance(body, dict):
+            raise RPCError('batch', body.get('error', {'message': str(body)}))
+
+        results = {item.get('id'): item for item in body}
+        answers = []
+        for request, (method, _) in zip(payload, calls):
+            item = results.get(request['id'], {'error': {'message': 'missing response'}})
+            answers.append(RPCError(method, item['error']) if 'error' in item else item.get('result'))
+        return answers
+
+    async def call(self, method, params=()):
+        result = (await self.batch([(method, params)]))[0]
+        if isinstance(result, RPCError):
+            raise result
+        return result
+
+    async def head(self):
+        return await self.call('getSlot', [{'commitment': 'confirmed'}])
+
+    async def balances(self, addresses):
+        # Zero-length data slice: only the lamports field is needed
+        options = {'encoding': 'base64', 'dataSlice': {'offset': 0, 'length': 0}, 'commitment': 'confirmed'}
+        chunks = [addresses[i:i + SOLANA_MAX_ACCOUNTS] for i in range(0, len(addresses), SOLANA_MAX_ACCOUNTS)]
+        balances = []
+        for result in await self.batch([('getMultipleAccounts', [chunk, options]) for chunk in chunks]):
+            if isinstance(result, RPCError):
+                raise result
+            # Accounts that do not exist come back as null
+            balances.extend(account['lamports'] if account else 0 for account in result['value'])
+        return balances
+
+    async def fees(self):
+        window = SortedWindow()
+        samples = await self.call('getRecentPrioritizationFees', [])
+        for sample in samples:
+            window.add(sample['prioritizationFee'])
+        fees = {tier: window.percentile(pct) or 0 for tier, pct in GAS_TIERS}
+        fees.update({
+            'unit': 'micro_lamports_per_compute_unit',
+            'base_fee_lamports': SOLANA_BASE_FEE_LAMPORTS,
+            'slots': len(samples),
+            'source': 'solana_recent_prioritization_fees'
+        })
+        return fees
+
+    def reset(self):
+        self._sessions = {}
+
+    def stats(self):
+        with self._lock:
+            return {'connected': self.connected, 'consecutive_failures': self._failures, **self._counters}
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            self._sessions = {other: s for other, s in self._sessions.items() if not other.is_closed()}
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._sessions[loop] = session
+        return session
+
+    async def _post(self, payload):
+        started = time.perf_counter()
+        errored = True
+        try:
+            async with self._session().post(self.url, json=payload) as response:
+                response.raise_for_status()
+                body = await response.json(content_type=None)
+            errored = False
+            return body
+        finally:
+            with self._lock:
+                if errored:
+                    self._counters['errors'] += 1
+                    self._failures += 1
+                    if self._failures >= self.disconnect_after:
+                        self._retry_at = time.monotonic() + self.retry_after
+                else:
+                    self._failures = 0
+            seconds = time.perf_counter() - started
+            for listener in self._listeners:
+                listener(self.host, seconds, errored)
+
+
+class ChainRegistry:
+    """Chain adapters by name, queried concurrently.
+
+    Async callers await the coroutines directly; sync callers (Flask
+    handlers, worker threads) hand them to run(), which executes them on a
+    private event loop thread started on first use.
+    """
+
+    def __init__(self, adapters, timeout=CHAIN_QUERY_TIMEOUT):
+        self.adapters = {adapter.name: adapter for adapter in adapters}
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return list(self.adapters)
+
+    def __getitem__(self, name):
+        return self.adapters[name]
+
+    def __contains__(self, name):
+        return name in self.adapters
+
+    def get(self, name):
+        return self.adapters.get(name)
+
+    async def each(self, call, names=None):
+        """call(adapter) for every named chain at once; returns {name: result or exception}"""
+        names = self.names if names is None else list(names)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(call(self.adapters[name]), self.timeout) for name in names),
+            return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    async def status(self, names=None):
+        """Status of every named chain at once; a chain that errors or times out reports connected False"""
+        results = await self.each(lambda adapter: adapter.status(), names)
+        return {
+            name: result if not isinstance(result, Exception) else {
+                'connected': False,
+                self.adapters[name].head_unit: 0,
+                'fees': None,
+                'error': str(result) or type(result).__name__
+            }
+            for name, result in results.items()
+        }
+
+    async def balances(self, addresses_by_chain):
+        """Native balances for {chain: [address, ...]}; returns {chain: [raw, ...] or exception}"""
+        return await self.each(lambda adapter: adapter.balances(addresses_by_chain[adapter.name]), addresses_by_chain)
+
+    def submit(self, coro):
+        """Start a coroutine on the registry's loop from sync code; returns a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro):
+        """Run a coroutine on the registry's loop from sync code and wait for its result"""
+        future = self.submit(coro)
+        try:
+            return future.result(self.timeout + 1)
+        except Exception:
+            future.cancel()
+            raise
+
+    def reset(self):
+        """Forget the loop thread and per-loop clients (they do not survive a fork)"""
+        with self._lock:
+            self._loop = None
+            self._thread = None
+        for adapter in self.adapters.values():
+            adapter.reset()
+
+    def stats(self):
+        return {name: adapter.stats() for name, adapter in self.adapters.items()}
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='chain-queries')
+                self._thread.start()
+            return self._loop
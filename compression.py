@@ -0,0 +1,94 @@
+import os
+import gzip
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_ENABLED = os.environ.get('COMPRESS', 'on') != 'off'
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 5))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+# Large bodies (long candle series) use the fastest level: ~5x quicker for ~8% more bytes
+COMPRESS_LARGE_SIZE = int(os.environ.get('COMPRESS_LARGE_SIZE', 512 * 1024))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'image/svg+xml')
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """Best of our encodings the client accepts (Accept-Encoding with q-values), or None"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    candidates = [
+        (weights.get(encoding, weights.get('*', 0.0)), -rank, encoding)
+        for rank, encoding in enumerate(supported_encodings())
+    ]
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+
+def compress(body, encoding):
+    large = len(body) >= COMPRESS_LARGE_SIZE
+    if encoding == 'br':
+        return brotli.compress(body, quality=1 if large else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=1 if large else GZIP_LEVEL, mtime=0)
+
+
+def is_compressible(response):
+    return (
+        COMPRESS_ENABLED
+        and response.status_code == 200
+        and not response.direct_passthrough
+        and 'Content-Encoding' not in response.headers
+        and (response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE_MIMETYPES)
+    )
+
+
+def encode_response(response, encoding, body=None):
+    """Set a compressed body on a Flask response.
+
+    A strong ETag only identifies one representation, so it becomes weak:
+    If-None-Match still matches it (weak comparison) whatever the encoding.
+    """
+    response.set_data(body if body is not None else compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
+
+
+def compress_response(response, accept_encoding, variants=None):
+    """Compress an eligible response if the client can decode it.
+
+    variants ({encoding: bytes}) lets a caller that serves the same body
+    repeatedly (the response cache) compress it once per encoding.
+    """
+    if is_compressible(response):
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding and response.content_length and response.content_length >= COMPRESS_MIN_SIZE:
+            body = None
+            if variants is not None:
+                body = variants.get(encoding)
+                if body is None:
+                    body = variants[encoding] = compress(response.get_data(), encoding)
+            encode_response(response, encoding, body)
+    return response
@@ -0,0 +1,144 @@
+import math
+import random
+
+from eth_abi import decode
+
+from arbitrage import Pool, ConcentratedPool
+from eth_reads import RPCError
+from multicall import selector
+
+GET_RESERVES = selector('getReserves()')
+SLOT0 = selector('slot0()')
+LIQUIDITY = selector('liquidity()')
+
+# symbol -> (address, decimals, CoinGecko id)
+TOKENS = {
+    'WETH': ('0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2', 18, 'ethereum'),
+    'USDC': ('0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48', 6, 'usd-coin'),
+    'USDT': ('0xdAC17F958D2ee523a2206206994597C13D831ec7', 6, 'tether'),
+    'DAI': ('0x6B175474E89094C44Da98b954EedeAC495271d0F', 18, 'dai'),
+    'WBTC': ('0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599', 8, 'wrapped-bitcoin'),
+    'LINK': ('0x514910771AF9Ca656af840dff83E8264EcF986CA', 18, 'chainlink'),
+}
+
+# Uniswap V2-style pairs on Ethereum mainnet: (pair address, dex, symbol, symbol)
+DEX_POOLS = [
+    ('0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc', 'uniswap_v2', 'USDC', 'WETH'),
+    ('0x397FF1542f962076d0BFE58eA045FfA2d347ACa0', 'sushiswap', 'USDC', 'WETH'),
+    ('0x0d4a11d5EEaaC28EC3F61d100daF4d40471f1852', 'uniswap_v2', 'WETH', 'USDT'),
+    ('0x06da0fd433C1A5d7a4faa01111c044910A184553', 'sushiswap', 'WETH', 'USDT'),
+    ('0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11', 'uniswap_v2', 'DAI', 'WETH'),
+    ('0xC3D03e4F041Fd4cD388c549Ee2A29a9E5075882f', 'sushiswap', 'DAI', 'WETH'),
+    ('0xBb2b8038a1640196FbE3e38816F3e67Cba72D940', 'uniswap_v2', 'WBTC', 'WETH'),
+    ('0xCEfF51756c56CeFFCA006cD410B03FFC46dd3a58', 'sushiswap', 'WBTC', 'WETH'),
+    ('0xa2107FA5B38d9bbd2C461D6EDf11B11A50F6b974', 'uniswap_v2', 'LINK', 'WETH'),
+    ('0xC40D16476380e4037e6b1A2594cAF6a6cc8Da967', 'sushiswap', 'LINK', 'WETH'),
+    ('0x3041CbD36888bECc7bbCBc0045E3B1f144466f5f', 'uniswap_v2', 'USDC', 'USDT'),
+    ('0xAE461cA67B15dc8dc81CE7615e0320dA1A9aB8D5', 'uniswap_v2', 'DAI', 'USDC'),
+]
+
+# Uniswap V3 pools: (pool address, symbol, symbol, fee, tick spacing)
+V3_POOLS = [
+    ('0x88e6A0c2dDD26FEEb64F039a2c41296FcB3f5640', 'USDC', 'WETH', 0.0005, 10),
+    ('0x8ad599c3A0ff1De082011EFDDc58f1908eb6e6D8', 'USDC', 'WETH', 0.003, 60),
+    ('0x4e68Ccd3E89f51C3074ca5072bbAC773960dFa36', 'WETH', 'USDT', 0.003, 60),
+    ('0xCBCdF9626bC03E24f779434178A73a0B4bad62eD', 'WBTC', 'WETH', 0.003, 60),
+    ('0x5777d92f208679DB4b9778590Fa3CAB3aC9e2168', 'DAI', 'USDC', 0.0001, 1),
+]
+TICK_SPACING = {address: spacing for address, _, _, _, spacing in V3_POOLS}
+
+
+def _ordered(symbol_a, symbol_b):
+    return sorted((symbol_a, symbol_b), key=lambda symbol: TOKENS[symbol][0].lower())
+
+
+def build_pools(pool_specs=DEX_POOLS, v3_specs=V3_POOLS):
+    """Pool objects for the registry, token0/token1 ordered by address like the pool contracts"""
+    pools = []
+    for address, dex, symbol_a, symbol_b in pool_specs:
+        token0, token1 = _ordered(symbol_a, symbol_b)
+        pools.append(Pool(address, dex, token0, token1, 0, 0))
+    for address, symbol_a, symbol_b, fee, _ in v3_specs:
+        token0, token1 = _ordered(symbol_a, symbol_b)
+        pools.append(ConcentratedPool(address, 'uniswap_v3', token0, token1, 0, 0, fee))
+    return pools
+
+
+def _hex_bytes(result):
+    return bytes.fromhex(result[2:] if result.startswith('0x') else result)
+
+
+def v3_state(pool, sqrt_price_x96, tick, liquidity):
+    """Pool state in whole tokens for the active tick range around the current price"""
+    scale0 = 10 ** TOKENS[pool.token0][1]
+    scale1 = 10 ** TOKENS[pool.token1][1]
+    spacing = TICK_SPACING.get(pool.id, 1)
+    tick_lower = (tick // spacing) * spacing
+
+    sqrt_price = sqrt_price_x96 / 2 ** 96
+    sqrt_lower = math.sqrt(1.0001 ** tick_lower)
+    sqrt_upper = math.sqrt(1.0001 ** (tick_lower + spacing))
+    if liquidity <= 0 or sqrt_price <= 0:
+        return (0.0, 0.0, 0.0, 0.0)
+    return (
+        liquidity / sqrt_price / scale0,
+        liquidity * sqrt_price / scale1,
+        max(0.0, liquidity * (1 / sqrt_lower - 1 / sqrt_price)) / scale0,
+        max(0.0, liquidity * (sqrt_upper - sqrt_price)) / scale1
+    )
+
+
+def read_pool_states(reader, pools):
+    """{pool_id: state} in whole tokens, one JSON-RPC batch for all pools.
+
+    States are what each pool's set_state takes: reserves for V2 pairs, and
+    virtual reserves plus range caps for V3 pools.
+    """
+    calls = []
+    for pool in pools:
+        if isinstance(pool, ConcentratedPool):
+            calls.append(('eth_call', ({'to': pool.id, 'data': '0x' + SLOT0.hex()}, 'latest')))
+            calls.append(('eth_call', ({'to': pool.id, 'data': '0x' + LIQUIDITY.hex()}, 'latest')))
+        else:
+            calls.append(('eth_call', ({'to': pool.id, 'data': '0x' + GET_RESERVES.hex()}, 'latest')))
+
+    results = iter(reader.read_many(calls))
+    states = {}
+    for pool in pools:
+        if isinstance(pool, ConcentratedPool):
+            slot0, liquidity = next(results), next(results)
+            if any(isinstance(r, RPCError) or not r or r == '0x' for r in (slot0, liquidity)):
+                continue
+            sqrt_price_x96, tick = decode(['uint160', 'int24'], _hex_bytes(slot0)[:64])
+            states[pool.id] = v3_state(pool, sqrt_price_x96, tick, decode(['uint128'], _hex_bytes(liquidity))[0])
+        else:
+            result = next(results)
+            if isinstance(result, RPCError) or not result or result == '0x':
+                continue
+            reserve0, reserve1, _ = decode(['uint112', 'uint112', 'uint32'], _hex_bytes(result))
+            states[pool.id] = (
+                reserve0 / 10 ** TOKENS[pool.token0][1],
+                reserve1 / 10 ** TOKENS[pool.token1][1]
+            )
+    return states
+
+
+def simulated_pool_states(pools, prices, rng=random, liquidity_usd=5000000, mispricing=0.01, v3_range=0.01):
+    """States around USD prices ({symbol: price}) with per-pool noise, for offline use"""
+    states = {}
+    for pool in pools:
+        skew = 1 + rng.uniform(-mispricing, mispricing)
+        reserve0 = liquidity_usd / 2 / prices[pool.token0]
+        reserve1 = liquidity_usd / 2 / prices[pool.token1] * skew
+        if isinstance(pool, ConcentratedPool):
+            liquidity = math.sqrt(reserve0 * reserve1)
+            sqrt_price = math.sqrt(reserve1 / reserve0)
+            states[pool.id] = (
+                reserve0,
+                reserve1,
+                liquidity * (1 / (sqrt_price * math.sqrt(1 - v3_range)) - 1 / sqrt_price),
+                liquidity * (sqrt_price * math.sqrt(1 + v3_range) - sqrt_price)
+            )
+        else:
+            states[pool.id] = (reserve0, reserve1)
+    return states
@@ -0,0 +1,151 @@
+import os
+import time
+import threading
+
+# Probe cadence while connected (catches outages on an idle worker)
+ETH_PROBE_INTERVAL = float(os.environ.get('ETH_PROBE_INTERVAL', 30))
+# Reconnect backoff while disconnected: doubles from the minimum up to the maximum
+ETH_RECONNECT_MIN = float(os.environ.get('ETH_RECONNECT_MIN', 1))
+ETH_RECONNECT_MAX = float(os.environ.get('ETH_RECONNECT_MAX', 30))
+# Consecutive failed RPC requests (from any caller) that mark the node disconnected
+ETH_DISCONNECT_AFTER = int(os.environ.get('ETH_DISCONNECT_AFTER', 3))
+
+
+class EthConnection:
+    """Live connection state for an EVM chain's RPC (any provider in the reader's pool).
+
+    Nothing touches the network at import. The state starts 'unknown' and
+    is treated as usable, so the first reads go straight to the node;
+    their outcomes (seen through the HTTP client) keep the state current
+    without extra calls. After ETH_DISCONNECT_AFTER consecutive failures it
+    flips to 'disconnected', callers skip the node, and the probe thread
+    retries with backoff until the node answers again - no restart needed.
+
+    The web3 package is only imported if something asks for a Web3 client.
+    """
+
+    def __init__(self, reader, client, probe_interval=ETH_PROBE_INTERVAL,
+                 reconnect_min=ETH_RECONNECT_MIN, reconnect_max=ETH_RECONNECT_MAX,
+                 disconnect_after=ETH_DISCONNECT_AFTER, name='Ethereum'):
+        self.name = name
+        self.reader = reader
+        self.client = client
+        self.hosts = reader.pool.hosts
+        self.probe_interval = probe_interval
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.disconnect_after = disconnect_after
+        self.state = 'unknown'
+        self.since = time.time()
+        self.chain_id = None
+        self.last_error = None
+        self._failures = 0
+        self._web3 = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {'probes': 0, 'probe_failures': 0, 'disconnects': 0, 'reconnects': 0}
+        client.on_request(self._observe)
+
+    @property
+    def connected(self):
+        """Whether callers should use the node ('unknown' counts: the first real call decides)"""
+        return self.state != 'disconnected'
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name=f'{self.name.lower()}-connection')
+                self._thread.start()
+
+    def web3(self):
+        """Web3 client over the shared HTTP client, built (and web3 imported) on first use"""
+        with self._lock:
+            if self._web3 is None:
+                self._web3 = make_web3(self.reader.pool.url, self.client)
+            return self._web3
+
+    def probe(self):
+        """One eth_chainId round trip; updates the state and returns whether it succeeded"""
+        self._counters['probes'] += 1
+        try:
+            self.chain_id = int(self.reader.call('eth_chainId'), 16)
+        except Exception as e:
+            self._counters['probe_failures'] += 1
+            self._mark(False, str(e))
+            return False
+        self._mark(True)
+        return True
+
+    def status(self):
+        return {
+            'state': self.state,
+            'since': self.since,
+            'chain_id': self.chain_id,
+            'last_error': self.last_error,
+            'web3_loaded': self._web3 is not None,
+            **self._counters
+        }
+
+    def _observe(self, host, seconds, errored):
+        # Every RPC request anyone makes doubles as a health signal; with a
+        # provider pool, one healthy provider is enough to count as connected
+        if host not in self.hosts:
+            return
+        if errored:
+            with self._lock:
+                self._failures += 1
+                failures = self._failures
+            if failures >= self.disconnect_after:
+                self._mark(False, f'{failures} consecutive failed requests')
+        else:
+            self._mark(True)
+
+    def _mark(self, connected, error=None):
+        with self._lock:
+            if connected:
+                self._failures = 0
+                if self.state != 'connected':
+                    if self.state == 'disconnected':
+                        self._counters['reconnects'] += 1
+                        print(f"🔗 {self.name} RPC reconnected after {time.time() - self.since:.0f}s")
+                    self.state = 'connected'
+                    self.since = time.time()
+                return
+            self.last_error = error
+            if self.state != 'disconnected':
+                self._counters['disconnects'] += 1
+                self.state = 'disconnected'
+                self.since = time.time()
+                print(f"⚠️  {self.name} RPC disconnected: {error}")
+                self._wake.set()
+
+    def _run(self):
+        backoff = self.reconnect_min
+        while True:
+            if self.probe():
+                backoff = self.reconnect_min
+                delay = self.probe_interval
+            else:
+                delay = backoff
+                backoff = min(self.reconnect_max, backoff * 2)
+            # A disconnect seen elsewhere cuts a healthy-state wait short
+            self._wake.wait(delay)
+            self._wake.clear()
+
+
+def make_web3(rpc_url, client):
+    """Web3 instance that sends JSON-RPC through the shared HttpClient"""
+    from web3 import Web3, HTTPProvider
+
+    class PooledHTTPProvider(HTTPProvider):
+        def __init__(self, endpoint_uri, request_kwargs=None):
+            super().__init__(endpoint_uri, request_kwargs=request_kwargs, session=client.session_for(endpoint_uri))
+
+        def make_request(self, method, params):
+            request_data = self.encode_rpc_request(method, params)
+            response = client.post(self.endpoint_uri, data=request_data, **self.get_request_kwargs())
+            response.raise_for_status()
+            return self.decode_rpc_response(response.content)
+
+    return Web3(PooledHTTPProvider(rpc_url))
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import itertools
+import threading
+
+from http_client import http_client
+from rpc_pool import RPCPool
+
+# How long a known head is trusted before the next read re-checks eth_blockNumber
+ETH_HEAD_MAX_AGE = float(os.environ.get('ETH_HEAD_MAX_AGE', 4))
+# Optional websocket endpoint for a newHeads subscription (pushes instead of polling)
+ETH_WS_URL = os.environ.get('ETH_WS_URL', '')
+ETH_WS_HEAD_MAX_AGE = 60.0
+ETH_WS_RETRY_INTERVAL = 30.0
+
+
+class RPCError(Exception):
+    """JSON-RPC error object returned by the node"""
+
+    def __init__(self, method, error):
+        self.method = method
+        self.code = error.get('code')
+        super().__init__(f"{method}: {error.get('message', error)}")
+
+
+class EthReader:
+    """Ethereum reads over JSON-RPC batches, cached per block.
+
+    Every read made while the head is unchanged is served from the cache. The
+    head is refreshed either by a newHeads subscription (ETH_WS_URL) or lazily:
+    when it is older than ETH_HEAD_MAX_AGE, eth_blockNumber rides along in the
+    next batch, so checking for a new block never costs its own round trip.
+    """
+
+    def __init__(self, rpc, client=http_client, head_max_age=ETH_HEAD_MAX_AGE, ws_url=ETH_WS_URL):
+        # A URL, or an RPCPool routing over several providers
+        self.pool = rpc if isinstance(rpc, RPCPool) else RPCPool([rpc], client)
+        self.head_max_age = head_max_age
+        self.ws_url = ws_url
+        self.head_number = None
+        self.head_seen_at = 0.0
+        self._cache = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_next_start = 0.0
+        self._head_listeners = []
+        self._counters = {'rpc_requests': 0, 'rpc_calls': 0, 'cache_hits': 0, 'new_heads': 0}
+
+    # ------------------------------------------------------------------
+    # Raw JSON-RPC
+    # ------------------------------------------------------------------
+
+    def batch(self, calls):
+        """Send [(method, params), ...] as one JSON-RPC batch; returns results in order.
+
+        Failed calls come back as RPCError instances rather than raising, so one
+        bad call does not discard the rest of the batch.
+        """
+        if not calls:
+            return []
+        requests_by_id = {}
+        payload = []
+        for method, params in calls:
+            request_id = next(self._ids)
+            requests_by_id[request_id] = method
+            payload.append({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': list(params)})
+
+        with self._lock:
+            self._counters['rpc_requests'] += 1
+            self._counters['rpc_calls'] += len(calls)
+
+        body = self.pool.send(payload if len(payload) > 1 else payload[0])
+        if isinstance(body, dict):
+            if 'id' not in body or body['id'] is None:
+                # Whole-batch failure (e.g. provider rejected the request)
+                raise RPCError('batch', body.get('error', {'message': str(body)}))
+            body = [body]
+
+        results = {}
+        for item in body:
+            if 'error' in item:
+                results[item['id']] = RPCError(requests_by_id.get(item['id'], '?'), item['error'])
+            else:
+                results[item['id']] = item.get('result')
+        return [results.get(request_id, RPCError(method, {'message': 'missing response'}))
+                for request_id, method in requests_by_id.items()]
+
+    def call(self, method, params=()):
+        """Single uncached JSON-RPC call"""
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, RPCError):
+            raise result
+        return result
+
+    # ------------------------------------------------------------------
+    # Block-scoped cached reads
+    # ------------------------------------------------------------------
+
+    def read(self, method, params=()):
+        """Cached read; identical calls within one block cost nothing"""
+        result = self.read_many([(method, params)])[0]
+        if isinstance(result, RPCError):
+            raise result
+        return result
+
+    def read_many(self, calls):
+        """Cached reads for [(method, params), ...], fetching all misses in one batch"""
+        self._ensure_watcher()
+        keys = [(method, json.dumps(list(params))) for method, params in calls]
+        results = [None] * len(calls)
+        misses = []
+        head_known = self._head_is_fresh()
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                if head_known and key in self._cache:
+                    results[index] = self._cache[key]
+                    self._counters['cache_hits'] += 1
+                else:
+                    misses.append(index)
+        if not misses:
+            return results
+
+        batch_calls = [calls[index] for index in misses]
+        if not head_known:
+            batch_calls.append(('eth_blockNumber', ()))
+        fetched = self.batch(batch_calls)
+
+        if not head_known and not isinstance(fetched[-1], RPCError):
+            self._observe_head(int(fetched[-1], 16))
+        with self._lock:
+            for index, result in zip(misses, fetched):
+                results[index] = result
+                if not isinstance(result, RPCError):
+                    self._cache[keys[index]] = result
+        return results
+
+    def head(self):
+        """Latest block number (cached until it is older than head_max_age)"""
+        if not self._head_is_fresh():
+            self._observe_head(int(self.call('eth_blockNumber'), 16))
+        return self.head_number
+
+    def gas_price(self):
+        return int(self.read('eth_gasPrice'), 16)
+
+    def get_balance(self, address, block='latest'):
+        return int(self.read('eth_getBalance', (address, block)), 16)
+
+    def on_new_head(self, listener):
+        """Register listener(block_number), called whenever the head advances"""
+        self._head_listeners.append(listener)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['cached_reads'] = len(self._cache)
+        stats['head'] = self.head_number
+        stats['head_source'] = 'newHeads' if self._watcher is not None and self._watcher.is_alive() else 'lazy_poll'
+        return stats
+
+    def _head_is_fresh(self):
+        if self.head_number is None:
+            return False
+        max_age = self.head_max_age
+        if self._watcher is not None and self._watcher.is_alive():
+            # Pushed heads arrive on their own; only distrust a silent subscription
+            max_age = ETH_WS_HEAD_MAX_AGE
+        return time.monotonic() - self.head_seen_at < max_age
+
+    def _observe_head(self, block_number):
+        with self._lock:
+            self.head_seen_at = time.monotonic()
+            if block_number == self.head_number:
+                return
+            if self.head_number is not None and block_number < self.head_number:
+                # Lagging replica or pool provider; keep the newer head
+                return
+            self.head_number = block_number
+            self._cache.clear()
+            self._counters['new_heads'] += 1
+        for listener in self._head_listeners:
+            try:
+                listener(block_number)
+            except Exception as e:
+                print(f"⚠️  New head listener error: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # newHeads subscription
+    # ------------------------------------------------------------------
+
+    def _ensure_watcher(self):
+        if not self.ws_url or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            if time.monotonic() < self._watcher_next_start:
+                return
+            self._watcher_next_start = time.monotonic() + ETH_WS_RETRY_INTERVAL
+            self._watcher = threading.Thread(target=self._watch_heads, daemon=True, name='eth-new-heads')
+            self._watcher.start()
+
+    def _watch_heads(self):
+        from websockets.sync.client import connect
+
+        try:
+            with connect(self.ws_url, open_timeout=10) as ws:
+                ws.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}))
+                json.loads(ws.recv())
+                for message in ws:
+                    header = json.loads(message).get('params', {}).get('result', {})
+                    if 'number' in header:
+                        self._observe_head(int(header['number'], 16))
+        except Exception as e:
+            print(f"⚠️  newHeads subscription dropped: {str(e)}")
+        # Falls back to lazy polling until the next read restarts the watcher
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict, defaultdict, deque
+
+from redis_client import get_redis, hold_lease
+
+# 'memory', 'redis', or unset to use Redis Streams whenever REDIS_URL is reachable
+EVENT_BUS_BACKEND = os.environ.get('EVENT_BUS_BACKEND', '')
+# Events kept per topic for replay
+EVENT_BUS_RETENTION = int(os.environ.get('EVENT_BUS_RETENTION', 10000))
+# Default per-subscriber queue bound
+EVENT_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', 1000))
+EVENT_STREAM_PREFIX = 'lootos:events:'
+FEED_LEASE_KEY = 'lootos:feed:leader'
+
+
+class BusSubscription:
+    """A consumer's bounded queue of events.
+
+    Plain subscriptions keep every event in order and, when full, drop the
+    oldest (counted in `dropped`; offsets show the gap, which replay can
+    fill). Coalescing subscriptions keep only the latest event per
+    (topic, key): a newer value replaces a queued one in place, so a slow
+    consumer sees fewer, fresher events instead of a backlog.
+    """
+
+    def __init__(self, bus, topics, maxsize=EVENT_QUEUE_SIZE, coalesce=False):
+        self.bus = bus
+        self.topics = set(topics)
+        self.maxsize = maxsize
+        self.coalesce = coalesce
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._queue = OrderedDict() if coalesce else deque()
+        self._cond = threading.Condition()
+
+    def deliver(self, event):
+        with self._cond:
+            if self.coalesce:
+                slot = (event['topic'], event['key'])
+                if slot in self._queue:
+                    self.coalesced += 1
+                elif len(self._queue) >= self.maxsize:
+                    self._queue.popitem(last=False)
+                    self.dropped += 1
+                self._queue[slot] = event
+            else:
+                if len(self._queue) >= self.maxsize:
+                    self._queue.popleft()
+                    self.dropped += 1
+                self._queue.append(event)
+            self.delivered += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within timeout"""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            if self.coalesce:
+                return self._queue.popitem(last=False)[1]
+            return self._queue.popleft()
+
+    def drain(self):
+        """Everything queued right now, oldest first"""
+        with self._cond:
+            events = list(self._queue.values()) if self.coalesce else list(self._queue)
+            self._queue.clear()
+            return events
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'topics': sorted(self.topics),
+                'coalesce': self.coalesce,
+                'queued': len(self._queue),
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced
+            }
+
+
+class EventBus:
+    """In-process publish/subscribe with a per-topic replay log.
+
+    Events are dicts {topic, key, offset, data, ts}. Offsets increase per
+    topic, so a consumer that remembers the last one it handled can
+    subscribe again with from_offset and miss nothing still retained.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, retention=EVENT_BUS_RETENTION):
+        self.retention = retention
+        self._logs = defaultdict(lambda: deque(maxlen=self.retention))
+        self._next_offset = defaultdict(int)
+        self._latest = {}
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._counters = {'published': 0, 'fanned_out': 0}
+
+    def publish(self, topic, data, key=None):
+        """Publish once; returns the event's offset"""
+        with self._lock:
+            offset = self._next_offset[topic]
+            self._next_offset[topic] = offset + 1
+            self._record_locked({'topic': topic, 'key': key, 'offset': offset, 'data': data, 'ts': time.time()})
+        return offset
+
+    def subscribe(self, topics, maxsize=EVENT_QUEUE_SIZE, coalesce=False, from_offset=None):
+        """Subscribe to topics; from_offset (int, or {topic: offset}) replays retained events first"""
+        subscription = BusSubscription(self, topics, maxsize, coalesce)
+        with self._lock:
+            # Replay and registration under one lock: no gap and no duplicate at the seam
+            if from_offset is not None:
+                for event in self._replay_locked(topics, from_offset):
+                    subscription.deliver(event)
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].discard(subscription)
+
+    def replay(self, topics, from_offset):
+        with self._lock:
+            return self._replay_locked(topics, from_offset)
+
+    def latest(self, topic, key=None):
+        """Most recent event for (topic, key), or None"""
+        with self._lock:
+            return self._latest.get((topic, key))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.backend,
+                **self._counters,
+                'topics': {
+                    topic: {'offset': self._next_offset.get(topic), 'subscribers': len(self._subscribers[topic])}
+                    for topic in sorted(set(self._logs) | set(self._subscribers))
+                }
+            }
+
+    def _record_locked(self, event):
+        self._logs[event['topic']].append(event)
+        self._latest[(event['topic'], event['key'])] = event
+        subscribers = self._subscribers.get(event['topic'], ())
+        self._counters['published'] += 1
+        self._counters['fanned_out'] += len(subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _replay_locked(self, topics, from_offset):
+        events = []
+        for topic in topics:
+            start = from_offset.get(topic) if isinstance(from_offset, dict) else from_offset
+            if start is None:
+                continue
+            events.extend(event for event in self._logs.get(topic, ()) if event['offset'] >= start)
+        return sorted(events, key=lambda event: event['ts'])
+
+
+class RedisEventBus(EventBus):
+    """The same bus over Redis Streams (one stream per topic), shared by every process.
+
+    publish() is an XADD; a reader thread XREADs every topic this process
+    uses and fans events out to local subscribers, so local and remote
+    events take the same path. Offsets are stream entry ids.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, retention=EVENT_BUS_RETENTION):
+        super().__init__(retention)
+        self.client = client
+        self._last_ids = {}  # topic -> last stream id delivered locally
+        self._reader = None
+
+    def publish(self, topic, data, key=None):
+        self._watch(topic)
+        entry_id = self.client.xadd(
+            EVENT_STREAM_PREFIX + topic,
+            {'data': json.dumps(data, default=str), 'key': key or '', 'ts': repr(time.time())},
+            maxlen=self.retention,
+            approximate=True
+        )
+        return entry_id.decode()
+
+    def subscribe(self, topics, maxsize=EVENT_QUEUE_SIZE, coalesce=False, from_offset=None):
+        subscription = BusSubscription(self, topics, maxsize, coalesce)
+        for topic in subscription.topics:
+            self._watch(topic)
+        with self._lock:
+            # The reader delivers everything after _last_ids; replay up to and including it
+            if from_offset is not None:
+                for event in self._replay_locked(topics, from_offset):
+                    subscription.deliver(event)
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def latest(self, topic, key=None):
+        self._watch(topic)
+        event = super().latest(topic, key)
+        if event is None and key is None:
+            entries = self.client.xrevrange(EVENT_STREAM_PREFIX + topic, count=1)
+            event = self._decode(topic, *entries[0]) if entries else None
+        return event
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            for topic, last_id in self._last_ids.items():
+                stats['topics'].setdefault(topic, {'subscribers': 0})['offset'] = last_id
+        return stats
+
+    def _replay_locked(self, topics, from_offset):
+        events = []
+        for topic in topics:
+            start = from_offset.get(topic) if isinstance(from_offset, dict) else from_offset
+            if start is None or topic not in self._last_ids:
+                continue
+            entries = self.client.xrange(EVENT_STREAM_PREFIX + topic, min=start, max=self._last_ids[topic])
+            events.extend(self._decode(topic, entry_id, fields) for entry_id, fields in entries)
+        return sorted(events, key=lambda event: event['ts'])
+
+    def _watch(self, topic):
+        """Start following a topic from its current end"""
+        if topic in self._last_ids:
+            return
+        with self._lock:
+            if topic not in self._last_ids:
+                entries = self.client.xrevrange(EVENT_STREAM_PREFIX + topic, count=1)
+                self._last_ids[topic] = entries[0][0].decode() if entries else '0-0'
+            if self._reader is None or not self._reader.is_alive():
+                self._reader = threading.Thread(target=self._read_loop, daemon=True, name='event-bus-reader')
+                self._reader.start()
+
+    def _read_loop(self):
+        while True:
+            with self._lock:
+                streams = {EVENT_STREAM_PREFIX + topic: last_id for topic, last_id in self._last_ids.items()}
+            try:
+                response = self.client.xread(streams, block=1000, count=500)
+            except Exception as e:
+                print(f"⚠️  Event bus read error: {str(e)}")
+                time.sleep(1)
+                continue
+            with self._lock:
+                for stream, entries in response or ():
+                    topic = stream.decode()[len(EVENT_STREAM_PREFIX):]
+                    for entry_id, fields in entries:
+                        self._last_ids[topic] = entry_id.decode()
+                        self._record_locked(self._decode(topic, entry_id, fields))
+
+    @staticmethod
+    def _decode(topic, entry_id, fields):
+        return {
+            'topic': topic,
+            'key': fields[b'key'].decode() or None,
+            'offset': entry_id.decode(),
+            'data': json.loads(fields[b'data']),
+            'ts': float(fields[b'ts'])
+        }
+
+
+def create_event_bus():
+    """Pick the bus backend from EVENT_BUS_BACKEND / REDIS_URL"""
+    if EVENT_BUS_BACKEND != 'memory':
+        client = get_redis()
+        if client is not None:
+            return RedisEventBus(client)
+        if EVENT_BUS_BACKEND == 'redis':
+            raise RuntimeError('EVENT_BUS_BACKEND=redis but Redis is not reachable (check REDIS_URL)')
+    return EventBus()
+
+
+class MarketFeed:
+    """Polls each market-data source once per interval and publishes the result.
+
+    Consumers read bus.latest() (or subscribe) instead of fetching for
+    themselves, so one reading serves every consumer. With a shared Redis
+    bus, a lease keeps a single process polling.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.sources = {}
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._lease_token = uuid.uuid4().hex
+
+    def add_source(self, topic, producer, interval):
+        self.sources[topic] = (producer, interval)
+
+    def ensure_started(self):
+        with self._lock:
+            for topic in self.sources:
+                thread = self._threads.get(topic)
+                if thread is None or not thread.is_alive():
+                    thread = threading.Thread(target=self._poll, args=(topic,), daemon=True, name=f'feed-{topic}')
+                    self._threads[topic] = thread
+                    thread.start()
+
+    def current(self, topic, max_age=None):
+        """Latest published data for topic if newer than max_age (default two intervals), else None"""
+        event = self.bus.latest(topic)
+        if event is None:
+            return None
+        if max_age is None:
+            max_age = self.sources[topic][1] * 2 if topic in self.sources else 0
+        return event['data'] if time.time() - event['ts'] <= max_age else None
+
+    def _poll(self, topic):
+        producer, interval = self.sources[topic]
+        while True:
+            started = time.monotonic()
+            if self.bus.backend == 'memory' or hold_lease(FEED_LEASE_KEY + ':' + topic, self._lease_token, max(interval * 3, 15)):
+                try:
+                    self.bus.publish(topic, producer())
+                except Exception as e:
+                    print(f"⚠️  Market feed {topic} error: {str(e)}")
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
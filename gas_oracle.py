@@ -0,0 +1,156 @@
+import os
+import bisect
+import threading
+from collections import deque
+
+# Blocks kept in the rolling window
+GAS_ORACLE_BLOCKS = int(os.environ.get('GAS_ORACLE_BLOCKS', 20))
+# Priority-fee percentile (of each block's transactions, gas-weighted) behind each tier
+GAS_TIERS = (('safe', 10), ('standard', 50), ('fast', 75), ('instant', 90))
+
+GWEI = 10 ** 9
+# EIP-1559: base fee moves at most 1/8 per block towards a 50% full target
+BASE_FEE_MAX_CHANGE_DENOMINATOR = 8
+ELASTICITY_MULTIPLIER = 2
+
+
+def predict_base_fee(base_fee, gas_used_ratio):
+    """Next block's base fee (wei) from this block's base fee and gas used / gas limit"""
+    target = 1 / ELASTICITY_MULTIPLIER
+    delta = base_fee * (gas_used_ratio - target) / target / BASE_FEE_MAX_CHANGE_DENOMINATOR
+    if gas_used_ratio > target:
+        return base_fee + max(1, int(delta))
+    return max(0, base_fee + int(delta))
+
+
+class SortedWindow:
+    """A multiset kept sorted: O(log n) search on add/remove, O(1) order statistics"""
+
+    def __init__(self):
+        self._sorted = []
+
+    def add(self, value):
+        bisect.insort(self._sorted, value)
+
+    def remove(self, value):
+        del self._sorted[bisect.bisect_left(self._sorted, value)]
+
+    def percentile(self, pct):
+        if not self._sorted:
+            return None
+        return self._sorted[min(len(self._sorted) - 1, len(self._sorted) * pct // 100)]
+
+
+class GasOracle:
+    """Fee estimates from a rolling window of recent blocks (eth_feeHistory).
+
+    Each refresh asks only for blocks added since the last one. A block's
+    base fee and its per-tier priority-fee percentiles enter sorted windows
+    as it arrives and leave as it ages out, so the estimates are order
+    statistics over the window without re-sorting it. Tier prices are the
+    predicted next base fee plus the window median of that tier's priority
+    fee; the result is one precomputed snapshot every consumer reads.
+    """
+
+    def __init__(self, reader, blocks=GAS_ORACLE_BLOCKS, tiers=GAS_TIERS, chain='ethereum'):
+        self.reader = reader
+        self.chain = chain
+        self.size = blocks
+        self.tiers = tiers
+        self.last_block = None
+        self.snapshot = None
+        self._blocks = deque()
+        self._next_base_fee = None
+        self._base_fees = SortedWindow()
+        self._ratio_sum = 0.0
+        self._priority = {tier: SortedWindow() for tier, _ in tiers}
+        self._lock = threading.Lock()
+        self._counters = {'refreshes': 0, 'blocks_fetched': 0, 'rpc_calls': 0}
+
+    def refresh(self):
+        """Fold in blocks since the last refresh and return the snapshot (RPC errors propagate)"""
+        with self._lock:
+            head = self.reader.head()
+            if head == self.last_block and self.snapshot is not None:
+                return self.snapshot
+            count = self.size if self.last_block is None else min(self.size, head - self.last_block)
+            if count > 0:
+                history = self.reader.read(
+                    'eth_feeHistory', (hex(count), hex(head), [pct for _, pct in self.tiers])
+                )
+                self._counters['rpc_calls'] += 1
+                self._apply_history(history)
+            self.last_block = max(head, self.last_block or head)
+            self._counters['refreshes'] += 1
+            self.snapshot = self._build_snapshot()
+            return self.snapshot
+
+    def stats(self):
+        return {
+            **self._counters,
+            'blocks': len(self._blocks),
+            'last_block': self.last_block
+        }
+
+    def _apply_history(self, history):
+        oldest = int(history['oldestBlock'], 16)
+        base_fees = [int(value, 16) for value in history['baseFeePerGas']]
+        ratios = history['gasUsedRatio']
+        rewards = history.get('reward') or [[] for _ in ratios]
+
+        for offset, (base_fee, ratio, reward) in enumerate(zip(base_fees, ratios, rewards)):
+            number = oldest + offset
+            if self._blocks and number <= self._blocks[-1]['number']:
+                continue
+            priority = {tier: int(value, 16) for (tier, _), value in zip(self.tiers, reward)}
+            self._add_block({'number': number, 'base_fee': base_fee, 'gas_used_ratio': ratio, 'priority': priority})
+            self._counters['blocks_fetched'] += 1
+
+        # baseFeePerGas has one extra entry: the base fee of the block after the newest
+        if len(base_fees) > len(ratios):
+            self._next_base_fee = base_fees[-1]
+        elif self._blocks:
+            newest = self._blocks[-1]
+            self._next_base_fee = predict_base_fee(newest['base_fee'], newest['gas_used_ratio'])
+
+    def _add_block(self, block):
+        self._blocks.append(block)
+        self._base_fees.add(block['base_fee'])
+        self._ratio_sum += block['gas_used_ratio']
+        for tier, value in block['priority'].items():
+            self._priority[tier].add(value)
+        while len(self._blocks) > self.size:
+            old = self._blocks.popleft()
+            self._base_fees.remove(old['base_fee'])
+            self._ratio_sum -= old['gas_used_ratio']
+            for tier, value in old['priority'].items():
+                self._priority[tier].remove(value)
+
+    def _build_snapshot(self):
+        if not self._blocks:
+            return None
+        newest = self._blocks[-1]
+        next_base_fee = self._next_base_fee if self._next_base_fee is not None else newest['base_fee']
+        gwei = lambda wei: round(wei / GWEI, 3)
+
+        priority = {tier: self._priority[tier].percentile(50) or 0 for tier, _ in self.tiers}
+        snapshot = {tier: gwei(next_base_fee + priority[tier]) for tier, _ in self.tiers}
+        snapshot.update({
+            'base_fee': gwei(newest['base_fee']),
+            'next_base_fee': gwei(next_base_fee),
+            'base_fee_trend': 'rising' if next_base_fee > newest['base_fee'] else
+                              'falling' if next_base_fee < newest['base_fee'] else 'flat',
+            'priority_fee': {tier: gwei(priority[tier]) for tier, _ in self.tiers},
+            # EIP-1559 maxFeePerGas that stays includable through ~6 full blocks of base-fee growth
+            'max_fee': {tier: gwei(2 * next_base_fee + priority[tier]) for tier, _ in self.tiers},
+            'base_fee_window': {
+                'min': gwei(self._base_fees.percentile(0)),
+                'median': gwei(self._base_fees.percentile(50)),
+                'max': gwei(self._base_fees.percentile(100))
+            },
+            'gas_used_ratio': round(self._ratio_sum / len(self._blocks), 4),
+            'block_number': newest['number'],
+            'blocks': len(self._blocks),
+            'source': f'{self.chain}_fee_history'
+        })
+        return snapshot
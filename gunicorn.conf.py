@@ -0,0 +1,13 @@
+import os
+
+# Import the app once in the master: workers fork with Flask, numpy and the eth libraries
+# already loaded instead of each importing them (and sharing the pages copy-on-write)
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'on') != 'off'
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pools and background services"""
+    import app
+
+    app.reset_after_fork()
+    app.start_background_services()
@@ -0,0 +1,220 @@
+import os
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept open per upstream host, per gunicorn worker
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 0.2))
+HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', 2.0))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)"""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                # Let exactly one trial request through to probe the upstream
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class HostStats:
+    """Per-host request, error and latency counters"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.last_error = None
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_rate': round(self.errors / self.requests, 4) if self.requests else 0.0,
+            'retries': self.retries,
+            'circuit_rejections': self.rejected,
+            'latency_avg_ms': round(self.latency_total_ms / self.requests, 2) if self.requests else 0.0,
+            'latency_max_ms': round(self.latency_max_ms, 2),
+            'last_error': self.last_error
+        }
+
+
+class HttpClient:
+    """Outbound HTTP client: one keep-alive session and circuit breaker per upstream host"""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, max_retries=HTTP_MAX_RETRIES,
+                 backoff_base=HTTP_BACKOFF_BASE, backoff_max=HTTP_BACKOFF_MAX):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sessions = {}
+        self._breakers = {}
+        self._stats = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def on_request(self, listener):
+        """Register listener(host, seconds, errored), called after every attempt (retries included)"""
+        self._listeners.append(listener)
+
+    def session_for(self, url):
+        """Return the pooled session for a URL's host, creating it on first use"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['Connection'] = 'keep-alive'
+                self._sessions[host] = session
+                self._breakers[host] = CircuitBreaker()
+                self._stats[host] = HostStats()
+            return session
+
+    def request(self, method, url, retries=None, use_breaker=True, **kwargs):
+        """Send a request with retry/backoff; raises CircuitOpenError while the host is down.
+
+        retries overrides max_retries for this call (0 for callers that fail over elsewhere);
+        use_breaker=False skips the circuit breaker for callers that track host health themselves.
+        """
+        max_retries = self.max_retries if retries is None else retries
+        session = self.session_for(url)
+        host = urlsplit(url).netloc
+        breaker = self._breakers[host]
+        stats = self._stats[host]
+        kwargs.setdefault('timeout', self.timeout)
+
+        if use_breaker and not breaker.allow():
+            with self._lock:
+                stats.rejected += 1
+            raise CircuitOpenError(f'Circuit open for {host}')
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            response = None
+            error = None
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                error = e
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            failed = error is not None or response.status_code in RETRYABLE_STATUS_CODES
+            errored = failed or response.status_code >= 400
+            self._record(stats, elapsed_ms, errored,
+                         str(error) if error else (f'HTTP {response.status_code}' if failed else None))
+            for listener in self._listeners:
+                listener(host, elapsed_ms / 1000, errored)
+
+            if not failed:
+                if use_breaker:
+                    breaker.record_success()
+                return response
+            if attempt >= max_retries:
+                if use_breaker:
+                    breaker.record_failure()
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            with self._lock:
+                stats.retries += 1
+            time.sleep(self._backoff(attempt, response))
+
+    def reset(self):
+        """Drop pooled connections and breaker state, e.g. in a freshly forked worker"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._breakers.clear()
+            self._stats.clear()
+        for session in sessions:
+            session.close()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                host: dict(stats.as_dict(), circuit=self._breakers[host].state)
+                for host, stats in self._stats.items()
+            }
+
+    def _backoff(self, attempt, response):
+        """Exponential backoff with full jitter, honouring a short Retry-After"""
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(float(response.headers['Retry-After']), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, stats, elapsed_ms, errored, error_message):
+        with self._lock:
+            stats.requests += 1
+            stats.latency_total_ms += elapsed_ms
+            if elapsed_ms > stats.latency_max_ms:
+                stats.latency_max_ms = elapsed_ms
+            if errored:
+                stats.errors += 1
+                stats.last_error = error_message
+
+
+# Shared by every outbound call in this process
+http_client = HttpClient()
@@ -0,0 +1,93 @@
+import os
+import json
+import uuid
+import decimal
+from datetime import date, datetime, time
+
+import numpy as np
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below
+    orjson = None
+
+# 'orjson', 'stdlib', or unset to use orjson when it is installed
+JSON_ENCODER = os.environ.get('JSON_ENCODER', '')
+
+
+def encode_default(obj):
+    """Types outside plain JSON: datetimes as ISO-8601, Decimal as a number, numpy as Python values"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class StdlibEncoder:
+    name = 'stdlib'
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=encode_default, sort_keys=True, separators=(',', ':')).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonEncoder:
+    """orjson with the same output contract as StdlibEncoder (sorted keys, compact)"""
+
+    name = 'orjson'
+    OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=encode_default, option=self.OPTIONS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def create_encoder(name=JSON_ENCODER):
+    if name == 'stdlib':
+        return StdlibEncoder()
+    if orjson is not None:
+        return OrjsonEncoder()
+    if name == 'orjson':
+        raise RuntimeError('JSON_ENCODER=orjson but orjson is not installed')
+    return StdlibEncoder()
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider that hands the encoder's bytes straight to the response.
+
+    Keys are sorted and output is compact, as with Flask's default provider,
+    so payloads (and their ETags) do not depend on which encoder is active.
+    """
+
+    mimetype = 'application/json'
+
+    def __init__(self, app, encoder=None):
+        super().__init__(app)
+        self.encoder = encoder or create_encoder()
+
+    def dumps(self, obj, **kwargs):
+        return self.encoder.dumps(obj).decode()
+
+    def dumps_bytes(self, obj):
+        return self.encoder.dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return self.encoder.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encoder.dumps(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,215 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+
+METRICS_ENABLED = os.environ.get('METRICS', 'on') != 'off'
+# Requests slower than this (ms) log their span breakdown; 0 disables the log
+TRACE_SLOW_MS = float(os.environ.get('TRACE_SLOW_MS', 0))
+
+# Seconds: sub-millisecond cache hits through upstream timeouts
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonic counter, one series per tuple of label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and three adds under a lock"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', {**base, 'le': format_value(float(bound))}, cumulative
+            yield self.name + '_sum', base, total
+            yield self.name + '_count', base, cumulative
+
+
+class Registry:
+    """Metrics rendered in the Prometheus text exposition format.
+
+    Counters and histograms are updated as events happen. Collectors cover
+    components that already keep their own counters (the caches, the
+    HTTP client): they are called at scrape time and return
+    [(name, kind, help, [(labels, value), ...]), ...].
+
+    Each process has its own registry; under gunicorn every worker is
+    scraped (or aggregated) separately.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            self._render_family(lines, metric.name, metric.kind, metric.help, metric.samples())
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"⚠️  Metrics collector error: {str(e)}")
+                continue
+            for name, kind, help, samples in families:
+                self._render_family(lines, name, kind, help, ((name, labels, value) for labels, value in samples))
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def _render_family(self, lines, name, kind, help, samples):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} {kind}')
+        for sample_name, labels, value in samples:
+            lines.append(f'{sample_name}{format_labels(labels)} {format_value(value)}')
+
+
+# Tracing -----------------------------------------------------------------
+
+class Trace:
+    """Spans of one request: (name, seconds) pairs appended as hops finish"""
+
+    __slots__ = ('started', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """{span name: (calls, total seconds)}"""
+        totals = {}
+        for name, seconds in self.spans:
+            calls, total = totals.get(name, (0, 0.0))
+            totals[name] = (calls + 1, total + seconds)
+        return totals
+
+    def server_timing(self, total=None):
+        """Server-Timing header value: one entry per span name, plus the whole request"""
+        total = self.elapsed() if total is None else total
+        parts = [
+            f'{name};dur={seconds * 1000:.1f};desc="{calls} call{"s" if calls != 1 else ""}"'
+            for name, (calls, seconds) in self.summary().items()
+        ]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_current_trace = contextvars.ContextVar('lootos_trace', default=None)
+
+
+def start_trace():
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace():
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    return trace
+
+
+def record_span(name, seconds):
+    """Attach a finished hop to the current request's trace (no-op outside a request)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append((name, seconds))
+
+
+class span:
+    """Context manager timing a block as a span of the current trace"""
+
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+# Shared by every instrumented component in this process
+metrics = Registry()
@@ -0,0 +1,188 @@
+import os
+
+from eth_abi import encode, decode
+from eth_utils import keccak, to_checksum_address
+
+from eth_reads import RPCError
+
+# Multicall3 is deployed at the same address on Ethereum, BSC and most EVM chains
+MULTICALL3_ADDRESS = os.environ.get('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+# Sub-calls packed into one aggregate3 eth_call
+MULTICALL_MAX_CALLS = int(os.environ.get('MULTICALL_MAX_CALLS', 500))
+# Addresses resolved (and streamed back) per chunk
+BULK_BALANCE_CHUNK_SIZE = int(os.environ.get('BULK_BALANCE_CHUNK_SIZE', 100))
+
+
+def selector(signature):
+    return keccak(text=signature)[:4]
+
+
+AGGREGATE3 = selector('aggregate3((address,bool,bytes)[])')
+GET_ETH_BALANCE = selector('getEthBalance(address)')
+BALANCE_OF = selector('balanceOf(address)')
+DECIMALS = selector('decimals()')
+
+
+class Web3Transport:
+    """read_many() over a Web3 instance, for providers without HTTP batching
+    (e.g. EthereumTesterProvider in tests)"""
+
+    def __init__(self, w3):
+        self.w3 = w3
+
+    def read_many(self, calls):
+        results = []
+        for method, params in calls:
+            response = self.w3.provider.make_request(method, list(params))
+            if 'error' in response:
+                results.append(RPCError(method, response['error']))
+            else:
+                result = response['result']
+                results.append(result.hex() if isinstance(result, bytes) else result)
+        return results
+
+
+def _to_int(value):
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if value not in (None, '0x') else 0
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    value = value[2:] if value.startswith('0x') else value
+    return bytes.fromhex(value)
+
+
+class BulkBalanceResolver:
+    """Resolves native and ERC-20 balances for many addresses with few RPC calls.
+
+    With Multicall3 deployed, each chunk of addresses becomes a handful of
+    aggregate3 eth_calls sent together in one JSON-RPC batch. Without it, the
+    chunk falls back to one batch of eth_getBalance/eth_call requests.
+    """
+
+    def __init__(self, transport, multicall_address=MULTICALL3_ADDRESS,
+                 chunk_size=BULK_BALANCE_CHUNK_SIZE, max_calls=MULTICALL_MAX_CALLS):
+        self.transport = transport
+        self.multicall_address = to_checksum_address(multicall_address)
+        self.chunk_size = chunk_size
+        self.max_calls = max_calls
+        self._multicall_available = None
+
+    def multicall_available(self):
+        if self._multicall_available is None:
+            code = self.transport.read_many([('eth_getCode', (self.multicall_address, 'latest'))])[0]
+            self._multicall_available = not isinstance(code, RPCError) and _to_bytes(code or '0x') != b''
+        return self._multicall_available
+
+    def resolve(self, addresses, tokens=()):
+        """Yield one list of balance dicts per chunk of addresses"""
+        addresses = [to_checksum_address(address) for address in addresses]
+        tokens = [to_checksum_address(token) for token in tokens]
+        decimals = self._token_decimals(tokens) if tokens else {}
+
+        for start in range(0, len(addresses), self.chunk_size):
+            chunk = addresses[start:start + self.chunk_size]
+            if self.multicall_available():
+                raw = self._resolve_multicall(chunk, tokens)
+            else:
+                raw = self._resolve_batch(chunk, tokens)
+            yield [self._format(address, raw[address], decimals) for address in chunk]
+
+    # ------------------------------------------------------------------
+    # Strategies
+    # ------------------------------------------------------------------
+
+    def _resolve_multicall(self, addresses, tokens):
+        calls = []
+        for address in addresses:
+            calls.append((address, None, self.multicall_address, GET_ETH_BALANCE + encode(['address'], [address])))
+            for token in tokens:
+                calls.append((address, token, token, BALANCE_OF + encode(['address'], [address])))
+
+        results = self._aggregate([(target, data) for _, _, target, data in calls])
+        raw = {address: {'native': None, 'tokens': {}} for address in addresses}
+        for (address, token, _, _), (success, data) in zip(calls, results):
+            value = decode(['uint256'], data)[0] if success and len(data) >= 32 else None
+            if token is None:
+                raw[address]['native'] = value
+            else:
+                raw[address]['tokens'][token] = value
+        return raw
+
+    def _resolve_batch(self, addresses, tokens):
+        calls = []
+        keys = []
+        for address in addresses:
+            calls.append(('eth_getBalance', (address, 'latest')))
+            keys.append((address, None))
+            for token in tokens:
+                data = '0x' + (BALANCE_OF + encode(['address'], [address])).hex()
+                calls.append(('eth_call', ({'to': token, 'data': data}, 'latest')))
+                keys.append((address, token))
+
+        raw = {address: {'native': None, 'tokens': {}} for address in addresses}
+        for (address, token), result in zip(keys, self.transport.read_many(calls)):
+            value = None if isinstance(result, RPCError) else _to_int(result)
+            if token is None:
+                raw[address]['native'] = value
+            else:
+                raw[address]['tokens'][token] = value
+        return raw
+
+    def _token_decimals(self, tokens):
+        calls = [(token, DECIMALS) for token in tokens]
+        if self.multicall_available():
+            results = self._aggregate(calls)
+        else:
+            responses = self.transport.read_many([
+                ('eth_call', ({'to': token, 'data': '0x' + DECIMALS.hex()}, 'latest')) for token in tokens
+            ])
+            results = [(not isinstance(r, RPCError), b'' if isinstance(r, RPCError) else _to_bytes(r))
+                       for r in responses]
+        return {
+            token: decode(['uint8'], data)[0] if success and len(data) >= 32 else 18
+            for token, (success, data) in zip(tokens, results)
+        }
+
+    def _aggregate(self, calls):
+        """Run (target, calldata) pairs through aggregate3, max_calls per eth_call, all in one batch"""
+        requests = []
+        for start in range(0, len(calls), self.max_calls):
+            chunk = calls[start:start + self.max_calls]
+            data = AGGREGATE3 + encode(['(address,bool,bytes)[]'], [[(target, True, calldata) for target, calldata in chunk]])
+            requests.append(('eth_call', ({'to': self.multicall_address, 'data': '0x' + data.hex()}, 'latest')))
+
+        results = []
+        for start, response in zip(range(0, len(calls), self.max_calls), self.transport.read_many(requests)):
+            size = min(self.max_calls, len(calls) - start)
+            if isinstance(response, RPCError):
+                results.extend([(False, b'')] * size)
+            else:
+                results.extend(decode(['(bool,bytes)[]'], _to_bytes(response))[0])
+        return results
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _format(address, raw, decimals):
+        native = raw['native']
+        balance = {
+            'address': address,
+            'native_balance': native / 10 ** 18 if native is not None else None,
+            'balance_wei': str(native) if native is not None else None,
+        }
+        if raw['tokens']:
+            balance['tokens'] = {
+                token: {
+                    'balance': value / 10 ** decimals.get(token, 18) if value is not None else None,
+                    'raw_balance': str(value) if value is not None else None,
+                    'decimals': decimals.get(token, 18)
+                }
+                for token, value in raw['tokens'].items()
+            }
+        return balance
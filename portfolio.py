@@ -0,0 +1,251 @@
+import time
+import threading
+
+import numpy as np
+
+# Full revaluation every this many ticks so incremental deltas cannot drift
+PORTFOLIO_RESYNC_TICKS = 1000
+
+
+def describe_asset(token_id):
+    """(symbol, name) for a CoinGecko token id"""
+    return token_id.split('-')[0].upper()[:6], token_id.replace('-', ' ').title()
+
+
+class PortfolioEngine:
+    """Valuations for many portfolios, kept current tick by tick.
+
+    Holdings are a dense (portfolios x assets) matrix and prices a vector,
+    so each portfolio's value and its value 24h ago are holdings @ prices.
+    A price tick only touches the assets whose price moved: the value
+    change is holdings[:, moved] @ price_delta, added in place, and only
+    portfolios holding a moved asset need their payload rebuilt.
+    """
+
+    def __init__(self, describe=describe_asset, resync_ticks=PORTFOLIO_RESYNC_TICKS):
+        self.describe = describe
+        self.resync_ticks = resync_ticks
+        self._assets = []
+        self._asset_index = {}
+        self._portfolios = []
+        self._row = {}
+        self._holdings = np.zeros((4, 8))
+        self._price = np.zeros(8)
+        self._price_24h = np.zeros(8)
+        self._updated = np.zeros(8)  # epoch seconds of each asset's last price, 0 = never
+        self._value = np.zeros(4)
+        self._value_24h = np.zeros(4)
+        self._results = {}
+        self.version = 0  # bumped whenever any valuation changes
+        self._ticks = 0
+        self._lock = threading.Lock()
+        self._counters = {'ticks': 0, 'revalued': 0, 'payloads_built': 0}
+
+    def __contains__(self, portfolio_id):
+        return portfolio_id in self._row
+
+    # Holdings -----------------------------------------------------------
+
+    def set_holdings(self, portfolio_id, holdings):
+        """Replace a portfolio's holdings ({token_id: amount})"""
+        with self._lock:
+            row = self._row.get(portfolio_id)
+            if row is None:
+                row = self._add_row(portfolio_id)
+            columns = [self._column(token_id) for token_id in holdings]
+            self._holdings[row] = 0.0
+            self._holdings[row, columns] = [float(amount) for amount in holdings.values()]
+            self._value[row] = self._holdings[row] @ self._price
+            self._value_24h[row] = self._holdings[row] @ self._price_24h
+            self._results.pop(row, None)
+            self.version += 1
+
+    def holdings(self, portfolio_id):
+        with self._lock:
+            row = self._row.get(portfolio_id)
+            if row is None:
+                return None
+            held = np.flatnonzero(self._holdings[row, :len(self._assets)])
+            return {self._assets[j]: float(self._holdings[row, j]) for j in held}
+
+    def assets(self):
+        with self._lock:
+            return list(self._assets)
+
+    def stale_assets(self, portfolio_id, max_age):
+        """Assets the portfolio holds whose price is missing or older than max_age seconds"""
+        with self._lock:
+            row = self._row.get(portfolio_id)
+            if row is None:
+                return []
+            held = np.flatnonzero(self._holdings[row, :len(self._assets)])
+            stale = held[self._updated[held] < time.time() - max_age]
+            return [self._assets[j] for j in stale]
+
+    # Prices -------------------------------------------------------------
+
+    def apply_prices(self, prices, ts=None):
+        """Fold in {token_id: {'price', 'change_24h'}}; returns how many portfolios were revalued"""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            columns, new_price, new_price_24h = [], [], []
+            for token_id, price_data in prices.items():
+                j = self._asset_index.get(token_id)
+                if j is None:
+                    continue
+                price = float(price_data['price'])
+                columns.append(j)
+                new_price.append(price)
+                new_price_24h.append(price / (1 + float(price_data.get('change_24h') or 0) / 100))
+            if not columns:
+                return 0
+
+            columns = np.array(columns)
+            new_price = np.array(new_price)
+            new_price_24h = np.array(new_price_24h)
+            self._updated[columns] = ts
+            moved = (new_price != self._price[columns]) | (new_price_24h != self._price_24h[columns])
+            columns, new_price, new_price_24h = columns[moved], new_price[moved], new_price_24h[moved]
+            if not len(columns):
+                return 0
+
+            count = len(self._portfolios)
+            held = self._holdings[:count, columns]
+            self._ticks += 1
+            if self._ticks % self.resync_ticks == 0:
+                self._price[columns] = new_price
+                self._price_24h[columns] = new_price_24h
+                self._value[:count] = self._holdings[:count] @ self._price
+                self._value_24h[:count] = self._holdings[:count] @ self._price_24h
+            else:
+                self._value[:count] += held @ (new_price - self._price[columns])
+                self._value_24h[:count] += held @ (new_price_24h - self._price_24h[columns])
+                self._price[columns] = new_price
+                self._price_24h[columns] = new_price_24h
+
+            affected = np.flatnonzero((held != 0).any(axis=1))
+            for row in affected.tolist():
+                self._results.pop(row, None)
+            if len(affected):
+                self.version += 1
+            self._counters['ticks'] += 1
+            self._counters['revalued'] += len(affected)
+            return len(affected)
+
+    # Results ------------------------------------------------------------
+
+    def valuation(self, portfolio_id):
+        """Precomputed valuation, rebuilt only after a tick touching one of its assets"""
+        with self._lock:
+            row = self._row.get(portfolio_id)
+            if row is None:
+                return None
+            result = self._results.get(row)
+            if result is None:
+                result = self._results[row] = self._build(row)
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                'portfolios': len(self._portfolios),
+                'assets': len(self._assets),
+                'cached_payloads': len(self._results)
+            }
+
+    def _build(self, row):
+        held = np.flatnonzero(self._holdings[row, :len(self._assets)])
+        amounts = self._holdings[row, held]
+        prices = self._price[held]
+        values = amounts * prices
+        total = float(self._value[row])
+        total_24h = float(self._value_24h[row])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentages = np.nan_to_num(values / total * 100) if total else np.zeros(len(held))
+            changes = np.nan_to_num((prices / self._price_24h[held] - 1) * 100)
+
+        assets = []
+        for j, amount, price, value, percentage, change in zip(
+            held.tolist(), amounts.tolist(), prices.tolist(), values.round(2).tolist(),
+            percentages.round(1).tolist(), changes.round(2).tolist()
+        ):
+            symbol, name = self.describe(self._assets[j])
+            assets.append({
+                'token_id': self._assets[j],
+                'symbol': symbol,
+                'name': name,
+                'amount': amount,
+                'price': price,
+                'value': value,
+                'percentage': percentage,
+                'change_24h': change
+            })
+
+        daily_change = total - total_24h
+        self._counters['payloads_built'] += 1
+        return {
+            'total_value': round(total, 2),
+            'daily_change': round(daily_change, 2),
+            'daily_change_percent': round(daily_change / total_24h * 100, 2) if total_24h else 0,
+            'assets': assets
+        }
+
+    def _add_row(self, portfolio_id):
+        row = len(self._portfolios)
+        if row == self._holdings.shape[0]:
+            self._holdings = np.vstack([self._holdings, np.zeros_like(self._holdings)])
+            self._value = np.concatenate([self._value, np.zeros_like(self._value)])
+            self._value_24h = np.concatenate([self._value_24h, np.zeros_like(self._value_24h)])
+        self._portfolios.append(portfolio_id)
+        self._row[portfolio_id] = row
+        return row
+
+    def _column(self, token_id):
+        j = self._asset_index.get(token_id)
+        if j is not None:
+            return j
+        j = len(self._assets)
+        if j == self._holdings.shape[1]:
+            self._holdings = np.hstack([self._holdings, np.zeros_like(self._holdings)])
+            for name in ('_price', '_price_24h', '_updated'):
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+        self._assets.append(token_id)
+        self._asset_index[token_id] = j
+        return j
+
+
+class PortfolioFeed:
+    """Keeps a PortfolioEngine in step with the market-data bus.
+
+    Price ticks come from 'prices'; holdings changes made in any process
+    arrive on 'holdings', keyed by portfolio. Both subscriptions coalesce,
+    so a slow consumer only ever applies the newest value.
+    """
+
+    def __init__(self, bus, engine):
+        self.bus = bus
+        self.engine = engine
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='portfolio-feed')
+                self._thread.start()
+
+    def _run(self):
+        subscription = self.bus.subscribe(['prices', 'holdings'], coalesce=True)
+        while True:
+            event = subscription.get(timeout=5)
+            if event is None:
+                continue
+            try:
+                if event['topic'] == 'prices':
+                    self.engine.apply_prices(event['data'], event['ts'])
+                else:
+                    self.engine.set_holdings(event['key'], event['data'])
+            except Exception as e:
+                print(f"⚠️  Portfolio feed {event['topic']} error: {str(e)}")
@@ -0,0 +1,384 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from redis_client import get_redis, reset_redis
+
+PRICE_CACHE_TTL = float(os.environ.get('PRICE_CACHE_TTL', 30))
+PRICE_CACHE_STALE_TTL = float(os.environ.get('PRICE_CACHE_STALE_TTL', 120))
+PRICE_CACHE_FALLBACK_TTL = float(os.environ.get('PRICE_CACHE_FALLBACK_TTL', 5))
+PRICE_CACHE_SIZE = int(os.environ.get('PRICE_CACHE_SIZE', 1024))
+PRICE_CACHE_LOCK_TIMEOUT = float(os.environ.get('PRICE_CACHE_LOCK_TIMEOUT', 10))
+PRICE_BATCH_SIZE = int(os.environ.get('PRICE_BATCH_SIZE', 100))
+
+# Stablecoins barely move, so they can live in the cache much longer
+DEFAULT_TOKEN_TTLS = {
+    'usd-coin': 300.0,
+    'tether': 300.0
+}
+
+
+def parse_token_ttls(value):
+    """Parse 'token=seconds,token=seconds' into a dict"""
+    ttls = {}
+    for item in value.split(','):
+        if '=' in item:
+            token_id, seconds = item.split('=', 1)
+            ttls[token_id.strip().lower()] = float(seconds)
+    return ttls
+
+
+class _Flight:
+    """A single in-progress upstream load that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class PriceCache:
+    """Two-tier (in-process LRU + Redis) price cache with stale-while-revalidate
+    and single-flight loading.
+
+    `loader(token_id)` fetches a fresh price from upstream and raises on failure.
+    `batch_loader(token_ids)` fetches many prices in one upstream call and returns
+    a dict of the ids it found.
+    `fallback(token_id)` produces a value when upstream fails and nothing stale is left.
+    """
+
+    def __init__(self, loader, fallback, batch_loader=None, ttl=PRICE_CACHE_TTL,
+                 stale_ttl=PRICE_CACHE_STALE_TTL, fallback_ttl=PRICE_CACHE_FALLBACK_TTL,
+                 token_ttls=None, max_entries=PRICE_CACHE_SIZE, batch_size=PRICE_BATCH_SIZE,
+                 redis_prefix='lootos:price:'):
+        self.loader = loader
+        self.batch_loader = batch_loader
+        self.fallback = fallback
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.fallback_ttl = fallback_ttl
+        self.token_ttls = dict(DEFAULT_TOKEN_TTLS)
+        self.token_ttls.update(token_ttls or {})
+        self.max_entries = max_entries
+        self.batch_size = max(1, batch_size)
+        self.redis_prefix = redis_prefix
+
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'fallbacks': 0,
+            'upstream_calls': 0,
+            'upstream_errors': 0,
+            'upstream_latency_total_ms': 0.0,
+            'upstream_latency_max_ms': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, token_id):
+        """Return the price dict for a token, loading it from upstream at most once per TTL"""
+        entry = self._lookup(token_id)
+        if entry is not None:
+            age = time.time() - entry['fetched_at']
+            if age < entry['ttl']:
+                return entry['value']
+            if age < entry['ttl'] + self.stale_ttl and not entry.get('fallback'):
+                self._incr('stale_hits')
+                self._refresh_in_background(token_id, entry)
+                return entry['value']
+
+        self._incr('misses')
+        return self._load(token_id, stale=entry)
+
+    def get_many(self, token_ids):
+        """Return {token_id: price dict}, fetching all misses with one upstream call per chunk"""
+        if self.batch_loader is None:
+            return {token_id: self.get(token_id) for token_id in token_ids}
+
+        results = {}
+        missing = {}
+        revalidate = {}
+        for token_id in dict.fromkeys(token_ids):
+            entry = self._lookup(token_id)
+            if entry is not None:
+                age = time.time() - entry['fetched_at']
+                if age < entry['ttl']:
+                    results[token_id] = entry['value']
+                    continue
+                if age < entry['ttl'] + self.stale_ttl and not entry.get('fallback'):
+                    self._incr('stale_hits')
+                    results[token_id] = entry['value']
+                    revalidate[token_id] = entry
+                    continue
+            self._incr('misses')
+            missing[token_id] = entry
+
+        if revalidate:
+            thread = threading.Thread(target=self._load_many, args=(revalidate,), daemon=True)
+            thread.start()
+        if missing:
+            results.update(self._load_many(missing))
+        return {token_id: results[token_id] for token_id in dict.fromkeys(token_ids)}
+
+    def set(self, token_id, value, fetched_at=None):
+        """Store a freshly fetched price in both tiers"""
+        entry = {
+            'value': value,
+            'fetched_at': fetched_at or time.time(),
+            'ttl': self.ttl_for(token_id)
+        }
+        self._store_local(token_id, entry)
+        self._store_redis(token_id, entry)
+        return entry
+
+    def ttl_for(self, token_id):
+        return self.token_ttls.get(token_id, self.ttl)
+
+    def invalidate(self, token_id):
+        with self._lock:
+            self._entries.pop(token_id, None)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(self.redis_prefix + token_id)
+            except Exception:
+                reset_redis()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['local_hits'] + stats['redis_hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        calls = stats['upstream_calls']
+        stats['upstream_latency_avg_ms'] = round(stats['upstream_latency_total_ms'] / calls, 2) if calls else 0.0
+        stats['upstream_latency_total_ms'] = round(stats['upstream_latency_total_ms'], 2)
+        stats['upstream_latency_max_ms'] = round(stats['upstream_latency_max_ms'], 2)
+        stats['backend'] = 'redis+local' if get_redis() is not None else 'local'
+        return stats
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _lookup(self, token_id):
+        with self._lock:
+            entry = self._entries.get(token_id)
+            if entry is not None:
+                self._entries.move_to_end(token_id)
+        if entry is not None and time.time() - entry['fetched_at'] < entry['ttl']:
+            self._incr('local_hits')
+            return entry
+
+        remote = self._fetch_redis(token_id)
+        if remote is not None and (entry is None or remote['fetched_at'] > entry['fetched_at']):
+            self._store_local(token_id, remote)
+            if time.time() - remote['fetched_at'] < remote['ttl']:
+                self._incr('redis_hits')
+            return remote
+        return entry
+
+    def _store_local(self, token_id, entry):
+        with self._lock:
+            self._entries[token_id] = entry
+            self._entries.move_to_end(token_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fetch_redis(self, token_id):
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self.redis_prefix + token_id)
+        except Exception:
+            reset_redis()
+            return None
+        return json.loads(raw) if raw else None
+
+    def _store_redis(self, token_id, entry):
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            expire_ms = int((entry['ttl'] + self.stale_ttl) * 1000)
+            client.set(self.redis_prefix + token_id, json.dumps(entry), px=expire_ms)
+        except Exception:
+            reset_redis()
+
+    # ------------------------------------------------------------------
+    # Single-flight loading
+    # ------------------------------------------------------------------
+
+    def _load(self, token_id, stale=None):
+        with self._lock:
+            flight = self._flights.get(token_id)
+            leader = flight is None
+            if leader:
+                flight = self._flights[token_id] = _Flight()
+
+        if not leader:
+            self._incr('coalesced')
+            flight.done.wait(PRICE_CACHE_LOCK_TIMEOUT)
+            if flight.value is not None:
+                return flight.value
+            return self._serve_without_upstream(token_id, stale)
+
+        try:
+            flight.value = self._load_shared(token_id, stale)
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(token_id, None)
+            flight.done.set()
+
+    def _load_shared(self, token_id, stale):
+        """Coalesce across workers: only the holder of the Redis lock calls upstream"""
+        client = get_redis()
+        lock_key = self.redis_prefix + 'lock:' + token_id
+        locked = False
+        if client is not None:
+            try:
+                locked = bool(client.set(lock_key, '1', nx=True, px=int(PRICE_CACHE_LOCK_TIMEOUT * 1000)))
+                if not locked:
+                    entry = self._wait_for_peer(token_id)
+                    if entry is not None:
+                        return entry['value']
+            except Exception:
+                reset_redis()
+
+        try:
+            return self._call_upstream(token_id, stale)
+        finally:
+            if locked:
+                try:
+                    client.delete(lock_key)
+                except Exception:
+                    reset_redis()
+
+    def _load_many(self, stale_entries):
+        """Batch version of _load: lead the ids nobody is loading, wait on the rest"""
+        led = {}
+        waiting = {}
+        with self._lock:
+            for token_id in stale_entries:
+                flight = self._flights.get(token_id)
+                if flight is None:
+                    led[token_id] = self._flights[token_id] = _Flight()
+                else:
+                    waiting[token_id] = flight
+
+        results = {}
+        try:
+            if led:
+                results.update(self._call_upstream_many(list(led), stale_entries))
+                for token_id, flight in led.items():
+                    flight.value = results.get(token_id)
+        finally:
+            with self._lock:
+                for token_id in led:
+                    self._flights.pop(token_id, None)
+            for flight in led.values():
+                flight.done.set()
+
+        for token_id, flight in waiting.items():
+            self._incr('coalesced')
+            flight.done.wait(PRICE_CACHE_LOCK_TIMEOUT)
+            if flight.value is not None:
+                results[token_id] = flight.value
+            else:
+                results[token_id] = self._serve_without_upstream(token_id, stale_entries.get(token_id))
+        return results
+
+    def _call_upstream_many(self, token_ids, stale_entries):
+        results = {}
+        for start in range(0, len(token_ids), self.batch_size):
+            chunk = token_ids[start:start + self.batch_size]
+            self._incr('upstream_calls')
+            started = time.perf_counter()
+            try:
+                fetched = self.batch_loader(chunk)
+            except Exception:
+                self._incr('upstream_errors')
+                fetched = {}
+            finally:
+                self._record_latency((time.perf_counter() - started) * 1000)
+
+            for token_id in chunk:
+                if token_id in fetched:
+                    self.set(token_id, fetched[token_id])
+                    results[token_id] = fetched[token_id]
+                else:
+                    # Missing ids go through the same stale/simulated fallback as single lookups
+                    results[token_id] = self._serve_without_upstream(token_id, stale_entries.get(token_id))
+        return results
+
+    def _wait_for_peer(self, token_id):
+        deadline = time.monotonic() + PRICE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self._fetch_redis(token_id)
+            if entry is not None and time.time() - entry['fetched_at'] < entry['ttl']:
+                self._store_local(token_id, entry)
+                self._incr('coalesced')
+                return entry
+        return None
+
+    def _call_upstream(self, token_id, stale):
+        self._incr('upstream_calls')
+        started = time.perf_counter()
+        try:
+            value = self.loader(token_id)
+        except Exception:
+            self._incr('upstream_errors')
+            return self._serve_without_upstream(token_id, stale)
+        finally:
+            self._record_latency((time.perf_counter() - started) * 1000)
+        self.set(token_id, value)
+        return value
+
+    def _serve_without_upstream(self, token_id, stale):
+        """Upstream failed: prefer a stale real price over simulated data"""
+        if stale is not None and not stale.get('fallback'):
+            self._incr('stale_hits')
+            return stale['value']
+        self._incr('fallbacks')
+        value = self.fallback(token_id)
+        # Keep simulated prices local and short-lived so real data wins as soon as it is back
+        self._store_local(token_id, {
+            'value': value,
+            'fetched_at': time.time(),
+            'ttl': self.fallback_ttl,
+            'fallback': True
+        })
+        return value
+
+    def _refresh_in_background(self, token_id, stale):
+        with self._lock:
+            if token_id in self._flights:
+                return
+        thread = threading.Thread(target=self._load, args=(token_id, stale), daemon=True)
+        thread.start()
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+
+    def _incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _record_latency(self, elapsed_ms):
+        with self._lock:
+            self._counters['upstream_latency_total_ms'] += elapsed_ms
+            if elapsed_ms > self._counters['upstream_latency_max_ms']:
+                self._counters['upstream_latency_max_ms'] = elapsed_ms
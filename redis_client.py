@@ -0,0 +1,60 @@
+import os
+import time
+import threading
+
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
+# How long to wait before retrying after a failed connection attempt
+REDIS_RETRY_INTERVAL = float(os.environ.get('REDIS_RETRY_INTERVAL', 30))
+
+_client = None
+_next_attempt = 0.0
+_lock = threading.Lock()
+
+
+def get_redis():
+    """Return a shared Redis client, or None when Redis is not configured or unreachable"""
+    global _client, _next_attempt
+
+    if not REDIS_URL:
+        return None
+    if _client is not None:
+        return _client
+
+    with _lock:
+        if _client is not None or time.monotonic() < _next_attempt:
+            return _client
+        try:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+            client.ping()
+            _client = client
+        except Exception as e:
+            print(f"⚠️  Redis connection failed: {str(e)}")
+            _next_attempt = time.monotonic() + REDIS_RETRY_INTERVAL
+    return _client
+
+
+def reset_redis():
+    """Drop the shared client so the next call reconnects (e.g. after a Redis error)"""
+    global _client, _next_attempt
+    with _lock:
+        _client = None
+        _next_attempt = time.monotonic() + REDIS_RETRY_INTERVAL
+
+
+def hold_lease(key, token, ttl):
+    """Acquire or renew a lease so only one process does some job; always True without Redis"""
+    client = get_redis()
+    if client is None:
+        return True
+    try:
+        if client.set(key, token, nx=True, ex=int(ttl)):
+            return True
+        if (client.get(key) or b'').decode() == token:
+            client.expire(key, int(ttl))
+            return True
+        return False
+    except Exception as e:
+        print(f"⚠️  Lease {key} error: {str(e)}")
+        return False
@@ -0,0 +1,127 @@
+import os
+import time
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from compression import compress_response, negotiate_encoding
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE', 'on') != 'off'
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(header, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 asks for GET)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(candidate.strip().removeprefix('W/') == etag for candidate in header.split(','))
+
+
+class ResponseCache:
+    """Serialized GET responses keyed by route, query args and data versions.
+
+    A route declares which data it depends on; each name maps to a version
+    source (a bus offset, an engine's change counter). The current versions
+    are part of the cache key, so a bump makes every dependent entry
+    unreachable at once and the next request rebuilds it. `ttl` is only a
+    backstop for data whose changes are not versioned.
+
+    Every cached response carries a strong ETag of its bytes; a matching
+    If-None-Match is answered with an empty 304.
+    """
+
+    def __init__(self, size=RESPONSE_CACHE_SIZE, enabled=RESPONSE_CACHE_ENABLED):
+        self.size = size
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'bypassed': 0}
+
+    def register_version(self, name, source):
+        """Version for `name` comes from calling source(); any change invalidates dependents"""
+        self._sources[name] = source
+
+    def version(self, name):
+        return self._sources[name]()
+
+    def cached(self, depends=(), ttl=None, cache_control='no-cache'):
+        """Decorator for GET views returning JSON.
+
+        cache_control is sent with every response: 'no-cache' makes clients
+        revalidate each time (cheap, thanks to 304s); static payloads can
+        use a max-age instead.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    with self._lock:
+                        self._stats['bypassed'] += 1
+                    return view(*args, **kwargs)
+
+                key = (
+                    request.endpoint,
+                    request.path,
+                    tuple(sorted(request.args.items(multi=True))),
+                    tuple(self.version(name) for name in depends)
+                )
+                now = time.monotonic()
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None and ttl is not None and now - entry['created'] > ttl:
+                        del self._entries[key]
+                        entry = None
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                    self._stats['hits' if entry is not None else 'misses'] += 1
+
+                if entry is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    body = response.get_data()
+                    entry = {
+                        'body': body,
+                        'etag': make_etag(body),
+                        'mimetype': response.mimetype,
+                        'variants': {},  # compressed bodies, by encoding
+                        'created': now
+                    }
+                    with self._lock:
+                        self._entries[key] = entry
+                        while len(self._entries) > self.size:
+                            self._entries.popitem(last=False)
+
+                if etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+                    with self._lock:
+                        self._stats['not_modified'] += 1
+                    response = current_app.response_class(status=304)
+                    response.vary.add('Accept-Encoding')
+                    # Same validator the 200 for this client carried (weak once compressed)
+                    compressed = negotiate_encoding(request.headers.get('Accept-Encoding')) in entry['variants']
+                    response.headers['ETag'] = 'W/' + entry['etag'] if compressed else entry['etag']
+                else:
+                    response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+                    response.headers['ETag'] = entry['etag']
+                    compress_response(response, request.headers.get('Accept-Encoding'), entry['variants'])
+                response.headers['Cache-Control'] = cache_control
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'entries': len(self._entries)
+            }
@@ -0,0 +1,276 @@
+import os
+import time
+import threading
+import contextvars
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from http_client import http_client
+
+# Comma-separated endpoints; when unset the pool has just ETHEREUM_RPC_URL
+ETHEREUM_RPC_URLS = os.environ.get('ETHEREUM_RPC_URLS', '')
+RPC_EWMA_ALPHA = float(os.environ.get('RPC_EWMA_ALPHA', 0.2))
+# A provider's latency estimate halves for every this many seconds it goes unused, so one
+# slow spike does not keep it out of rotation once traffic has moved elsewhere
+RPC_LATENCY_HALF_LIFE = float(os.environ.get('RPC_LATENCY_HALF_LIFE', 0.5))
+# A read the best provider has not answered in this many seconds is also sent to the next best; 0 disables
+RPC_HEDGE_AFTER = float(os.environ.get('RPC_HEDGE_AFTER', 0.25))
+RPC_HEDGE_THREADS = int(os.environ.get('RPC_HEDGE_THREADS', 16))
+# Providers whose error-rate EWMA reaches this are ejected for a while (doubling on each repeat)
+RPC_EJECT_ERROR_RATE = float(os.environ.get('RPC_EJECT_ERROR_RATE', 0.5))
+RPC_EJECT_MIN_SAMPLES = int(os.environ.get('RPC_EJECT_MIN_SAMPLES', 5))
+RPC_EJECT_SECONDS = float(os.environ.get('RPC_EJECT_SECONDS', 15))
+RPC_EJECT_MAX_SECONDS = float(os.environ.get('RPC_EJECT_MAX_SECONDS', 300))
+# A provider that always errors ranks as if it were this many times slower
+RPC_ERROR_PENALTY = 10
+# Each request already outstanding on a provider adds this share to its expected latency
+RPC_IN_FLIGHT_PENALTY = 0.5
+
+# Never duplicated: sending these twice has side effects
+UNHEDGEABLE_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+
+
+def rpc_urls(primary_url, urls=ETHEREUM_RPC_URLS):
+    """Endpoint list from ETHEREUM_RPC_URLS, else just the primary URL"""
+    return [url.strip() for url in urls.split(',') if url.strip()] or [primary_url]
+
+
+class BatchFailure(Exception):
+    """Provider answered with a whole-batch JSON-RPC error (rate limit, overload)"""
+
+    def __init__(self, body):
+        self.body = body
+        super().__init__(str(body.get('error', body)))
+
+
+class RPCProvider:
+    """One endpoint's EWMA latency and error rate, and its ejection state"""
+
+    def __init__(self, url, alpha=RPC_EWMA_ALPHA):
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.alpha = alpha
+        self.latency = None  # EWMA seconds of successful requests; None until measured
+        self.measured_at = 0.0
+        self.error_rate = 0.0
+        self.samples = 0
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.probation = False
+        self.counters = {'requests': 0, 'errors': 0, 'hedges_sent': 0, 'hedges_won': 0, 'ejections': 0}
+
+    def expected_latency(self, now):
+        """Latency EWMA, decayed by how long ago it was last measured"""
+        if self.latency is None:
+            return 0.0
+        return self.latency * 0.5 ** ((now - self.measured_at) / RPC_LATENCY_HALF_LIFE)
+
+    def score(self, now):
+        """Expected cost of sending it one more request (lower is better).
+
+        Unmeasured providers score 0 so each gets tried; outstanding requests
+        count slightly against it, so equally fast providers share the load.
+        """
+        latency = self.expected_latency(now)
+        return latency * (1 + RPC_ERROR_PENALTY * self.error_rate) * (1 + RPC_IN_FLIGHT_PENALTY * self.in_flight)
+
+    def available(self, now):
+        return self.ejected_until <= now
+
+    def as_dict(self, now):
+        return {
+            'url': self.host,
+            'latency_ms': round(self.latency * 1000, 2) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 4),
+            'in_flight': self.in_flight,
+            'ejected': not self.available(now),
+            'ejected_for': round(max(0.0, self.ejected_until - now), 1),
+            'probation': self.probation,
+            **self.counters
+        }
+
+
+class RPCPool:
+    """JSON-RPC over several providers, routed by latency and health.
+
+    Each request goes to the provider with the lowest score (EWMA latency,
+    decaying while unused and inflated by its error rate and in-flight
+    requests) and fails over down the ranking, so one bad endpoint costs
+    a retry rather than simulated data. A read the chosen provider has not
+    answered within hedge_after is duplicated to the next best; the first answer wins and the slower
+    one still updates its provider's EWMA.
+
+    A provider whose error-rate EWMA reaches eject_error_rate is left out
+    for eject_seconds (doubling on each repeat, up to eject_max_seconds).
+    It then comes back on probation: one success readmits it fully, one
+    failure ejects it again.
+    """
+
+    def __init__(self, urls, client=http_client, hedge_after=RPC_HEDGE_AFTER, hedge_threads=RPC_HEDGE_THREADS,
+                 eject_error_rate=RPC_EJECT_ERROR_RATE, eject_min_samples=RPC_EJECT_MIN_SAMPLES,
+                 eject_seconds=RPC_EJECT_SECONDS, eject_max_seconds=RPC_EJECT_MAX_SECONDS):
+        self.providers = [RPCProvider(url) for url in urls]
+        self.client = client
+        self.hedge_after = hedge_after
+        self.eject_error_rate = eject_error_rate
+        self.eject_min_samples = eject_min_samples
+        self.eject_seconds = eject_seconds
+        self.eject_max_seconds = eject_max_seconds
+        self._executor = ThreadPoolExecutor(max_workers=hedge_threads, thread_name_prefix='rpc-hedge')
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'failovers': 0, 'hedges': 0, 'hedges_won': 0, 'exhausted': 0}
+
+    @property
+    def hosts(self):
+        return {provider.host for provider in self.providers}
+
+    @property
+    def url(self):
+        """Endpoint for clients that need a single URL (e.g. a Web3 instance)"""
+        return self.ranked()[0].url
+
+    def ranked(self):
+        """Providers in the order a request would try them"""
+        now = time.time()
+        with self._lock:
+            available = [provider for provider in self.providers if provider.available(now)]
+            if not available:
+                # Everything is ejected: the one due back soonest beats failing outright
+                return sorted(self.providers, key=lambda provider: provider.ejected_until)
+            return sorted(available, key=lambda provider: provider.score(now))
+
+    def send(self, payload):
+        """POST a JSON-RPC request or batch; returns the decoded response body.
+
+        Raises the last provider's error when every provider failed; a
+        whole-batch JSON-RPC error from the last one is returned as-is.
+        """
+        with self._lock:
+            self._counters['requests'] += 1
+        ranked = self.ranked()
+        calls = payload if isinstance(payload, list) else [payload]
+        hedgeable = not any(call.get('method') in UNHEDGEABLE_METHODS for call in calls)
+        if len(ranked) == 1 or self.hedge_after <= 0 or not hedgeable:
+            return self._send_in_order(ranked, payload)
+        return self._send_hedged(ranked, payload)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                **self._counters,
+                'hedge_after_ms': round(self.hedge_after * 1000),
+                'providers': [provider.as_dict(now) for provider in self.providers]
+            }
+
+    def _send_in_order(self, ranked, payload):
+        error = None
+        for index, provider in enumerate(ranked):
+            if index:
+                self._count('failovers')
+            try:
+                return self._attempt(provider, payload)
+            except Exception as e:
+                error = e
+        return self._exhausted(error)
+
+    def _send_hedged(self, ranked, payload):
+        waiting = list(ranked[1:])
+        futures = {self._submit(ranked[0], payload): ranked[0]}
+        hedge = None
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done:
+            hedge = waiting.pop(0)
+            self._count('hedges')
+            hedge.counters['hedges_sent'] += 1
+            futures[self._submit(hedge, payload)] = hedge
+
+        error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = futures.pop(future)
+                try:
+                    body = future.result()
+                except Exception as e:
+                    error = e
+                    if waiting:
+                        self._count('failovers')
+                        next_provider = waiting.pop(0)
+                        futures[self._submit(next_provider, payload)] = next_provider
+                    continue
+                if provider is hedge:
+                    self._count('hedges_won')
+                    provider.counters['hedges_won'] += 1
+                return body
+        return self._exhausted(error)
+
+    def _submit(self, provider, payload):
+        # Hedge threads run in the caller's context so their time shows up in its trace
+        return self._executor.submit(contextvars.copy_context().run, self._attempt, provider, payload)
+
+    def _attempt(self, provider, payload):
+        with self._lock:
+            provider.in_flight += 1
+            provider.counters['requests'] += 1
+        started = time.perf_counter()
+        try:
+            # With somewhere to fail over to, that beats retrying the same provider, and
+            # ejection takes the place of the client's per-host circuit breaker
+            pooled = len(self.providers) > 1
+            response = self.client.post(provider.url, json=payload, retries=0 if pooled else None, use_breaker=not pooled)
+            response.raise_for_status()
+            body = response.json()
+            if isinstance(body, dict) and body.get('id') is None and 'error' in body:
+                raise BatchFailure(body)
+        except Exception:
+            self._record(provider, None)
+            raise
+        finally:
+            with self._lock:
+                provider.in_flight -= 1
+        self._record(provider, time.perf_counter() - started)
+        return body
+
+    def _record(self, provider, seconds):
+        """Fold one outcome into the provider's EWMAs; seconds is None for a failure"""
+        failed = seconds is None
+        now = time.time()
+        with self._lock:
+            alpha = provider.alpha
+            provider.samples += 1
+            provider.error_rate += alpha * ((1.0 if failed else 0.0) - provider.error_rate)
+            if not failed:
+                latency = seconds if provider.latency is None else provider.expected_latency(now)
+                provider.latency = latency + alpha * (seconds - latency)
+                provider.measured_at = now
+                if provider.probation:
+                    provider.probation = False
+                    provider.ejections = 0
+                return
+            provider.counters['errors'] += 1
+            if not provider.available(now):
+                return
+            if len(self.providers) > 1 and (provider.probation or (
+                provider.samples >= self.eject_min_samples and provider.error_rate >= self.eject_error_rate
+            )):
+                duration = min(self.eject_max_seconds, self.eject_seconds * 2 ** provider.ejections)
+                provider.ejected_until = now + duration
+                provider.ejections += 1
+                provider.counters['ejections'] += 1
+                # Comes back on probation, with a clean slate apart from that
+                provider.probation = True
+                provider.error_rate = 0.0
+                provider.samples = 0
+                print(f"⚠️  RPC provider {provider.host} ejected for {duration:.0f}s")
+
+    def _exhausted(self, error):
+        self._count('exhausted')
+        if isinstance(error, BatchFailure):
+            return error.body
+        raise error
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
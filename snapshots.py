@@ -0,0 +1,85 @@
+import os
+import json
+import time
+
+from redis_client import get_redis, reset_redis
+
+SNAPSHOT_PREFIX = 'lootos:snapshot:'
+TRACKED_TOKENS_KEY = 'lootos:tracked_tokens'
+
+# Snapshots older than this are ignored and the endpoints fetch live data instead
+SNAPSHOT_MAX_AGE = float(os.environ.get('SNAPSHOT_MAX_AGE', 60))
+MAX_TRACKED_TOKENS = int(os.environ.get('MAX_TRACKED_TOKENS', 500))
+
+
+def write_snapshot(name, data):
+    """Store a new version of a market-data snapshot and return its version number"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        version = client.incr(SNAPSHOT_PREFIX + name + ':version')
+        snapshot = {
+            'version': version,
+            'updated_at': time.time(),
+            'data': data
+        }
+        client.set(SNAPSHOT_PREFIX + name, json.dumps(snapshot))
+        return version
+    except Exception as e:
+        print(f"⚠️  Snapshot write failed ({name}): {str(e)}")
+        reset_redis()
+        return None
+
+
+def read_snapshot(name, max_age=SNAPSHOT_MAX_AGE):
+    """Return the latest snapshot dict, or None if it is missing or older than max_age"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(SNAPSHOT_PREFIX + name)
+    except Exception:
+        reset_redis()
+        return None
+    if not raw:
+        return None
+    snapshot = json.loads(raw)
+    if max_age is not None and time.time() - snapshot['updated_at'] > max_age:
+        return None
+    return snapshot
+
+
+def snapshot_status(names):
+    """Version and age of each snapshot, for health reporting"""
+    status = {}
+    for name in names:
+        snapshot = read_snapshot(name, max_age=None)
+        status[name] = {
+            'version': snapshot['version'],
+            'age_seconds': round(time.time() - snapshot['updated_at'], 1)
+        } if snapshot else None
+    return status
+
+
+def track_tokens(token_ids):
+    """Ask the ingestion worker to start refreshing tokens that are not in the snapshot yet"""
+    client = get_redis()
+    if client is None or not token_ids:
+        return
+    try:
+        if client.scard(TRACKED_TOKENS_KEY) < MAX_TRACKED_TOKENS:
+            client.sadd(TRACKED_TOKENS_KEY, *token_ids)
+    except Exception:
+        reset_redis()
+
+
+def tracked_tokens():
+    client = get_redis()
+    if client is None:
+        return []
+    try:
+        return sorted(token.decode() for token in client.smembers(TRACKED_TOKENS_KEY))
+    except Exception:
+        reset_redis()
+        return []
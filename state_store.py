@@ -0,0 +1,446 @@
+import os
+import json
+import bisect
+import threading
+from datetime import datetime
+from collections import OrderedDict, defaultdict
+
+import redis
+
+from redis_client import get_redis
+
+# 'memory', 'redis', or unset to use Redis whenever REDIS_URL is reachable
+STATE_BACKEND = os.environ.get('STATE_BACKEND', '')
+STATE_PREFIX = 'lootos:state:'
+
+# Trade fields with a secondary index for filtered history queries
+TRADE_INDEX_FIELDS = ('type', 'token_pair', 'status')
+
+
+def to_epoch_ms(value):
+    """ISO-8601 string, datetime or epoch seconds -> epoch milliseconds"""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (int, float)):
+        return int(value * 1000)
+    try:
+        return int(float(value) * 1000)
+    except ValueError:
+        return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def trade_key(trade):
+    """Sortable ledger key: zero-padded time, then id to break ties"""
+    return f"{to_epoch_ms(trade['timestamp']):015d}:{trade['id']}"
+
+
+def lower_bound_key(since):
+    return f'{to_epoch_ms(since):015d}:'
+
+
+def upper_bound_key(until):
+    # ';' sorts right after ':' so every trade in the final millisecond is included
+    return f'{to_epoch_ms(until):015d};'
+
+
+def trade_contribution(trade):
+    """What one trade adds to the running aggregates"""
+    profit = float(trade.get('profit', 0))
+    contribution = {
+        'count': 1,
+        f"status:{trade.get('status')}": 1,
+        f"type:{trade.get('type')}": 1,
+        'volume': float(trade.get('amount', 0)),
+        'pnl': profit,
+        f"pnl:type:{trade.get('type')}": profit
+    }
+    if profit > 0:
+        contribution['wins'] = 1
+    elif profit < 0:
+        contribution['losses'] = 1
+    return contribution
+
+
+def format_aggregates(counters):
+    """Flat counter map -> the trade stats payload"""
+    count = int(counters.get('count', 0))
+    wins = int(counters.get('wins', 0))
+    losses = int(counters.get('losses', 0))
+    by_prefix = lambda prefix: {
+        key[len(prefix):]: counters[key] for key in counters if key.startswith(prefix)
+    }
+    return {
+        'total_trades': count,
+        'wins': wins,
+        'losses': losses,
+        'win_rate': round(wins / count * 100, 2) if count else None,
+        'pnl_total': round(float(counters.get('pnl', 0)), 2),
+        'volume': round(float(counters.get('volume', 0)), 2),
+        'by_status': {k: int(v) for k, v in by_prefix('status:').items() if int(v)},
+        'by_type': {k: int(v) for k, v in by_prefix('type:').items() if int(v)},
+        'pnl_by_type': {k: round(float(v), 2) for k, v in by_prefix('pnl:type:').items()}
+    }
+
+
+class MemoryStore:
+    """Process-local state. Fine for a single worker and for development."""
+
+    backend = 'memory'
+
+    def __init__(self):
+        self._wallets = {}
+        self._holdings = {}
+        self._agents = OrderedDict()
+        self._trades = {}
+        self._trade_keys = {}
+        self._time_index = []
+        self._field_index = defaultdict(list)
+        self._aggregates = defaultdict(float)
+        self._lock = threading.Lock()
+
+    # Wallets: one hash per session, keyed by address ----------------------
+
+    def add_wallet(self, session_id, wallet):
+        with self._lock:
+            self._wallets.setdefault(session_id, {})[wallet['address'].lower()] = dict(wallet)
+
+    def remove_wallets(self, session_id, address=None):
+        """Remove one address (or every wallet) for a session; returns how many were removed"""
+        with self._lock:
+            wallets = self._wallets.get(session_id, {})
+            if address is None:
+                return len(self._wallets.pop(session_id, {}))
+            return 1 if wallets.pop(address.lower(), None) is not None else 0
+
+    def list_wallets(self, session_id):
+        with self._lock:
+            return [dict(wallet) for wallet in self._wallets.get(session_id, {}).values()]
+
+    # Portfolio holdings: {token_id: amount} per portfolio ------------------
+
+    def set_holdings(self, portfolio_id, holdings):
+        with self._lock:
+            self._holdings[portfolio_id] = dict(holdings)
+
+    def get_holdings(self, portfolio_id):
+        with self._lock:
+            holdings = self._holdings.get(portfolio_id)
+            return dict(holdings) if holdings is not None else None
+
+    def seed_holdings(self, portfolio_id, holdings):
+        """Set holdings unless the portfolio already has some"""
+        with self._lock:
+            self._holdings.setdefault(portfolio_id, dict(holdings))
+
+    # Agents: one hash per agent ------------------------------------------
+
+    def seed_agents(self, agents):
+        """Insert the default agents unless agents already exist"""
+        with self._lock:
+            if self._agents:
+                return
+            for agent in agents:
+                self._agents[agent['id']] = dict(agent)
+
+    def list_agents(self):
+        with self._lock:
+            return [dict(agent) for agent in self._agents.values()]
+
+    def get_agent(self, agent_id):
+        with self._lock:
+            agent = self._agents.get(agent_id)
+            return dict(agent) if agent else None
+
+    def update_agent(self, agent_id, fields):
+        with self._lock:
+            if agent_id not in self._agents:
+                return False
+            self._agents[agent_id].update(fields)
+            return True
+
+    def incr_agent_field(self, agent_id, field, amount):
+        with self._lock:
+            agent = self._agents[agent_id]
+            agent[field] = agent.get(field, 0) + amount
+            return agent[field]
+
+    # Trades: time-ordered ledger with secondary indexes ---------------------
+
+    def seed_trades(self, trades):
+        """Insert sample trades unless trades already exist"""
+        with self._lock:
+            if self._trades:
+                return
+        for trade in trades:
+            self.add_trade(trade)
+
+    def add_trade(self, trade):
+        trade = dict(trade)
+        key = trade_key(trade)
+        with self._lock:
+            self._trades[trade['id']] = trade
+            self._trade_keys[trade['id']] = key
+            bisect.insort(self._time_index, key)
+            for field in TRADE_INDEX_FIELDS:
+                bisect.insort(self._field_index[(field, trade.get(field))], key)
+            self._apply_contribution(trade_contribution(trade), 1)
+        return trade
+
+    def update_trade(self, trade_id, fields):
+        """Change a trade (e.g. pending -> completed), keeping indexes and aggregates in step"""
+        with self._lock:
+            old = self._trades.get(trade_id)
+            if old is None:
+                return None
+            new = dict(old, **fields)
+            key = self._trade_keys[trade_id]
+            for field in TRADE_INDEX_FIELDS:
+                if old.get(field) != new.get(field):
+                    index = self._field_index[(field, old.get(field))]
+                    del index[bisect.bisect_left(index, key)]
+                    bisect.insort(self._field_index[(field, new.get(field))], key)
+            self._apply_contribution(trade_contribution(old), -1)
+            self._apply_contribution(trade_contribution(new), 1)
+            self._trades[trade_id] = new
+            return dict(new)
+
+    def get_trade(self, trade_id):
+        with self._lock:
+            trade = self._trades.get(trade_id)
+            return dict(trade) if trade else None
+
+    def query_trades(self, filters=None, since=None, until=None, cursor=None, limit=50):
+        """Newest-first page of trades; returns (trades, next_cursor)"""
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        upper = min(cursor or '~', upper_bound_key(until) if until is not None else '~')
+        lower = lower_bound_key(since) if since is not None else ''
+
+        with self._lock:
+            # Walk the most selective index; check the other filters per trade
+            candidates = [self._field_index.get((field, value), []) for field, value in filters.items()]
+            index = min(candidates, key=len) if candidates else self._time_index
+            position = bisect.bisect_left(index, upper) - 1
+            stop = bisect.bisect_left(index, lower)
+
+            page = []
+            while position >= stop and len(page) <= limit:
+                key = index[position]
+                trade = self._trades[key.split(':', 1)[1]]
+                if all(trade.get(field) == value for field, value in filters.items()):
+                    page.append((key, dict(trade)))
+                position -= 1
+
+        next_cursor = page[limit - 1][0] if len(page) > limit else None
+        return [trade for _, trade in page[:limit]], next_cursor
+
+    def count_trades(self):
+        with self._lock:
+            return len(self._trades)
+
+    def trade_aggregates(self):
+        with self._lock:
+            return format_aggregates(dict(self._aggregates))
+
+    def _apply_contribution(self, contribution, sign):
+        for name, value in contribution.items():
+            self._aggregates[name] += sign * value
+
+
+class RedisStore:
+    """State shared by every worker and node through Redis.
+
+    Wallets live in one hash per session, each agent in its own hash (fields
+    JSON-encoded so numbers can be incremented atomically in place), and
+    trades in a Redis Stream, which keeps them in insertion-time order.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, prefix=STATE_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return self.prefix + ':'.join(parts)
+
+    # Wallets -------------------------------------------------------------
+
+    def add_wallet(self, session_id, wallet):
+        self.client.hset(self._key('wallets', session_id), wallet['address'].lower(), json.dumps(wallet))
+
+    def remove_wallets(self, session_id, address=None):
+        key = self._key('wallets', session_id)
+        if address is None:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hlen(key)
+            pipe.delete(key)
+            return pipe.execute()[0]
+        return self.client.hdel(key, address.lower())
+
+    def list_wallets(self, session_id):
+        return [json.loads(raw) for raw in self.client.hvals(self._key('wallets', session_id))]
+
+    # Portfolio holdings ----------------------------------------------------
+
+    def set_holdings(self, portfolio_id, holdings):
+        self.client.hset(self._key('holdings'), portfolio_id, json.dumps(holdings))
+
+    def get_holdings(self, portfolio_id):
+        raw = self.client.hget(self._key('holdings'), portfolio_id)
+        return json.loads(raw) if raw else None
+
+    def seed_holdings(self, portfolio_id, holdings):
+        self.client.hsetnx(self._key('holdings'), portfolio_id, json.dumps(holdings))
+
+    # Agents --------------------------------------------------------------
+
+    def seed_agents(self, agents):
+        # SETNX-style guard so concurrent worker boots seed exactly once
+        if not self.client.set(self._key('agents', 'seeded'), '1', nx=True):
+            return
+        pipe = self.client.pipeline(transaction=True)
+        for position, agent in enumerate(agents):
+            pipe.zadd(self._key('agents'), {agent['id']: position})
+            pipe.hset(self._key('agent', agent['id']), mapping={k: json.dumps(v) for k, v in agent.items()})
+        pipe.execute()
+
+    def list_agents(self):
+        agent_ids = [agent_id.decode() for agent_id in self.client.zrange(self._key('agents'), 0, -1)]
+        pipe = self.client.pipeline(transaction=False)
+        for agent_id in agent_ids:
+            pipe.hgetall(self._key('agent', agent_id))
+        return [self._decode_hash(raw) for raw in pipe.execute() if raw]
+
+    def get_agent(self, agent_id):
+        raw = self.client.hgetall(self._key('agent', agent_id))
+        return self._decode_hash(raw) if raw else None
+
+    def update_agent(self, agent_id, fields):
+        key = self._key('agent', agent_id)
+        if not self.client.exists(key):
+            return False
+        self.client.hset(key, mapping={k: json.dumps(v) for k, v in fields.items()})
+        return True
+
+    def incr_agent_field(self, agent_id, field, amount):
+        return self.client.hincrbyfloat(self._key('agent', agent_id), field, amount)
+
+    # Trades --------------------------------------------------------------
+    #
+    # trade:<id>            JSON document
+    # trades                Redis Stream, the append-only log
+    # trades:by_time        ZSET of ledger keys (all scores 0, ordered by key)
+    # trades:idx:<f>:<v>    the same, per indexed field value
+    # trades:agg            hash of running aggregate counters
+
+    def seed_trades(self, trades):
+        if not self.client.set(self._key('trades', 'seeded'), '1', nx=True):
+            return
+        for trade in trades:
+            self.add_trade(trade)
+
+    def add_trade(self, trade):
+        key = trade_key(trade)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(self._key('trade', trade['id']), json.dumps(trade))
+        pipe.xadd(self._key('trades'), {'trade': json.dumps(trade)})
+        pipe.zadd(self._key('trades', 'by_time'), {key: 0})
+        for field in TRADE_INDEX_FIELDS:
+            pipe.zadd(self._trade_index_key(field, trade.get(field)), {key: 0})
+        self._queue_contribution(pipe, trade_contribution(trade), 1)
+        pipe.execute()
+        return trade
+
+    def update_trade(self, trade_id, fields):
+        doc_key = self._key('trade', trade_id)
+        with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Optimistic lock: retry if another worker changes this trade meanwhile
+                    pipe.watch(doc_key)
+                    raw = pipe.get(doc_key)
+                    if raw is None:
+                        return None
+                    old = json.loads(raw)
+                    new = dict(old, **fields)
+                    key = trade_key(old)
+                    pipe.multi()
+                    pipe.set(doc_key, json.dumps(new))
+                    for field in TRADE_INDEX_FIELDS:
+                        if old.get(field) != new.get(field):
+                            pipe.zrem(self._trade_index_key(field, old.get(field)), key)
+                            pipe.zadd(self._trade_index_key(field, new.get(field)), {key: 0})
+                    self._queue_contribution(pipe, trade_contribution(old), -1)
+                    self._queue_contribution(pipe, trade_contribution(new), 1)
+                    pipe.execute()
+                    return new
+                except redis.WatchError:
+                    continue
+
+    def get_trade(self, trade_id):
+        raw = self.client.get(self._key('trade', trade_id))
+        return json.loads(raw) if raw else None
+
+    def query_trades(self, filters=None, since=None, until=None, cursor=None, limit=50):
+        """Newest-first page of trades; returns (trades, next_cursor)"""
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        upper = min(cursor or '~', upper_bound_key(until) if until is not None else '~')
+        lower = '[' + lower_bound_key(since) if since is not None else '-'
+
+        index_keys = [self._trade_index_key(field, value) for field, value in filters.items()]
+        if index_keys:
+            pipe = self.client.pipeline(transaction=False)
+            for index_key in index_keys:
+                pipe.zcard(index_key)
+            index = min(zip(pipe.execute(), index_keys))[1]
+        else:
+            index = self._key('trades', 'by_time')
+
+        page = []
+        batch_size = max(limit * 2, 50)
+        while len(page) <= limit:
+            keys = [k.decode() for k in self.client.zrevrangebylex(index, '(' + upper, lower, start=0, num=batch_size)]
+            if not keys:
+                break
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(self._key('trade', key.split(':', 1)[1]))
+            for key, raw in zip(keys, pipe.execute()):
+                trade = json.loads(raw) if raw else None
+                if trade and all(trade.get(field) == value for field, value in filters.items()):
+                    page.append((key, trade))
+            if len(keys) < batch_size:
+                break
+            upper = keys[-1]
+
+        next_cursor = page[limit - 1][0] if len(page) > limit else None
+        return [trade for _, trade in page[:limit]], next_cursor
+
+    def count_trades(self):
+        return int(float(self.client.hget(self._key('trades', 'agg'), 'count') or 0))
+
+    def trade_aggregates(self):
+        raw = self.client.hgetall(self._key('trades', 'agg'))
+        return format_aggregates({key.decode(): float(value) for key, value in raw.items()})
+
+    def _trade_index_key(self, field, value):
+        return self._key('trades', 'idx', field, str(value))
+
+    def _queue_contribution(self, pipe, contribution, sign):
+        for name, value in contribution.items():
+            pipe.hincrbyfloat(self._key('trades', 'agg'), name, sign * value)
+
+    @staticmethod
+    def _decode_hash(raw):
+        return {key.decode(): json.loads(value) for key, value in raw.items()}
+
+
+def create_store():
+    """Pick the state backend from STATE_BACKEND / REDIS_URL"""
+    if STATE_BACKEND != 'memory':
+        client = get_redis()
+        if client is not None:
+            return RedisStore(client)
+        if STATE_BACKEND == 'redis':
+            raise RuntimeError('STATE_BACKEND=redis but Redis is not reachable (check REDIS_URL)')
+    return MemoryStore()
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import queue
+import copy
+import asyncio
+import threading
+
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 100))
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+
+
+def compute_delta(old, new):
+    """JSON Merge Patch (RFC 7386) turning old into new; None when nothing changed"""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None if old == new else new
+    delta = {}
+    for key, value in new.items():
+        if key not in old:
+            delta[key] = value
+        elif old[key] != value:
+            if isinstance(old[key], dict) and isinstance(value, dict):
+                delta[key] = compute_delta(old[key], value)
+            else:
+                delta[key] = value
+    for key in old:
+        if key not in new:
+            delta[key] = None
+    return delta or None
+
+
+class Subscription:
+    """A client's bounded frame queue; a client that falls behind is resynced with a snapshot"""
+
+    def __init__(self, topics, maxsize=STREAM_QUEUE_SIZE):
+        self.topics = set(topics)
+        self.maxsize = maxsize
+        self.needs_snapshot = set(self.topics)
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, frame):
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self._overflow()
+
+    def get(self, timeout=None):
+        """Next frame, or None if nothing arrived within timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _overflow(self):
+        # Deltas are only meaningful in sequence, so drop the backlog and start over
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self.needs_snapshot = set(self.topics)
+
+
+class AsyncSubscription(Subscription):
+    """Subscription consumed from an asyncio event loop (aiohttp serving mode)"""
+
+    def __init__(self, topics, loop, maxsize=STREAM_QUEUE_SIZE):
+        super().__init__(topics, maxsize)
+        self._loop = loop
+        self._async_queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, frame):
+        # Called from producer threads; hand the frame over to the loop thread
+        self._loop.call_soon_threadsafe(self._put, frame)
+
+    async def next_frame(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self._async_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _put(self, frame):
+        try:
+            self._async_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self._async_queue.empty():
+                self._async_queue.get_nowait()
+            self.needs_snapshot = set(self.topics)
+
+
+class StreamHub:
+    """Computes each topic's payload once per interval and fans the changes out to subscribers"""
+
+    def __init__(self):
+        self._producers = {}
+        self._state = {}
+        self._seq = {}
+        self._subscribers = set()
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def register(self, topic, producer, interval):
+        """producer() returns the topic's full JSON-serializable payload"""
+        self._producers[topic] = (producer, interval)
+        self._seq[topic] = 0
+
+    @property
+    def topics(self):
+        return sorted(self._producers)
+
+    def subscribe(self, topics, subscription=None):
+        subscription = subscription or Subscription(topics)
+        with self._lock:
+            self._subscribers.add(subscription)
+            for topic in subscription.topics:
+                self._ensure_producer(topic)
+            for topic in subscription.topics:
+                if topic in self._state:
+                    self._send_snapshot(subscription, topic)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, topic, payload):
+        """Diff a new payload against the last one and push the delta to every subscriber"""
+        # Producers may hand back live objects that get mutated in place later
+        payload = copy.deepcopy(payload)
+        with self._lock:
+            previous = self._state.get(topic)
+            delta = compute_delta(previous, payload) if previous is not None else payload
+            if delta is None:
+                return
+            self._state[topic] = payload
+            self._seq[topic] += 1
+            frame = {'topic': topic, 'seq': self._seq[topic], 'type': 'delta', 'data': delta}
+            for subscription in list(self._subscribers):
+                if topic not in subscription.topics:
+                    continue
+                if topic in subscription.needs_snapshot:
+                    self._send_snapshot(subscription, topic)
+                else:
+                    subscription.deliver(frame)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'topics': {
+                    topic: {
+                        'seq': self._seq[topic],
+                        'subscribers': sum(1 for s in self._subscribers if topic in s.topics),
+                        'running': topic in self._threads
+                    }
+                    for topic in self._producers
+                }
+            }
+
+    def _send_snapshot(self, subscription, topic):
+        subscription.needs_snapshot.discard(topic)
+        subscription.deliver({
+            'topic': topic,
+            'seq': self._seq[topic],
+            'type': 'snapshot',
+            'data': self._state[topic]
+        })
+
+    def _ensure_producer(self, topic):
+        if topic in self._threads:
+            return
+        thread = threading.Thread(target=self._run_producer, args=(topic,), daemon=True,
+                                  name=f'stream-{topic}')
+        self._threads[topic] = thread
+        thread.start()
+
+    def _run_producer(self, topic):
+        producer, interval = self._producers[topic]
+        while True:
+            with self._lock:
+                if not any(topic in s.topics for s in self._subscribers):
+                    # Nobody is listening: stop computing until the next subscriber arrives
+                    self._threads.pop(topic, None)
+                    return
+            try:
+                self.publish(topic, producer())
+            except Exception as e:
+                print(f"⚠️  Stream producer error ({topic}): {str(e)}")
+            time.sleep(interval)
+
+
+def format_sse(frame):
+    return f"id: {frame['seq']}\nevent: {frame['topic']}\ndata: {json.dumps(frame)}\n\n"
+
+
+def sse_events(hub, subscription):
+    """Yield SSE-encoded frames for a subscription, with heartbeats, until the client leaves"""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            frame = subscription.get(timeout=STREAM_HEARTBEAT)
+            yield format_sse(frame) if frame else ': keep-alive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
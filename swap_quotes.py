@@ -0,0 +1,338 @@
+import os
+import math
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from http_client import http_client
+from amm_quotes import RouteQuoter, gas_units
+
+ONEINCH_API_URL = os.environ.get('ONEINCH_API_URL', 'https://api.1inch.dev/swap/v6.0/1')
+# Requests/s per process: a little under the free tier's 1/s, so network jitter
+# does not land two requests in the same second on 1inch's side
+ONEINCH_RATE_LIMIT = float(os.environ.get('ONEINCH_RATE_LIMIT', 0.9))
+ONEINCH_BURST = float(os.environ.get('ONEINCH_BURST', 1))
+# A quote waits at most this long for a rate-limit slot, then goes out with on-chain routes only
+ONEINCH_MAX_WAIT = float(os.environ.get('ONEINCH_MAX_WAIT', 1.0))
+ONEINCH_TIMEOUT = float(os.environ.get('ONEINCH_TIMEOUT', 3.0))
+# Quotes are reused within one block for amounts in the same bucket (buckets are this many percent wide)
+QUOTE_CACHE_TTL = float(os.environ.get('QUOTE_CACHE_TTL', 12))
+QUOTE_AMOUNT_BUCKET_PCT = float(os.environ.get('QUOTE_AMOUNT_BUCKET_PCT', 1))
+QUOTE_CACHE_SIZE = int(os.environ.get('QUOTE_CACHE_SIZE', 2048))
+QUOTE_MAX_ROUTES = 5
+
+# 1inch fills its gas estimate only when asked; without one a single swap is assumed
+ONEINCH_DEFAULT_GAS = 150000
+
+
+class RateLimited(Exception):
+    """No rate-limit slot within the caller's wait budget"""
+
+
+class TokenBucket:
+    """Token-bucket scheduler for an upstream's request allowance.
+
+    Tokens refill at rate per second up to burst. A caller that finds the
+    bucket empty reserves the next token (the balance goes negative) and
+    sleeps until it is due, so queued callers are released at exactly the
+    allowed rate, in order. A reservation further out than the caller's
+    max_wait is refused instead. pause() empties the bucket for a while,
+    e.g. on a 429 with Retry-After.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._counters = {'granted': 0, 'waited': 0, 'rejected': 0, 'wait_total_ms': 0.0, 'pauses': 0}
+
+    def acquire(self, max_wait):
+        """Take a token, sleeping up to max_wait seconds for one; raises RateLimited otherwise"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, self._paused_until - now, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                self._counters['rejected'] += 1
+                raise RateLimited(f'next slot in {wait:.2f}s')
+            self._tokens -= 1
+            self._counters['granted'] += 1
+            if wait > 0:
+                self._counters['waited'] += 1
+                self._counters['wait_total_ms'] += wait * 1000
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._counters['pauses'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                'wait_total_ms': round(self._counters['wait_total_ms'], 1),
+                'rate': self.rate,
+                'burst': self.burst
+            }
+
+
+class OneInchClient:
+    """1inch swap API quotes (GET /quote), scheduled through a TokenBucket"""
+
+    def __init__(self, api_key, api_url=ONEINCH_API_URL, client=http_client,
+                 limiter=None, max_wait=ONEINCH_MAX_WAIT, timeout=ONEINCH_TIMEOUT):
+        self.api_key = api_key
+        self.api_url = api_url.rstrip('/')
+        self.client = client
+        self.limiter = limiter or TokenBucket(ONEINCH_RATE_LIMIT, ONEINCH_BURST)
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+    def quote(self, src, dst, amount):
+        """Output (raw units) for amount raw units of src; returns (amount_out, gas, protocols)"""
+        self.limiter.acquire(self.max_wait)
+        # Retrying would spend another slot; the caller falls back to on-chain routes instead
+        response = self.client.get(
+            f'{self.api_url}/quote',
+            params={'src': src, 'dst': dst, 'amount': str(amount), 'includeProtocols': 'true', 'includeGas': 'true'},
+            headers={'Authorization': f'Bearer {self.api_key}', 'Accept': 'application/json'},
+            timeout=self.timeout,
+            retries=0
+        )
+        if response.status_code == 429:
+            retry_after = float(response.headers.get('Retry-After') or 1 / self.limiter.rate)
+            self.limiter.pause(retry_after)
+            raise RateLimited(f'429 from 1inch, retry after {retry_after:g}s')
+        response.raise_for_status()
+        data = response.json()
+        return int(data['dstAmount']), int(data.get('gas') or ONEINCH_DEFAULT_GAS), data.get('protocols', [])
+
+
+class _Flight:
+    """A single in-progress quote that concurrent callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+def amount_bucket(amount, pct=QUOTE_AMOUNT_BUCKET_PCT):
+    """Log-scale bucket index: amounts within pct percent of each other share a bucket"""
+    return math.floor(math.log(amount) / math.log1p(pct / 100))
+
+
+def protocol_names(protocols):
+    """Distinct protocol names in a 1inch protocols tree, in route order"""
+    names = []
+    stack = [protocols]
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, dict):
+            names.append(item.get('name', '?'))
+        elif isinstance(item, list):
+            stack[:0] = item
+    return list(dict.fromkeys(names))
+
+
+class SwapQuoter:
+    """Best swap route across 1inch and the on-chain pools, with a per-block quote cache.
+
+    The 1inch request goes out on a worker thread while the on-chain routes
+    (direct pools and two-hop paths through the pool registry) are refreshed
+    and priced in one vectorised RouteQuoter pass, so a quote costs the
+    slower of the two rather than both. Routes are ranked by output net of
+    gas. Results are cached by (pair, amount bucket, block): a request for a
+    nearby amount in the same block reuses the routes and scales the output
+    by the quoted rate, and concurrent misses for one key share one
+    computation.
+    """
+
+    def __init__(self, pools, tokens, refresh_reserves, oneinch=None, ttl=QUOTE_CACHE_TTL,
+                 bucket_pct=QUOTE_AMOUNT_BUCKET_PCT, max_entries=QUOTE_CACHE_SIZE, max_routes=QUOTE_MAX_ROUTES):
+        self.pools = pools
+        self.tokens = tokens
+        self.refresh_reserves = refresh_reserves
+        self.oneinch = oneinch
+        self.ttl = ttl
+        self.bucket_pct = bucket_pct
+        self.max_entries = max_entries
+        self.max_routes = max_routes
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='oneinch')
+        self._routes = {}
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'oneinch_calls': 0, 'oneinch_errors': 0,
+                          'oneinch_rate_limited': 0, 'oneinch_best': 0}
+
+    def quote(self, src, dst, amount, block, gas_cost):
+        """Ranked routes for selling amount of src for dst at block.
+
+        gas_cost(units) converts gas units to a cost in dst tokens (arrays
+        accepted). The cached part is keyed by block, so gas prices of that
+        block are the ones applied.
+        """
+        key = (src, dst, amount_bucket(amount, self.bucket_pct), block)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return self._scaled(entry[1], amount, cached=True)
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._counters['misses'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.value is None:
+                raise RuntimeError('quote failed')
+            return self._scaled(flight.value, amount, cached=True)
+
+        try:
+            result = self._compute(src, dst, amount, block, gas_cost)
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, result)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            flight.value = result
+            return self._scaled(result, amount, cached=False)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def routes(self, src, dst):
+        """Direct and two-hop [(pool, token_in), ...] routes from src to dst (the pool graph is fixed)"""
+        pair = (src, dst)
+        if pair not in self._routes:
+            by_token = {}
+            for pool in self.pools.values():
+                by_token.setdefault(pool.token0, []).append(pool)
+                by_token.setdefault(pool.token1, []).append(pool)
+            other = lambda pool, token: pool.token1 if token == pool.token0 else pool.token0
+            routes = [[(pool, src)] for pool in by_token.get(src, []) if other(pool, src) == dst]
+            for first in by_token.get(src, []):
+                middle = other(first, src)
+                if middle == dst:
+                    continue
+                routes.extend(
+                    [(first, src), (second, middle)]
+                    for second in by_token.get(middle, []) if second is not first and other(second, middle) == dst
+                )
+            self._routes[pair] = routes
+        return self._routes[pair]
+
+    def stats(self):
+        with self._lock:
+            stats = {**self._counters, 'entries': len(self._entries)}
+        if self.oneinch is not None:
+            stats['rate_limiter'] = self.oneinch.limiter.stats()
+        return stats
+
+    def _compute(self, src, dst, amount, block, gas_cost):
+        (src_address, src_decimals, _), (dst_address, dst_decimals, _) = self.tokens[src], self.tokens[dst]
+        pending = None
+        if self.oneinch is not None:
+            # Runs in the caller's context so its time shows up in the request's trace
+            pending = self._executor.submit(
+                contextvars.copy_context().run, self.oneinch.quote,
+                src_address, dst_address, int(amount * 10 ** src_decimals)
+            )
+            self._count('oneinch_calls')
+
+        reserves_source = self.refresh_reserves()
+        candidates = self._onchain_routes(src, dst, amount, reserves_source)
+
+        oneinch = {'status': 'disabled'}
+        if pending is not None:
+            try:
+                amount_out, gas, protocols = pending.result(self.oneinch.timeout + self.oneinch.max_wait)
+                candidates.append({
+                    'source': 'oneinch',
+                    'dexes': protocol_names(protocols),
+                    'amount_out': amount_out / 10 ** dst_decimals,
+                    'gas_units': gas,
+                    'price_impact': None
+                })
+                oneinch = {'status': 'ok'}
+            except RateLimited as e:
+                self._count('oneinch_rate_limited')
+                oneinch = {'status': 'rate_limited', 'error': str(e)}
+            except Exception as e:
+                self._count('oneinch_errors')
+                print(f"⚠️  1inch quote failed: {str(e)}")
+                oneinch = {'status': 'error', 'error': str(e)}
+
+        gas_costs = gas_cost(np.array([route['gas_units'] for route in candidates], dtype=float))
+        for route, cost in zip(candidates, gas_costs):
+            route['rate'] = route['amount_out'] / amount
+            route['gas_cost'] = float(cost)
+        candidates.sort(key=lambda route: route['amount_out'] - route['gas_cost'], reverse=True)
+        if candidates and candidates[0]['source'] == 'oneinch':
+            self._count('oneinch_best')
+
+        return {
+            'pair': f'{src}/{dst}',
+            'amount_in': amount,
+            'block': block,
+            'routes': candidates[:self.max_routes],
+            'route_count': len(candidates),
+            'oneinch': oneinch,
+            'reserves': reserves_source
+        }
+
+    def _onchain_routes(self, src, dst, amount, reserves_source):
+        routes = self.routes(src, dst)
+        if not routes:
+            return []
+        quoter = RouteQuoter(routes)
+        outputs = quoter.quote([amount])[:, 0]
+        impact = quoter.price_impact([amount], outputs[:, None])[:, 0]
+        units = gas_units(quoter.legs)
+        return [
+            {
+                'source': 'onchain' if reserves_source == 'onchain' else 'onchain_simulated',
+                'dexes': [pool.dex for pool, _ in route],
+                'path': [token_in for _, token_in in route] + [dst],
+                'pools': [pool.id for pool, _ in route],
+                'amount_out': float(outputs[i]),
+                'gas_units': int(units[i]),
+                'price_impact': round(float(impact[i]), 6)
+            }
+            for i, route in enumerate(routes) if outputs[i] > 0
+        ]
+
+    def _scaled(self, result, amount, cached):
+        """Copy of a result for amount, outputs scaled by each route's quoted rate"""
+        routes = [
+            {**route, 'amount_out': route['rate'] * amount, 'net_amount_out': route['rate'] * amount - route['gas_cost']}
+            for route in result['routes']
+        ]
+        return {
+            **result,
+            'amount_in': amount,
+            'quoted_amount_in': result['amount_in'],
+            'routes': routes,
+            'best': routes[0] if routes else None,
+            'cached': cached
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
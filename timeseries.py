@@ -0,0 +1,251 @@
+import os
+import time
+import threading
+
+import numpy as np
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# (name, bucket seconds, retention seconds); every sample updates all three
+ROLLUPS = (
+    ('1m', 60, int(os.environ.get('TIMESERIES_1M_RETENTION_DAYS', 30)) * 86400),
+    ('1h', 3600, int(os.environ.get('TIMESERIES_1H_RETENTION_DAYS', 365)) * 86400),
+    ('1d', 86400, int(os.environ.get('TIMESERIES_1D_RETENTION_DAYS', 1825)) * 86400),
+)
+RESOLUTIONS = {name: seconds for name, seconds, _ in ROLLUPS}
+
+
+def parse_duration(value):
+    """'30s', '5m', '1h', '7d', '2w' (or plain seconds) -> seconds"""
+    value = str(value).strip().lower()
+    if value[-1:] in DURATION_UNITS:
+        return int(float(value[:-1]) * DURATION_UNITS[value[-1]])
+    return int(float(value))
+
+
+class Rollup:
+    """OHLC buckets of one series at one resolution, stored column-wise.
+
+    Buckets live in preallocated numpy columns in time order, so a range
+    query is two binary searches and a slice. Rows older than the retention
+    are dropped when the buffer fills, before it is grown.
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'sum')
+
+    def __init__(self, resolution, retention, capacity=256):
+        self.resolution = resolution
+        self.retention = retention
+        self.time = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.columns = {field: np.zeros(capacity) for field in self.FIELDS}
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def add(self, ts, value):
+        """Fold a sample in; returns False for a late sample whose bucket no longer exists"""
+        bucket = int(ts) // self.resolution * self.resolution
+        columns = self.columns
+        if self._end > self._start and bucket <= self.time[self._end - 1]:
+            if bucket == self.time[self._end - 1]:
+                i = self._end - 1
+                columns['close'][i] = value
+            else:
+                # Late sample: fold into its bucket without moving open/close
+                i = self._start + int(np.searchsorted(self.time[self._start:self._end], bucket))
+                if i == self._end or self.time[i] != bucket:
+                    return False
+            columns['high'][i] = max(columns['high'][i], value)
+            columns['low'][i] = min(columns['low'][i], value)
+            columns['sum'][i] += value
+            self.count[i] += 1
+            return True
+
+        if self._end == len(self.time):
+            self._make_room(bucket)
+        i = self._end
+        self.time[i] = bucket
+        self.count[i] = 1
+        for field in self.FIELDS:
+            columns[field][i] = value
+        self._end += 1
+        return True
+
+    def range(self, start=None, end=None):
+        """(lo, hi) positions of buckets starting in [start, end]"""
+        times = self.time[self._start:self._end]
+        lo = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, 'right'))
+        return self._start + lo, self._start + max(lo, hi)
+
+    def candles(self, start=None, end=None, limit=None):
+        """Columns for buckets in [start, end], the most recent `limit` of them"""
+        lo, hi = self.range(start, end)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        count = self.count[lo:hi]
+        return {
+            'time': self.time[lo:hi].copy(),
+            'open': self.columns['open'][lo:hi].copy(),
+            'high': self.columns['high'][lo:hi].copy(),
+            'low': self.columns['low'][lo:hi].copy(),
+            'close': self.columns['close'][lo:hi].copy(),
+            'mean': self.columns['sum'][lo:hi] / np.maximum(count, 1),
+            'samples': count.copy()
+        }
+
+    def close_at(self, ts):
+        """Close of the last bucket starting at or before ts, or None"""
+        i = self._start + int(np.searchsorted(self.time[self._start:self._end], ts, 'right')) - 1
+        return float(self.columns['close'][i]) if i >= self._start else None
+
+    def first_time(self):
+        return int(self.time[self._start]) if len(self) else None
+
+    def _make_room(self, now):
+        cutoff = now - self.retention
+        self._start += int(np.searchsorted(self.time[self._start:self._end], cutoff, 'right'))
+        size = len(self)
+        capacity = len(self.time)
+        if size > capacity // 2:
+            capacity *= 2
+        for name in ('time', 'count'):
+            setattr(self, name, self._compact(getattr(self, name), size, capacity))
+        for field in self.FIELDS:
+            self.columns[field] = self._compact(self.columns[field], size, capacity)
+        self._start, self._end = 0, size
+
+    def _compact(self, column, size, capacity):
+        compacted = np.zeros(capacity, dtype=column.dtype)
+        compacted[:size] = column[self._start:self._start + size]
+        return compacted
+
+
+class TimeSeriesStore:
+    """Named series (e.g. 'price:ethereum', 'gas:standard') with 1m/1h/1d rollups.
+
+    Samples are folded straight into each rollup, so no raw samples are
+    kept and queries never touch more than the buckets they return.
+    """
+
+    def __init__(self, rollups=ROLLUPS):
+        self.rollups = rollups
+        self._series = {}
+        self._lock = threading.Lock()
+        self._counters = {'samples': 0, 'late_dropped': 0}
+
+    def add(self, name, value, ts=None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._add_locked(name, float(value), ts)
+
+    def add_many(self, samples, ts=None):
+        """Record {name: value} taken at the same moment"""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for name, value in samples.items():
+                self._add_locked(name, float(value), ts)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def candles(self, name, resolution='1h', start=None, end=None, limit=None):
+        """OHLC columns (numpy arrays) for a series, or None if it has no data"""
+        with self._lock:
+            rollups = self._series.get(name)
+            if rollups is None:
+                return None
+            return rollups[resolution].candles(start, end, limit)
+
+    def value_at(self, name, ts):
+        """Last recorded value at or before ts, from the finest rollup still covering ts"""
+        with self._lock:
+            rollups = self._series.get(name)
+            if rollups is None:
+                return None
+            for rollup in rollups.values():
+                first = rollup.first_time()
+                if first is not None and first <= ts:
+                    return rollup.close_at(ts)
+            return None
+
+    def latest(self, name):
+        return self.value_at(name, time.time())
+
+    def returns(self, name, windows, now=None):
+        """Percent change over each window in seconds ({label: seconds}); None where history is too short"""
+        now = time.time() if now is None else now
+        current = self.value_at(name, now)
+        results = {}
+        for label, seconds in windows.items():
+            past = self.value_at(name, now - seconds)
+            results[label] = round((current / past - 1) * 100, 4) if current is not None and past else None
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                'series': len(self._series),
+                'buckets': {
+                    label: sum(len(rollups[label]) for rollups in self._series.values())
+                    for label, _, _ in self.rollups
+                }
+            }
+
+    def _add_locked(self, name, value, ts):
+        rollups = self._series.get(name)
+        if rollups is None:
+            rollups = self._series[name] = {
+                label: Rollup(seconds, retention) for label, seconds, retention in self.rollups
+            }
+        self._counters['samples'] += 1
+        for rollup in rollups.values():
+            if not rollup.add(ts, value):
+                self._counters['late_dropped'] += 1
+
+
+class MarketRecorder:
+    """Records market-data bus events into a TimeSeriesStore.
+
+    Each topic has an extractor turning event data into {series: value}.
+    On start it replays what the bus still retains, so a restarted worker
+    gets back as much recent history as the bus kept.
+    """
+
+    def __init__(self, bus, store):
+        self.bus = bus
+        self.store = store
+        self.extractors = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add_topic(self, topic, extractor):
+        self.extractors[topic] = extractor
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='market-recorder')
+                self._thread.start()
+
+    def record(self, event):
+        try:
+            samples = self.extractors[event['topic']](event['data'])
+        except Exception as e:
+            print(f"⚠️  Market recorder {event['topic']} error: {str(e)}")
+            return
+        self.store.add_many(samples, event['ts'])
+
+    def _run(self):
+        # Queue sized for the whole replay so none of it is dropped
+        maxsize = self.bus.retention * max(1, len(self.extractors))
+        subscription = self.bus.subscribe(list(self.extractors), maxsize=maxsize, from_offset=0)
+        while True:
+            event = subscription.get(timeout=5)
+            if event is not None:
+                self.record(event)
@@ -0,0 +1,100 @@
+import os
+
+from celery import Celery
+from celery.signals import worker_process_init
+
+from app import (
+    fetch_token_prices, fetch_gas_prices, price_cache, eth_reader, eth_connection, reset_after_fork
+)
+from snapshots import read_snapshot, write_snapshot, tracked_tokens
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+# Refresh cadence in seconds; upstream call volume depends only on these, not on traffic
+PRICE_REFRESH_INTERVAL = float(os.environ.get('PRICE_REFRESH_INTERVAL', 15))
+GAS_REFRESH_INTERVAL = float(os.environ.get('GAS_REFRESH_INTERVAL', 12))
+BLOCK_REFRESH_INTERVAL = float(os.environ.get('BLOCK_REFRESH_INTERVAL', 6))
+PRICE_BATCH_SIZE = int(os.environ.get('PRICE_BATCH_SIZE', 100))
+
+DEFAULT_TOKENS = os.environ.get('WORKER_TOKENS', 'ethereum,bitcoin,solana,usd-coin,tether').split(',')
+
+celery = Celery('worker', broker=REDIS_URL)
+celery.conf.update(
+    task_ignore_result=True,
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        'refresh-prices': {
+            'task': 'worker.refresh_prices',
+            'schedule': PRICE_REFRESH_INTERVAL,
+            # Drop queued refreshes that are already superseded by the next tick
+            'options': {'expires': PRICE_REFRESH_INTERVAL}
+        },
+        'refresh-gas': {
+            'task': 'worker.refresh_gas',
+            'schedule': GAS_REFRESH_INTERVAL,
+            'options': {'expires': GAS_REFRESH_INTERVAL}
+        },
+        'refresh-block': {
+            'task': 'worker.refresh_block',
+            'schedule': BLOCK_REFRESH_INTERVAL,
+            'options': {'expires': BLOCK_REFRESH_INTERVAL}
+        }
+    }
+)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Prefork children must not share the parent's pooled connections
+    reset_after_fork()
+
+
+@celery.task(name='worker.refresh_prices')
+def refresh_prices():
+    """Fetch every tracked token price and publish a new prices snapshot"""
+    token_ids = sorted(set(token.strip() for token in DEFAULT_TOKENS if token.strip()) | set(tracked_tokens()))
+
+    previous = read_snapshot('prices', max_age=None)
+    prices = dict(previous['data']) if previous else {}
+
+    fetched = 0
+    for start in range(0, len(token_ids), PRICE_BATCH_SIZE):
+        chunk = token_ids[start:start + PRICE_BATCH_SIZE]
+        try:
+            chunk_prices = fetch_token_prices(chunk)
+        except Exception as e:
+            print(f"⚠️  Price refresh failed: {str(e)}")
+            continue
+        for token_id, price_data in chunk_prices.items():
+            prices[token_id] = price_data
+            price_cache.set(token_id, price_data)
+        fetched += len(chunk_prices)
+
+    # Keep serving the last good snapshot rather than publishing an empty one
+    if fetched:
+        write_snapshot('prices', prices)
+    return fetched
+
+
+@celery.task(name='worker.refresh_gas')
+def refresh_gas():
+    """Fetch gas prices and publish a new gas snapshot"""
+    try:
+        gas_prices = fetch_gas_prices()
+    except Exception as e:
+        print(f"⚠️  Gas refresh failed: {str(e)}")
+        return None
+    return write_snapshot('gas', gas_prices)
+
+
+@celery.task(name='worker.refresh_block')
+def refresh_block():
+    """Fetch the latest block number and publish a new block snapshot"""
+    if not eth_connection.connected:
+        return None
+    try:
+        block_number = eth_reader.head()
+    except Exception as e:
+        print(f"⚠️  Block refresh failed: {str(e)}")
+        return None
+    return write_snapshot('block', {'block_number': block_number})